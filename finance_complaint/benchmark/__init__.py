@@ -0,0 +1,2 @@
+# ingestion benchmark is not imported here as it needs spark, fake server only needs standard library
+from finance_complaint.benchmark.fake_cfpb_server import FakeCfpbServer
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from urllib.parse import parse_qs, urlparse
+
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+
+API_PATH = "/data-research/consumer-complaints/search/api/v1/"
+
+PRODUCTS = {
+    "Mortgage": ["Conventional fixed mortgage", "FHA mortgage", "Home equity loan or line of credit"],
+    "Credit card": ["General-purpose credit card or charge card", "Store credit card"],
+    "Debt collection": ["Medical debt", "Credit card debt", "Payday loan debt"],
+    "Credit reporting": ["Credit reporting", "Other personal consumer report"],
+    "Bank account or service": ["Checking account", "Savings account", "CD (Certificate of Deposit)"],
+    "Student loan": ["Federal student loan servicing", "Private student loan"],
+}
+ISSUES = {
+    "Incorrect information on your report": ["Information belongs to someone else", "Account status incorrect"],
+    "Loan modification,collection,foreclosure": [None],
+    "Billing disputes": [None],
+    "Account opening, closing, or management": ["Closing an account", "Opening an account"],
+    "Attempts to collect debt not owed": ["Debt is not yours", "Debt was paid"],
+}
+COMPANIES = ["EQUIFAX, INC.", "Experian Information Solutions Inc.", "BANK OF AMERICA, NATIONAL ASSOCIATION",
+             "WELLS FARGO & COMPANY", "JPMORGAN CHASE & CO.", "CITIBANK, N.A.", "Navient Solutions, LLC.",
+             "CAPITAL ONE FINANCIAL CORPORATION"]
+COMPANY_RESPONSES = ["Closed with explanation", "Closed with non-monetary relief", "Closed with monetary relief",
+                     "Untimely response", "In progress"]
+STATES = ["CA", "FL", "TX", "NY", "GA", "IL", "PA", "OH", "NC", "NJ", "MI", "VA"]
+SUBMITTED_VIA = ["Web", "Referral", "Phone", "Postal mail", "Fax", "Email"]
+TAGS = [None, None, None, "Older American", "Servicemember", "Older American, Servicemember"]
+WORDS = ["account", "payment", "credit", "report", "loan", "bank", "called", "told", "company", "balance",
+         "late", "fees", "interest", "dispute", "letter", "collection", "mortgage", "paid", "months", "never",
+         "information", "received", "card", "charged", "debt", "contacted", "refused", "incorrect", "closed"]
+
+
+class FakeCfpbHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients dropping idle keep-alive connections are expected and not worth a traceback
+        logger.debug(f"Connection of {client_address} closed with error: {sys.exc_info()[1]}")
+
+
+class FakeCfpbServer:
+    """
+    Local stand-in of CFPB complaint search api serving synthetic complaints so that ingestion
+    can be benchmarked without calling consumerfinance.gov.
+    Complaints of a day are generated from seed and day only, so the same date range always
+    returns the same complaints however it is split into intervals.
+    Throttled (429 with Retry-After) and malformed responses are injected at given ratios.
+
+    with FakeCfpbServer(records_per_day=200, ...) as server:
+        data_ingestion_config = replace(data_ingestion_config, data_source_url=server.data_source_url)
+    """
+
+    def __init__(self, records_per_day: int, narrative_words: int, latency_ms: float, throttle_ratio: float,
+                 malformed_ratio: float, retry_after: float, seed: int, host: str = "127.0.0.1", port: int = 0):
+        self.records_per_day = records_per_day
+        self.narrative_words = narrative_words
+        self.latency = latency_ms / 1000
+        self.throttle_ratio = throttle_ratio
+        self.malformed_ratio = malformed_ratio
+        self.retry_after = retry_after
+        self.seed = seed
+        self.host = host
+        self.port = port
+        # faults are drawn per request so a retried request can succeed
+        self._fault_random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+        self._server: ThreadingHTTPServer = None
+        self._thread: threading.Thread = None
+
+    @property
+    def data_source_url(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PATH}" \
+               f"?date_received_max=<todate>&date_received_min=<fromdate>&field=all&format=json"
+
+    def count(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def draw_fault(self) -> str:
+        """
+        returns throttle, truncated, invalid or None
+        """
+        with self._lock:
+            value = self._fault_random.random()
+            kind = self._fault_random.random()
+        if value < self.throttle_ratio:
+            return "throttle"
+        if value < self.throttle_ratio + self.malformed_ratio:
+            # half of malformed responses stop in middle of array, others are not json at all
+            return "truncated" if kind < 0.5 else "invalid"
+        return None
+
+    def get_n_record(self, from_date: str, to_date: str) -> int:
+        n_days = (datetime.strptime(to_date, "%Y-%m-%d") - datetime.strptime(from_date, "%Y-%m-%d")).days
+        return max(0, n_days) * self.records_per_day
+
+    def get_etag(self, from_date: str, to_date: str) -> str:
+        key = f"{self.seed}:{self.records_per_day}:{self.narrative_words}:{from_date}:{to_date}"
+        return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+    def generate_record(self, day: datetime, index: int) -> dict:
+        day_number = day.toordinal()
+        rng = random.Random(self.seed * 1000003 + day_number * 100003 + index)
+        product = rng.choice(list(PRODUCTS))
+        issue = rng.choice(list(ISSUES))
+        has_narrative = rng.random() < 0.6
+        narrative = " ".join(rng.choice(WORDS) for _ in range(self.narrative_words)) if has_narrative else ""
+        date_received = day.strftime("%Y-%m-%d") + f"T{rng.randint(0, 23):02d}:00:00-05:00"
+        date_sent = (day + timedelta(days=rng.randint(0, 5))).strftime("%Y-%m-%d") + "T12:00:00-05:00"
+        return {
+            "_index": "complaint-public-v2",
+            "_type": "_doc",
+            "_id": str(day_number * 100000 + index),
+            "_score": None,
+            "_source": {
+                "product": product,
+                "complaint_what_happened": narrative,
+                "date_sent_to_company": date_sent,
+                "issue": issue,
+                "sub_product": rng.choice(PRODUCTS[product]),
+                "zip_code": f"{rng.randint(10, 99)}XXX",
+                "tags": rng.choice(TAGS),
+                "has_narrative": has_narrative,
+                "complaint_id": str(day_number * 100000 + index),
+                "timely": "Yes" if rng.random() < 0.97 else "No",
+                "consumer_consent_provided": "Consent provided" if has_narrative else "Consent not provided",
+                "company_response": rng.choice(COMPANY_RESPONSES),
+                "submitted_via": rng.choice(SUBMITTED_VIA),
+                "company": rng.choice(COMPANIES),
+                "date_received": date_received,
+                "state": rng.choice(STATES),
+                "consumer_disputed": rng.choice(["Yes", "No", "N/A"]),
+                "company_public_response": None,
+                "sub_issue": rng.choice(ISSUES[issue]),
+            },
+        }
+
+    def iter_body(self, from_date: str, to_date: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Json array of complaints received in [from_date, to_date) in chunks of about chunk_size bytes
+        """
+        day = datetime.strptime(from_date, "%Y-%m-%d")
+        end_day = datetime.strptime(to_date, "%Y-%m-%d")
+        buffer = [b"["]
+        n_buffered = 1
+        separator = b""
+        while day < end_day:
+            for index in range(self.records_per_day):
+                record = separator + json.dumps(self.generate_record(day, index)).encode("utf-8")
+                separator = b","
+                buffer.append(record)
+                n_buffered += len(record)
+                if n_buffered >= chunk_size:
+                    yield b"".join(buffer)
+                    buffer, n_buffered = [], 0
+            day += timedelta(days=1)
+        buffer.append(b"]")
+        yield b"".join(buffer)
+
+    def start(self) -> "FakeCfpbServer":
+        try:
+            handler = type("FakeCfpbRequestHandler", (FakeCfpbRequestHandler,), {"fake_server": self})
+            self._server = FakeCfpbHttpServer((self.host, self.port), handler)
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-cfpb-server",
+                                            daemon=True)
+            self._thread.start()
+            logger.info(f"Fake CFPB api is serving at {self.data_source_url}")
+            return self
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeCfpbServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class FakeCfpbRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET API_PATH?date_received_min=<fromdate>&date_received_max=<todate>
+    Body is sent with chunked transfer encoding and gzip compressed if client accepts it,
+    the same way the real api streams large intervals.
+    """
+    protocol_version = "HTTP/1.1"
+    fake_server: FakeCfpbServer = None
+
+    def _send_error(self, status: int, body: bytes, content_type: str = "application/json", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        if len(data) > 0:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_GET(self):
+        server = self.fake_server
+        url = urlparse(self.path)
+        if url.path != API_PATH:
+            self._send_error(404, b'{"error": "not found"}')
+            return
+        query = parse_qs(url.query)
+        try:
+            from_date = query["date_received_min"][0]
+            to_date = query["date_received_max"][0]
+            datetime.strptime(from_date, "%Y-%m-%d")
+            datetime.strptime(to_date, "%Y-%m-%d")
+        except (KeyError, ValueError):
+            self._send_error(400, b'{"error": "date_received_min and date_received_max are required"}')
+            return
+
+        time.sleep(server.latency)
+        fault = server.draw_fault()
+        if fault == "throttle":
+            server.count("throttled")
+            self._send_error(429, b'{"message": "API rate limit exceeded"}',
+                             headers={"Retry-After": str(server.retry_after)})
+            return
+        if fault == "invalid":
+            server.count("invalid")
+            self._send_error(200, b"<html><body>Service temporarily unavailable</body></html>",
+                             content_type="text/html")
+            return
+
+        etag = server.get_etag(from_date, to_date)
+        if fault is None and self.headers.get("If-None-Match") == etag:
+            server.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        is_gzip = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("ETag", etag)
+        if is_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if is_gzip else None
+        n_chunk_before_truncation = 1 if fault == "truncated" else None
+        for chunk in server.iter_body(from_date, to_date):
+            if n_chunk_before_truncation is not None:
+                if n_chunk_before_truncation == 0:
+                    break
+                n_chunk_before_truncation -= 1
+                # cut inside a record so body can not be parsed
+                chunk = chunk[:max(1, len(chunk) // 2)]
+            self._write_chunk(compressor.compress(chunk) if is_gzip else chunk)
+        if fault == "truncated":
+            # connection is dropped without terminating chunk just like an interrupted response
+            if is_gzip:
+                self._write_chunk(compressor.flush(zlib.Z_SYNC_FLUSH))
+            server.count("truncated")
+            self.close_connection = True
+            return
+        if is_gzip:
+            self._write_chunk(compressor.flush())
+        self.wfile.write(b"0\r\n\r\n")
+        server.count("served")
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,185 @@
+import os
+import shutil
+import statistics
+import sys
+from dataclasses import replace
+from typing import Dict, List
+
+from finance_complaint.benchmark.fake_cfpb_server import FakeCfpbServer
+from finance_complaint.components.training_components.data_ingestion import DataIngestion
+from finance_complaint.configs.training_pipeline_config import FinanceConfig
+from finance_complaint.constants import TIMESTAMP
+from finance_complaint.constants.training_pipeline_constants import METRICS_DIR
+from finance_complaint.entities.artifact_entities import BenchmarkArtifact
+from finance_complaint.entities.config_entities import BenchmarkConfig, DataIngestionConfig, TrainingPipelineConfig
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger, span_durations
+from finance_complaint.utils import get_config_fingerprint, read_yaml_file, write_yaml_file
+from finance_complaint.utils.pipeline_metrics import measure_stage
+
+BENCHMARK_STAGE = "benchmark.data_ingestion"
+# phases of ingestion timed by spans of DataIngestion
+PHASE_SPANS = {
+    "download": "data_ingestion.download_intervals",
+    "parquet_conversion": "data_ingestion.convert_files_to_parquet",
+}
+# result metric -> True if higher value is better
+COMPARED_METRICS = {
+    "total_seconds": False,
+    "download_seconds": False,
+    "parquet_conversion_seconds": False,
+    "download_records_per_second": True,
+    "parquet_conversion_records_per_second": True,
+    "records_per_second": True,
+    "peak_rss_bytes": False,
+}
+
+
+class IngestionBenchmark:
+    """
+    Runs DataIngestion end to end (interval planning, download, retry, parquet conversion)
+    against FakeCfpbServer in a throwaway artifact directory and stores throughput, memory
+    and per phase timing of the run. Runs of same scenario are compared with median of
+    previous runs so that a slowdown of ingestion hot path is reported as regression.
+    """
+
+    def __init__(self, benchmark_config: BenchmarkConfig):
+        try:
+            logger.info(f"{'>>' * 20}Starting ingestion benchmark.{'<<' * 20}")
+            self.benchmark_config = benchmark_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @property
+    def scenario(self) -> dict:
+        config = self.benchmark_config
+        return {
+            "from_date": config.from_date,
+            "to_date": config.to_date,
+            "records_per_day": config.records_per_day,
+            "narrative_words": config.narrative_words,
+            "latency_ms": config.latency_ms,
+            "throttle_ratio": config.throttle_ratio,
+            "malformed_ratio": config.malformed_ratio,
+            "retry_after": config.retry_after,
+            "retry_base_delay": config.retry_base_delay,
+            "retry_max_delay": config.retry_max_delay,
+            "requests_per_second": config.requests_per_second,
+            "seed": config.seed,
+        }
+
+    @property
+    def scenario_result_dir(self) -> str:
+        return os.path.join(self.benchmark_config.result_dir, get_config_fingerprint(self.scenario))
+
+    def get_data_ingestion_config(self, data_source_url: str) -> DataIngestionConfig:
+        """
+        Ingestion config of a fresh pipeline whose artifacts are kept in run directory of benchmark,
+        so no metadata, interval plan or http cache of earlier runs is reused
+        """
+        config = self.benchmark_config
+        finance_config = FinanceConfig()
+        finance_config.pipeline_config = TrainingPipelineConfig(pipeline_name=finance_config.pipeline_name,
+                                                                artifact_dir=config.run_dir)
+        data_ingestion_config = finance_config.get_data_ingestion_config(from_date=config.from_date,
+                                                                         to_date=config.to_date)
+        return replace(data_ingestion_config,
+                       data_source_url=data_source_url,
+                       requests_per_second=config.requests_per_second,
+                       retry_base_delay=config.retry_base_delay,
+                       retry_max_delay=config.retry_max_delay,
+                       mirror_to_complaint_store=False)
+
+    def get_previous_results(self) -> List[dict]:
+        result_dir = self.scenario_result_dir
+        if not os.path.exists(result_dir):
+            return []
+        file_names = sorted(file_name for file_name in os.listdir(result_dir) if file_name.endswith(".yaml"))
+        file_names = file_names[-self.benchmark_config.n_baseline_run:]
+        return [read_yaml_file(os.path.join(result_dir, file_name)) for file_name in file_names]
+
+    def get_regressions(self, metrics: Dict[str, float], previous_results: List[dict]) -> List[dict]:
+        """
+        Metrics worse than median of previous runs by more than regression tolerance
+        """
+        regressions = []
+        tolerance = self.benchmark_config.regression_tolerance
+        for name, is_higher_better in COMPARED_METRICS.items():
+            previous_values = [result["metrics"][name] for result in previous_results
+                               if result.get("metrics", {}).get(name) is not None]
+            if metrics.get(name) is None or len(previous_values) == 0:
+                continue
+            baseline = statistics.median(previous_values)
+            if baseline == 0:
+                continue
+            change = (metrics[name] - baseline) / baseline
+            if (is_higher_better and change < -tolerance) or (not is_higher_better and change > tolerance):
+                regressions.append({"metric": name, "value": metrics[name], "baseline": baseline,
+                                    "change": round(change, 4)})
+        return regressions
+
+    def initiate_benchmark(self) -> BenchmarkArtifact:
+        try:
+            config = self.benchmark_config
+            with FakeCfpbServer(records_per_day=config.records_per_day,
+                                narrative_words=config.narrative_words,
+                                latency_ms=config.latency_ms,
+                                throttle_ratio=config.throttle_ratio,
+                                malformed_ratio=config.malformed_ratio,
+                                retry_after=config.retry_after,
+                                seed=config.seed) as server:
+                data_ingestion = DataIngestion(data_ingestion_config=self.get_data_ingestion_config(
+                    server.data_source_url))
+                # metrics of benchmark are kept with its results, apart from metrics of pipeline runs
+                with measure_stage(BENCHMARK_STAGE,
+                                   metrics_dir=os.path.join(config.result_dir, METRICS_DIR)) as stage_metrics:
+                    data_ingestion.initiate_data_ingestion(resume=False)
+                server_stats = server.get_stats()
+                n_expected_record = server.get_n_record(config.from_date, config.to_date)
+
+            n_downloaded_record = sum(stat.n_record for stat in data_ingestion.interval_stats)
+            total_seconds = stage_metrics["duration_seconds"]
+            metrics = {
+                "total_seconds": total_seconds,
+                "records_per_second": n_downloaded_record / total_seconds if total_seconds > 0 else None,
+                "peak_rss_bytes": stage_metrics.get('finance_peak_rss_bytes{process="python"}'),
+                "peak_children_rss_bytes": stage_metrics.get('finance_peak_rss_bytes{process="children"}'),
+            }
+            for phase, span_name in PHASE_SPANS.items():
+                if len(span_durations.get(span_name, [])) > 0:
+                    metrics[f"{phase}_seconds"] = span_durations[span_name][-1]
+                metrics[f"{phase}_records_per_second"] = stage_metrics.get(
+                    f'finance_records_per_second{{operation="{phase}"}}')
+            metrics["other_seconds"] = total_seconds - sum(metrics.get(f"{phase}_seconds", 0)
+                                                           for phase in PHASE_SPANS)
+
+            regressions = self.get_regressions(metrics, self.get_previous_results())
+            result = {
+                "timestamp": TIMESTAMP,
+                "scenario": self.scenario,
+                "n_expected_record": n_expected_record,
+                "n_downloaded_record": n_downloaded_record,
+                "n_converted_record": data_ingestion.n_converted_record,
+                "n_dead_letter": len(data_ingestion.failed_download_urls),
+                "server_responses": server_stats,
+                "metrics": metrics,
+                "stage_metrics": stage_metrics,
+                "regressions": regressions,
+            }
+            result_file_path = os.path.join(self.scenario_result_dir, f"{TIMESTAMP}.yaml")
+            write_yaml_file(file_path=result_file_path, data=result)
+            shutil.rmtree(config.run_dir, ignore_errors=True)
+
+            if n_downloaded_record != n_expected_record:
+                logger.warning(f"Benchmark downloaded {n_downloaded_record} records "
+                               f"but fake server has {n_expected_record}")
+            for regression in regressions:
+                logger.warning(f"Benchmark regression: {regression}")
+            artifact = BenchmarkArtifact(result_file_path=result_file_path,
+                                         n_record=n_downloaded_record,
+                                         records_per_second=metrics["records_per_second"],
+                                         regressions=regressions)
+            logger.info(f"Benchmark artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
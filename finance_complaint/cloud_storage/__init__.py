@@ -0,0 +1,2 @@
+from finance_complaint.cloud_storage.storage_backend import StorageBackend, LocalStorageBackend, S3StorageBackend
+from finance_complaint.cloud_storage.content_addressed_storage import ContentAddressedStorage, PushResult
@@ -0,0 +1,170 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import yaml
+
+from finance_complaint.cloud_storage.storage_backend import StorageBackend
+from finance_complaint.entities.manifest_entity import get_file_checksum
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import write_yaml_file, read_yaml_file
+
+
+@dataclass
+class PushResult:
+    manifest_key : str
+    n_file : int
+    n_byte : int
+    n_uploaded_file : int
+    n_uploaded_byte : int
+
+
+class ContentAddressedStorage:
+    """
+    Files are stored once per content as <prefix>/objects/<sha256[:2]>/<sha256> and every pushed
+    directory is a manifest <prefix>/manifests/<name>/<version>.yaml of relative path -> sha256.
+    An unchanged file is never uploaded again, so a push costs time and bandwidth
+    proportional to what changed since the previous push.
+    """
+
+    OBJECT_DIR = "objects"
+    MANIFEST_DIR = "manifests"
+    LATEST_FILE_NAME = "LATEST"
+
+    def __init__(self, backend: StorageBackend, prefix: str, max_workers: int, hash_cache_file_path: str):
+        try:
+            self.backend = backend
+            self.prefix = prefix
+            self.max_workers = max_workers
+            self.hash_cache_file_path = hash_cache_file_path
+            # absolute file path -> {size, mtime_ns, checksum}, unchanged files are not hashed again
+            self.hash_cache = {}
+            if os.path.exists(hash_cache_file_path):
+                self.hash_cache = read_yaml_file(hash_cache_file_path) or {}
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_object_key(self, checksum: str) -> str:
+        return f"{self.prefix}/{self.OBJECT_DIR}/{checksum[:2]}/{checksum}"
+
+    def get_manifest_key(self, name: str, version: str) -> str:
+        return f"{self.prefix}/{self.MANIFEST_DIR}/{name}/{version}.yaml"
+
+    def get_latest_key(self, name: str) -> str:
+        return f"{self.prefix}/{self.MANIFEST_DIR}/{name}/{self.LATEST_FILE_NAME}"
+
+    def get_checksum(self, file_path: str) -> str:
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        cached = self.hash_cache.get(file_path)
+        if cached is not None and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["checksum"]
+        checksum = get_file_checksum(file_path)
+        with self._lock:
+            self.hash_cache[file_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "checksum": checksum}
+        return checksum
+
+    def list_files(self, local_dir: str) -> dict:
+        """
+        returns dict of relative file path -> absolute file path, temporary files are skipped
+        """
+        files = {}
+        for root, _, file_names in os.walk(local_dir):
+            for file_name in file_names:
+                if file_name.startswith(".") and file_name.endswith(".tmp"):
+                    continue
+                file_path = os.path.join(root, file_name)
+                files[os.path.relpath(file_path, local_dir).replace(os.sep, "/")] = file_path
+        return files
+
+    def get_latest_version(self, name: str):
+        if not self.backend.exists(self.get_latest_key(name)):
+            return None
+        return self.backend.get_bytes(self.get_latest_key(name)).decode("utf-8").strip()
+
+    def get_manifest(self, name: str, version: str = None) -> dict:
+        """
+        returns files of manifest as relative path -> {checksum, size}, empty if nothing was pushed
+        """
+        try:
+            version = version or self.get_latest_version(name)
+            if version is None:
+                return {}
+            manifest = yaml.safe_load(self.backend.get_bytes(self.get_manifest_key(name, version)))
+            return manifest.get("files", {})
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def push_dir(self, local_dir: str, name: str, version: str) -> PushResult:
+        try:
+            logger.info(f"Pushing [{local_dir}] as [{name}/{version}]")
+            local_files = self.list_files(local_dir)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                checksums = dict(zip(local_files.keys(), executor.map(self.get_checksum, local_files.values())))
+            manifest_files = {relative_path: {"checksum": checksums[relative_path],
+                                              "size": os.path.getsize(file_path)}
+                              for relative_path, file_path in local_files.items()}
+
+            # objects referenced by previous version are known to exist, others are checked with backend
+            known_checksums = {file_info["checksum"] for file_info in self.get_manifest(name).values()}
+            pending_objects = {}
+            for relative_path, file_info in manifest_files.items():
+                if file_info["checksum"] not in known_checksums:
+                    pending_objects[file_info["checksum"]] = local_files[relative_path]
+
+            def upload_object(checksum: str) -> int:
+                object_key = self.get_object_key(checksum)
+                if self.backend.exists(object_key):
+                    return 0
+                file_path = pending_objects[checksum]
+                self.backend.upload_file(file_path, object_key)
+                return os.path.getsize(file_path)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                uploaded_bytes = [n_byte for n_byte in executor.map(upload_object, pending_objects) if n_byte > 0]
+
+            # manifest is written after all of its objects, so a visible manifest is always complete
+            manifest_key = self.get_manifest_key(name, version)
+            self.backend.put_bytes(manifest_key, yaml.dump({"name": name, "version": version,
+                                                            "files": manifest_files}).encode("utf-8"))
+            self.backend.put_bytes(self.get_latest_key(name), version.encode("utf-8"))
+            write_yaml_file(file_path=self.hash_cache_file_path, data=self.hash_cache)
+
+            push_result = PushResult(manifest_key=manifest_key,
+                                     n_file=len(manifest_files),
+                                     n_byte=sum(file_info["size"] for file_info in manifest_files.values()),
+                                     n_uploaded_file=len(uploaded_bytes),
+                                     n_uploaded_byte=sum(uploaded_bytes))
+            logger.info(f"Push result: {push_result}")
+            return push_result
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def pull_dir(self, name: str, local_dir: str, version: str = None) -> int:
+        """
+        Downloads only files of the manifest that are missing or different in local_dir
+        returns number of downloaded files
+        """
+        try:
+            manifest_files = self.get_manifest(name, version)
+            if len(manifest_files) == 0:
+                raise Exception(f"Nothing pushed as [{name}] yet")
+
+            def download_object(item) -> int:
+                relative_path, file_info = item
+                file_path = os.path.join(local_dir, *relative_path.split("/"))
+                if os.path.exists(file_path) and self.get_checksum(file_path) == file_info["checksum"]:
+                    return 0
+                self.backend.download_file(self.get_object_key(file_info["checksum"]), file_path)
+                return 1
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                n_downloaded = sum(executor.map(download_object, manifest_files.items()))
+            logger.info(f"Pulled [{name}] into [{local_dir}], downloaded files: {n_downloaded}")
+            return n_downloaded
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,142 @@
+import os
+import shutil
+import sys
+from abc import ABC, abstractmethod
+
+from finance_complaint.exception import FinanceException
+from finance_complaint.utils import get_temp_file_path
+
+
+class StorageBackend(ABC):
+    """
+    Minimal object store interface used by ContentAddressedStorage, keys are "/" separated
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def upload_file(self, file_path: str, key: str):
+        pass
+
+    @abstractmethod
+    def download_file(self, key: str, file_path: str):
+        pass
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        pass
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes:
+        pass
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Keeps objects in a local directory, stands in for S3 in tests and local runs
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def get_object_path(self, key: str) -> str:
+        return os.path.join(self.root_dir, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.get_object_path(key))
+
+    def _copy(self, source_path: str, destination_path: str):
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        temp_file_path = get_temp_file_path(destination_path)
+        shutil.copyfile(source_path, temp_file_path)
+        os.replace(temp_file_path, destination_path)
+
+    def upload_file(self, file_path: str, key: str):
+        try:
+            self._copy(file_path, self.get_object_path(key))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def download_file(self, key: str, file_path: str):
+        try:
+            self._copy(self.get_object_path(key), file_path)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def put_bytes(self, key: str, data: bytes):
+        try:
+            object_path = self.get_object_path(key)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temp_file_path = get_temp_file_path(object_path)
+            with open(temp_file_path, "wb") as file_obj:
+                file_obj.write(data)
+            os.replace(temp_file_path, object_path)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            with open(self.get_object_path(key), "rb") as file_obj:
+                return file_obj.read()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Objects are kept in an S3 bucket, files above multipart_chunksize are uploaded
+    and downloaded in parts of multipart_chunksize by max_concurrency threads
+    """
+
+    def __init__(self, bucket_name: str, region_name: str, multipart_chunksize: int, max_concurrency: int):
+        try:
+            # boto3 is needed only when S3 is used
+            from boto3.s3.transfer import TransferConfig
+            from finance_complaint.configs.aws_connection_config import AWSConnectionConfig
+            self.bucket_name = bucket_name
+            self.s3_client = AWSConnectionConfig(region_name=region_name).s3_client
+            self.transfer_config = TransferConfig(multipart_threshold=multipart_chunksize,
+                                                  multipart_chunksize=multipart_chunksize,
+                                                  max_concurrency=max_concurrency,
+                                                  use_threads=True)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise FinanceException(e, sys)
+
+    def upload_file(self, file_path: str, key: str):
+        try:
+            self.s3_client.upload_file(file_path, self.bucket_name, key, Config=self.transfer_config)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def download_file(self, key: str, file_path: str):
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            temp_file_path = get_temp_file_path(file_path)
+            self.s3_client.download_file(self.bucket_name, key, temp_file_path, Config=self.transfer_config)
+            os.replace(temp_file_path, file_path)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def put_bytes(self, key: str, data: bytes):
+        try:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=data)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+        except Exception as e:
+            raise FinanceException(e, sys)
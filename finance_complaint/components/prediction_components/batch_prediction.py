@@ -0,0 +1,131 @@
+import os
+import sys
+from typing import List
+
+from pyspark.ml import PipelineModel
+from pyspark.ml.functions import vector_to_array
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.constants import TIMESTAMP
+from finance_complaint.data_access import MongoComplaintStore
+from finance_complaint.entities.artifact_entities import BatchPredictionArtifact
+from finance_complaint.entities.config_entities import BatchPredictionConfig
+from finance_complaint.entities.metadata_entity import BatchPredictionMetadata
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.feature_store import FeatureStoreIndex, FeatureStoreReader
+from finance_complaint.logger import logger
+from finance_complaint.utils.model_resolver import ModelResolver
+
+
+class BatchPrediction:
+    """
+    Scores complaints that reached feature store since previous run with the pushed model.
+    Complaints can arrive late with an old date_received, so new ones are found by partitions whose
+    number of records has changed since previous run and complaints already predicted are left out.
+    Model is loaded once on driver and shipped with the spark plan, so every executor
+    scores whole partitions in the jvm instead of calling python per record.
+    """
+
+    def __init__(self, batch_prediction_config: BatchPredictionConfig):
+        try:
+            logger.info(f"{'>>' * 20}Starting batch prediction.{'<<' * 20}")
+            self.batch_prediction_config = batch_prediction_config
+            self.schema = FinanceDataSchema()
+            self.model_resolver = ModelResolver(model_dir=batch_prediction_config.saved_model_dir)
+            self.metadata = BatchPredictionMetadata(batch_prediction_config.metadata_file_path)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_changed_partitions(self, partition_records: dict) -> List[str]:
+        """
+        partition_records: relative partition directory -> number of records in feature store
+        returns partitions whose number of records differs from previous run, every partition on first run
+        """
+        predicted_partition_records = self.metadata.get_partition_records()
+        return [partition_dir for partition_dir, n_record in partition_records.items()
+                if predicted_partition_records.get(partition_dir) != n_record]
+
+    def get_new_complaints(self, partition_dirs: List[str]) -> DataFrame:
+        """
+        Only files of changed partitions are read, complaints already predicted are
+        anti-joined with complaint_ids of same partitions of prediction output
+        """
+        config = self.batch_prediction_config
+        partitions = [self.schema.parse_partition_path(partition_dir) for partition_dir in partition_dirs]
+        reader = FeatureStoreReader(file_path=config.feature_store_file_path, schema=self.schema)
+        dataframe = reader.read_dataframe(partitions=partitions)
+        if len(partitions) == 0 or not os.path.exists(config.prediction_file_path):
+            return dataframe
+        predicted_df = get_spark_session().read.parquet(config.prediction_file_path) \
+            .filter(self.schema.get_partition_filter(partitions)) \
+            .select(self.schema.col_complaint_id)
+        return dataframe.join(predicted_df, on=self.schema.col_complaint_id, how="left_anti")
+
+    def predict(self, model: PipelineModel, dataframe: DataFrame, model_path: str) -> DataFrame:
+        config = self.batch_prediction_config
+        spark_session = get_spark_session()
+        # feature store may have few large files, spread them over every available core
+        n_partition = spark_session.sparkContext.defaultParallelism
+        if dataframe.rdd.getNumPartitions() < n_partition:
+            dataframe = dataframe.repartition(n_partition)
+        prediction_df = model.transform(dataframe)
+        return prediction_df.select(
+            *config.output_columns,
+            *self.schema.partition_columns,
+            F.when(F.col("prediction") == 1.0, F.lit(config.positive_label))
+                .otherwise(F.lit(config.negative_label)).alias(config.prediction_column),
+            vector_to_array(F.col("probability"))[1].alias(config.probability_column),
+            F.lit(model_path).alias("model_path"),
+            F.lit(TIMESTAMP).alias("predicted_at"))
+
+    def initiate_batch_prediction(self) -> BatchPredictionArtifact:
+        try:
+            config = self.batch_prediction_config
+            model_path = self.model_resolver.get_latest_model_path()
+            index = FeatureStoreIndex(file_path=config.feature_store_file_path, schema=self.schema)
+            # files written since feature store was last indexed are counted too
+            index.refresh()
+            partition_records = {partition_dir: partition_stats["n_record"]
+                                 for partition_dir, partition_stats in index.partitions.items()}
+            changed_partitions = self.get_changed_partitions(partition_records)
+            logger.info(f"Predicting new complaints of {len(changed_partitions)} of {len(partition_records)} "
+                        f"partitions with model: {model_path}")
+
+            model = PipelineModel.load(model_path)
+            prediction_df = self.predict(model, self.get_new_complaints(changed_partitions), model_path).persist()
+            try:
+                summary = prediction_df.agg(F.count(F.lit(1)).alias("n_record"),
+                                            F.max(self.schema.col_date_received).alias("max_date_received")).first()
+                n_record = summary["n_record"]
+                max_date_received = max(filter(None, [summary["max_date_received"], self.metadata.get_watermark()]),
+                                        default=None)
+                if n_record > 0:
+                    prediction_df.write.mode("append") \
+                        .partitionBy(*self.schema.partition_columns) \
+                        .parquet(config.prediction_file_path)
+                    if config.write_to_mongodb:
+                        collection_name, batch_size = config.collection_name, config.mongodb_batch_size
+                        # every worker upserts its partitions on complaint_id in unordered bulk writes
+                        prediction_df.drop(*self.schema.partition_columns).foreachPartition(
+                            lambda rows: MongoComplaintStore(collection_name=collection_name, batch_size=batch_size)
+                            .save_documents(row.asDict() for row in rows))
+                # partitions are marked as predicted only after their predictions are written
+                if len(changed_partitions) > 0:
+                    self.metadata.write_watermark(max_date_received=max_date_received,
+                                                  model_path=model_path,
+                                                  n_record=n_record,
+                                                  partition_records=partition_records)
+            finally:
+                prediction_df.unpersist()
+
+            artifact = BatchPredictionArtifact(prediction_file_path=config.prediction_file_path,
+                                               model_path=model_path,
+                                               n_record=n_record,
+                                               max_date_received=max_date_received)
+            logger.info(f"Batch prediction artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
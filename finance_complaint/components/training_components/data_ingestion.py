@@ -1,23 +1,43 @@
-import json
+import heapq
+import itertools
+import math
 import os
-import re
+import random
 import requests
 import sys
 import time
-import uuid
-from dataclasses import dataclass
-from datetime import datetime
-from typing import List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Iterable, List, Tuple
 
 import pandas as pd
+from pyspark.sql import DataFrame
 
-from finance_complaint.configs.spark_manager import spark_session
+from finance_complaint.configs.http_client import HttpClient
 from finance_complaint.configs.training_pipeline_config import FinanceConfig
+from finance_complaint.constants.training_pipeline_constants import DATA_INGESTION_STREAM_CHUNK_SIZE, \
+    DATA_INGESTION_FAILED_RESPONSE_MAX_BYTES, DATA_INGESTION_DENSITY_WINDOW, DATA_INGESTION_REPLAY_MANIFEST_FILE_NAME
+from finance_complaint.data_access import ChangeStreamNotSupported, ComplaintStore, get_complaint_store
 from finance_complaint.entities.artifact_entities import DataIngestionArtifact
 from finance_complaint.entities.config_entities import DataIngestionConfig
-from finance_complaint.entities.metadata_entity import DataIngestionMetadata
+from finance_complaint.entities.manifest_entity import DataIngestionManifest, INTERVAL_STATE_PENDING, \
+    INTERVAL_STATE_DOWNLOADED
+from finance_complaint.entities.metadata_entity import DataIngestionMetadata, DataIngestionIntervalPlan, \
+    IntervalStat, DataIngestionHttpCache, DataIngestionDeadLetterQueue, DeadLetter, ComplaintStoreSyncMetadata
+from finance_complaint.entities.schema import FinanceDataSchema
 from finance_complaint.exception import FinanceException
-from finance_complaint.logger import logger
+from finance_complaint.feature_store.conversion_engine import CONVERSION_ENGINE_SPARK, \
+    FEATURE_STORE_WRITE_MODE_UPSERT, ConversionEngine, SparkConversionEngine, get_conversion_engine, \
+    select_conversion_engine
+from finance_complaint.feature_store.feature_store_index import FeatureStoreIndex
+from finance_complaint.logger import logger, span
+from finance_complaint.utils.json_stream import iter_json_array
+from finance_complaint.utils.landing_file import LandingFileWriter, get_landing_file_path
+from finance_complaint.utils.pipeline_metrics import DOWNLOAD_INTERVALS, DOWNLOAD_INTERVAL_BYTES, DOWNLOAD_RECORDS, \
+    DOWNLOAD_RETRIES, observe_records_per_second
+from finance_complaint.utils.rate_limiter import TokenBucketRateLimiter
 
 
 @dataclass
@@ -25,6 +45,43 @@ class DownloadUrl:
     url: str
     file_path: str
     n_retry: int
+    from_date: str = None
+    to_date: str = None
+    # time.monotonic() before which download should not be retried
+    not_before: float = 0
+
+
+class ResponseHead(bytearray):
+    """
+    Leading bytes of a streamed response along with number of bytes streamed so far
+    """
+    n_byte: int = 0
+
+
+def get_retry_after(response) -> float:
+    """
+    Seconds to wait as asked by Retry-After header, it is either seconds or http date
+    """
+    if response is None or response.headers.get("Retry-After") is None:
+        return None
+    retry_after = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_n_days(from_date: str, to_date: str) -> int:
+    return (datetime.strptime(to_date, "%Y-%m-%d") - datetime.strptime(from_date, "%Y-%m-%d")).days
+
+
+def add_days(date: str, n_days: int) -> str:
+    return (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=n_days)).strftime("%Y-%m-%d")
 
 
 class DataIngestion:
@@ -39,15 +96,29 @@ class DataIngestion:
             logger.info(f"{'>>' * 20}Starting data ingestion.{'<<' * 20}")
             self.data_ingestion_config = data_ingestion_config
             self.failed_download_urls: List[DownloadUrl] = []
+            self.interval_stats: List[IntervalStat] = []
+            self.partition_watermarks: dict = {}
+            self.n_converted_record: int = 0
             self.n_retry = n_retry
+            self.schema = FinanceDataSchema()
+            self.http_client = HttpClient(pool_size=data_ingestion_config.max_workers,
+                                          connect_timeout=data_ingestion_config.connect_timeout,
+                                          read_timeout=data_ingestion_config.read_timeout)
+            self.http_cache = DataIngestionHttpCache(data_ingestion_config.http_cache_file_path)
+            self.manifest = DataIngestionManifest(data_ingestion_config.manifest_file_path)
+            self.dead_letter_queue = DataIngestionDeadLetterQueue(data_ingestion_config.dead_letter_file_path)
+            # shared by all download workers so a throttle response slows every worker down
+            self.rate_limiter = TokenBucketRateLimiter(rate=data_ingestion_config.requests_per_second,
+                                                       capacity=data_ingestion_config.rate_limit_burst)
 
         except Exception as e:
             raise FinanceException(e, sys)
 
-    def get_required_intervals(self):
-        from_date = datetime.strptime(self.data_ingestion_config.from_date, "%Y-%m-%d")
-        to_date = datetime.strptime(self.data_ingestion_config.to_date, "%Y-%m-%d")
-        n_diff_days = (to_date - from_date).days
+    def get_fixed_intervals(self, from_date: str, to_date: str) -> List[str]:
+        """
+        Interval boundaries based only on number of days between from_date and to_date
+        """
+        n_diff_days = get_n_days(from_date, to_date)
         freq = None
         if n_diff_days > 365:
             freq = "Y"
@@ -57,81 +128,286 @@ class DataIngestion:
             freq = "W"
         logger.info(f"{n_diff_days} hence freq : {freq}")
         if freq is None:
-            intervals = pd.date_range(start=self.data_ingestion_config.from_date,
-                                      end=self.data_ingestion_config.to_date,
+            intervals = pd.date_range(start=from_date,
+                                      end=to_date,
                                       periods=2).astype('str').tolist()
         else:
 
-            intervals = pd.date_range(start=self.data_ingestion_config.from_date,
-                                      end=self.data_ingestion_config.to_date,
+            intervals = pd.date_range(start=from_date,
+                                      end=to_date,
                                       freq=freq).astype('str').tolist()
-        logger.debug(f"Prepared Interval: {intervals}")
-        if self.data_ingestion_config.to_date not in intervals:
-            intervals.append(self.data_ingestion_config.to_date)
+        if from_date not in intervals:
+            intervals.insert(0, from_date)
+        if to_date not in intervals:
+            intervals.append(to_date)
+        return intervals
+
+    def split_interval_stat(self, interval_stat: IntervalStat) -> List[IntervalStat]:
+        """
+        Splits interval evenly so that each part is expected to be within target interval size
+        """
+        n_days = get_n_days(interval_stat.from_date, interval_stat.to_date)
+        n_part = min(n_days, math.ceil(interval_stat.n_byte / self.data_ingestion_config.target_interval_size))
+        if n_part <= 1:
+            return [interval_stat]
+        boundaries = [add_days(interval_stat.from_date, round(index * n_days / n_part)) for index in range(n_part)]
+        boundaries.append(interval_stat.to_date)
+        return [IntervalStat(from_date=boundaries[index - 1],
+                             to_date=boundaries[index],
+                             n_record=interval_stat.n_record // n_part,
+                             n_byte=interval_stat.n_byte // n_part)
+                for index in range(1, len(boundaries))]
+
+    def get_required_intervals(self, from_date: str = None, to_date: str = None):
+        """
+        Interval boundaries are planned from volume observed in previous runs.
+        Intervals larger than target interval size are split, sparse intervals are merged and
+        date ranges never downloaded before are sized from recent volume per day.
+        If no volume has been observed yet, fixed yearly/monthly/weekly intervals are used.
+        from_date, to_date: date range to plan, date range of this run if not given
+        """
+        from_date = from_date or self.data_ingestion_config.from_date
+        to_date = to_date or self.data_ingestion_config.to_date
+        interval_plan = DataIngestionIntervalPlan(self.data_ingestion_config.interval_plan_file_path)
+        observed_stats = interval_plan.get_interval_stats()
+        if len(observed_stats) == 0:
+            intervals = self.get_fixed_intervals(from_date=from_date, to_date=to_date)
+            logger.debug(f"Prepared {max(0, len(intervals) - 1)} fixed intervals between {from_date} and {to_date}")
+            return intervals
+
+        # recent intervals are the best estimate of volume for unseen date range
+        recent_stats = observed_stats[-DATA_INGESTION_DENSITY_WINDOW:]
+        n_observed_day = max(1, sum(get_n_days(stat.from_date, stat.to_date) for stat in recent_stats))
+        byte_per_day = sum(stat.n_byte for stat in recent_stats) / n_observed_day
+        record_per_day = sum(stat.n_record for stat in recent_stats) / n_observed_day
+
+        def estimate(start_date: str, end_date: str) -> IntervalStat:
+            n_days = get_n_days(start_date, end_date)
+            return IntervalStat(from_date=start_date, to_date=end_date,
+                                n_record=int(n_days * record_per_day), n_byte=int(n_days * byte_per_day))
+
+        planned_stats: List[IntervalStat] = []
+        cursor = from_date
+        for stat in observed_stats:
+            if stat.from_date < cursor or stat.to_date > to_date:
+                continue
+            if stat.from_date > cursor:
+                planned_stats.append(estimate(cursor, stat.from_date))
+            planned_stats.append(stat)
+            cursor = stat.to_date
+        if cursor < to_date:
+            planned_stats.append(estimate(cursor, to_date))
+
+        split_stats: List[IntervalStat] = []
+        for stat in planned_stats:
+            split_stats.extend(self.split_interval_stat(stat))
+
+        merged_stats: List[IntervalStat] = []
+        for stat in split_stats:
+            if len(merged_stats) > 0:
+                previous_stat = merged_stats[-1]
+                is_sparse = min(stat.n_record, previous_stat.n_record) < self.data_ingestion_config.min_interval_records
+                if is_sparse and previous_stat.n_byte + stat.n_byte <= self.data_ingestion_config.target_interval_size:
+                    merged_stats[-1] = IntervalStat(from_date=previous_stat.from_date,
+                                                    to_date=stat.to_date,
+                                                    n_record=previous_stat.n_record + stat.n_record,
+                                                    n_byte=previous_stat.n_byte + stat.n_byte)
+                    continue
+            merged_stats.append(stat)
+
+        intervals = [from_date] + [stat.to_date for stat in merged_stats]
+        logger.debug(f"Prepared {len(intervals) - 1} planned intervals between {from_date} and {to_date}")
         return intervals
 
-    def download_data(self, download_url: DownloadUrl):
-        logger.info(f"Starting download operation : {download_url}")
+    def get_download_url(self, from_date: str, to_date: str) -> DownloadUrl:
+        datasource_url: str = self.data_ingestion_config.data_source_url
+        url = datasource_url.replace("<todate>",
+                                     to_date).replace("<fromdate>", from_date)
+        logger.debug(f"Url: {url}")
+        file_name = f"{self.data_ingestion_config.file_name}_{from_date}_{to_date}"
+        file_path = get_landing_file_path(os.path.join(self.data_ingestion_config.download_dir, file_name),
+                                          self.data_ingestion_config.landing_format)
+        return DownloadUrl(url=url, file_path=file_path, n_retry=self.n_retry,
+                           from_date=from_date, to_date=to_date)
+
+    def bisect_download_url(self, download_url: DownloadUrl) -> List[DownloadUrl]:
+        """
+        Splits interval of download url into two halves
+        returns empty list if interval can not be split further
+        """
+        n_days = get_n_days(download_url.from_date, download_url.to_date)
+        if n_days < 2:
+            return []
+        mid_date = add_days(download_url.from_date, n_days // 2)
+        return [self.get_download_url(download_url.from_date, mid_date),
+                self.get_download_url(mid_date, download_url.to_date)]
+
+    def iter_response_chunks(self, response, response_head: ResponseHead):
+        """
+        Yields raw chunks of streamed response while keeping first few bytes of it
+        so that failed response can still be written into failed directory.
+        """
+        for chunk in response.iter_content(chunk_size=DATA_INGESTION_STREAM_CHUNK_SIZE):
+            response_head.n_byte += len(chunk)
+            if len(response_head) < DATA_INGESTION_FAILED_RESPONSE_MAX_BYTES:
+                response_head.extend(chunk[:DATA_INGESTION_FAILED_RESPONSE_MAX_BYTES - len(response_head)])
+            yield chunk
+
+    def get_landing_file_writer(self, file_path: str) -> LandingFileWriter:
+        config = self.data_ingestion_config
+        return LandingFileWriter(file_path=file_path,
+                                 landing_format=config.landing_format,
+                                 arrow_schema=self.schema.arrow_schema,
+                                 compression_level=config.landing_compression_level,
+                                 batch_records=config.landing_batch_records)
+
+    def download_data(self, download_url: DownloadUrl) -> List[DownloadUrl]:
+        """
+        Downloads data of single interval
+        returns list of smaller intervals to be downloaded instead if the request timed out
+        """
+        logger.debug(f"Starting download operation : {download_url}")
         download_dir = os.path.dirname(download_url.file_path)
 
         # Creating download directory
         os.makedirs(download_dir, exist_ok=True)
 
         # Download data
-        response = requests.get(download_url.url, params={'User-agent': f'your bot {uuid.uuid4()}'})
-
+        self.rate_limiter.acquire()
+        response = None
+        response_head = ResponseHead()
+        landing_file_writer = None
         try:
-            logger.info(f"Started writing downloaded data into json file: {download_url.file_path}")
-            # saving downloaded data into hard disk
-            with open(download_url.file_path, "w") as file_obj:
-                finance_complaint_data = list(map(lambda x: x["_source"],
-                                                  filter(lambda x: "_source" in x.keys(),
-                                                         response.json())))
-                json.dump(finance_complaint_data, file_obj)
-            logger.info(f"Downloaded data has been written into file: {download_url.file_path}")
+            validators = self.http_cache.get_validators(download_url.url)
+            response = self.http_client.get(download_url.url,
+                                            etag=validators.get("etag"),
+                                            last_modified=validators.get("last_modified"))
+            if response.status_code == 304:
+                # interval already present in feature store and unchanged since then
+                response.close()
+                self.rate_limiter.recover()
+                self.manifest.mark_not_modified(download_url.from_date, download_url.to_date)
+                DOWNLOAD_INTERVALS.labels(outcome="not_modified").inc()
+                logger.info(f"Interval {download_url.from_date} - {download_url.to_date} is not modified, skipped.")
+                return []
+            if not 200 <= response.status_code < 300:
+                # an error body can be a json array too, it must never mark interval as downloaded
+                # leading bytes of error body are kept for failed directory
+                next(self.iter_response_chunks(response, response_head), None)
+                raise requests.exceptions.HTTPError(f"{response.status_code} {response.reason} "
+                                                    f"for url: {download_url.url}", response=response)
+            logger.debug(f"Started writing downloaded data into landing file: {download_url.file_path}")
+            # response is parsed incrementally and each record is written as soon as it is parsed
+            # so memory stays flat irrespective of interval size.
+            # data is written into a hidden temporary file which is renamed only once it is complete
+            landing_file_writer = self.get_landing_file_writer(download_url.file_path)
+            for record in iter_json_array(self.iter_response_chunks(response, response_head),
+                                          encoding=response.encoding or "utf-8"):
+                if not isinstance(record, dict) or "_source" not in record:
+                    continue
+                landing_file_writer.write(record["_source"])
+            landing_file_writer.close()
+            n_record = landing_file_writer.n_record
+            # uncompressed response size plans intervals, landing file size verifies the file on resume
+            n_response_byte = response_head.n_byte
+            response.close()
+            self.rate_limiter.recover()
+            self.http_cache.set_validators(download_url.url,
+                                           etag=response.headers.get("ETag"),
+                                           last_modified=response.headers.get("Last-Modified"))
+            n_byte = os.path.getsize(download_url.file_path)
+            self.manifest.mark_downloaded(download_url.from_date, download_url.to_date,
+                                          file_path=download_url.file_path, n_byte=n_byte,
+                                          checksum=landing_file_writer.checksum)
+            self.interval_stats.append(IntervalStat(from_date=download_url.from_date,
+                                                    to_date=download_url.to_date,
+                                                    n_record=n_record,
+                                                    n_byte=n_response_byte))
+            DOWNLOAD_INTERVALS.labels(outcome="downloaded").inc()
+            DOWNLOAD_INTERVAL_BYTES.observe(n_response_byte)
+            DOWNLOAD_RECORDS.inc(n_record)
+            logger.info(f"Downloaded {n_record} records have been written into file: {download_url.file_path}",
+                        extra={"from_date": download_url.from_date, "to_date": download_url.to_date,
+                               "n_record": n_record, "n_byte": n_byte, "n_response_byte": n_response_byte})
+            return []
         except Exception as e:
-            logger.error("Failed to download data hence retry again.")
+            if response is not None:
+                response.close()
+            logger.error(f"Failed to download data: {e}")
             # removing failed file
-            if os.path.exists(download_url.file_path):
-                os.remove(download_url.file_path)
-            self.retry_download_data(response, download_url)
+            if landing_file_writer is not None:
+                landing_file_writer.abort()
+            if isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+                sub_download_urls = self.bisect_download_url(download_url)
+                if len(sub_download_urls) > 0:
+                    self.manifest.mark_split(download_url.from_date, download_url.to_date,
+                                             [(url.from_date, url.to_date) for url in sub_download_urls])
+                    DOWNLOAD_INTERVALS.labels(outcome="split").inc()
+                    logger.info(f"Interval {download_url.from_date} - {download_url.to_date} "
+                                f"timed out hence it is split into two halves")
+                    return sub_download_urls
+            return self.retry_download_data(response, download_url, content=bytes(response_head), error=e)
 
-    def retry_download_data(self, data, download_url: DownloadUrl):
+    def get_retry_delay(self, data, download_url: DownloadUrl) -> float:
         """
-        This function help to avoid failure as it help to download failed file again
+        Exponential backoff with jitter, Retry-After header of failed response is honored
+        """
+        n_attempt = self.n_retry - download_url.n_retry
+        delay = min(self.data_ingestion_config.retry_max_delay,
+                    self.data_ingestion_config.retry_base_delay * (2 ** n_attempt))
+        # jitter so that intervals failed together are not retried together
+        delay = random.uniform(delay / 2, delay)
+        retry_after = get_retry_after(data)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def retry_download_data(self, data, download_url: DownloadUrl, content: bytes, error: Exception = None):
+        """
+        This function help to avoid failure as it schedules failed file to be downloaded again.
+        Failed interval is not downloaded here, it is returned with time after which
+        it should be retried so other intervals keep downloading meanwhile.
 
         data:failed response
         download_url: DownloadUrl
+        content: leading bytes of failed response body
+        error: exception raised while downloading
+        =======================================================================
+        returns list of download url to be retried, empty if no retry is left
         """
         try:
-            # if retry still possible try else return response
-            if download_url.n_retry == 0:
-                self.failed_download_urls.append(download_url)
-                logger.info(f"Unable to download file {download_url.url}")
-                return
-
-            # to handle throatling requestion can be solve if we wait for some seconds
-            content = data.content.decode("utf-8")
-            wait_second = re.findall(r'\d+', content)
-
-            if len(wait_second) > 0:
-                time.sleep(int(wait_second[0]) + 2)
             logger.info("Writing response to understand why request was failed")
-            logger.info(self.data_ingestion_config.failed_dir)
-            logger.info(os.path.basename(download_url.file_path))
             # Writing response to understand why request was failed
             failed_file_path = os.path.join(self.data_ingestion_config.failed_dir,
                                             os.path.basename(download_url.file_path))
 
             os.makedirs(self.data_ingestion_config.failed_dir, exist_ok=True)
             with open(failed_file_path, "wb") as file_obj:
-                file_obj.write(data.content)
+                file_obj.write(content)
 
-            # calling download function again to retry
-            download_url = DownloadUrl(download_url.url, download_url.file_path,
-                                       download_url.n_retry - 1)
+            # if retry still possible schedule it else move it into dead letter queue
+            if download_url.n_retry == 0:
+                self.failed_download_urls.append(download_url)
+                status_code = data.status_code if data is not None else None
+                self.dead_letter_queue.add_dead_letter(DeadLetter(url=download_url.url,
+                                                                  from_date=download_url.from_date,
+                                                                  to_date=download_url.to_date,
+                                                                  error=f"status: {status_code}, error: {error}",
+                                                                  failed_at=datetime.now().isoformat()))
+                self.manifest.mark_failed(download_url.from_date, download_url.to_date)
+                DOWNLOAD_INTERVALS.labels(outcome="dead_letter").inc()
+                logger.info(f"Unable to download file {download_url.url}, moved into dead letter queue")
+                return []
 
-            self.download_data(download_url=download_url)
+            delay = self.get_retry_delay(data, download_url)
+            DOWNLOAD_RETRIES.labels(reason=str(data.status_code) if data is not None else type(error).__name__).inc()
+            # throttle response slows down every worker through shared limiter
+            if data is not None and data.status_code in (429, 503):
+                self.rate_limiter.throttle(get_retry_after(data) or 0)
+            logger.info(f"Retrying {download_url.url} after {delay:.1f} seconds, "
+                        f"{download_url.n_retry - 1} retries left")
+            return [replace(download_url, n_retry=download_url.n_retry - 1,
+                            not_before=time.monotonic() + delay)]
 
         except Exception as e:
             raise FinanceException(e, sys)
@@ -141,29 +417,117 @@ class DataIngestion:
         downloads data for given set of intervals
         """
         try:
-            required_interval = self.get_required_intervals()
-            logger.info("Started downloading files.")
-            for index in range(1, len(required_interval)):
-                from_date, to_date = required_interval[index - 1], required_interval[index]
-                logger.debug(f"Generating data download url between {from_date} and {to_date}")
-                datasource_url: str = self.data_ingestion_config.data_source_url
-                url = datasource_url.replace("<todate>",
-                                             to_date).replace("<fromdate>", from_date)
-                logger.debug(f"Url: {url}")
-                file_name = f"{self.data_ingestion_config.file_name}_{from_date}_{to_date}"
-                file_path = os.path.join(self.data_ingestion_config.download_dir, file_name)
-                download_url = DownloadUrl(url=url, file_path=file_path, n_retry=self.n_retry)
-                self.download_data(download_url)
+            from_date = self.data_ingestion_config.from_date
+            to_date = self.data_ingestion_config.to_date
+            intervals = []
+            if self.manifest.is_manifest_file_present:
+                # resumed run, intervals planned by the crashed run are reused
+                # and intervals whose downloaded file is intact are skipped
+                intervals = [(interval.from_date, interval.to_date)
+                             for interval in self.manifest.get_intervals(INTERVAL_STATE_PENDING)]
+                for interval in self.manifest.get_intervals(INTERVAL_STATE_DOWNLOADED):
+                    if not self.manifest.is_interval_downloaded(interval):
+                        self.manifest.mark_pending(interval.from_date, interval.to_date)
+                        intervals.append((interval.from_date, interval.to_date))
+                logger.info(f"Resuming download, {len(intervals)} intervals of "
+                            f"{self.manifest.from_date} - {self.manifest.to_date} are left.")
+                # dates after crashed run are still part of this run
+                from_date = max(from_date, self.manifest.to_date)
+                to_date = max(to_date, self.manifest.to_date)
+            if from_date < to_date:
+                required_interval = self.get_required_intervals(from_date=from_date, to_date=to_date)
+                intervals.extend((required_interval[index - 1], required_interval[index])
+                                 for index in range(1, len(required_interval)))
+            self.manifest.start(from_date=min(filter(None, [self.manifest.from_date,
+                                                            self.data_ingestion_config.from_date])),
+                                to_date=to_date,
+                                intervals=intervals)
+            n_record_before = sum(stat.n_record for stat in self.interval_stats)
+            start_time = time.perf_counter()
+            with span("data_ingestion.download_intervals", n_interval=len(intervals)):
+                self.download_intervals(intervals)
+            observe_records_per_second("download", sum(stat.n_record for stat in self.interval_stats) - n_record_before,
+                                       time.perf_counter() - start_time)
+            self.write_interval_plan()
             logger.info(f"File download completed")
         except Exception as e:
             raise FinanceException(e, sys)
 
+    def download_intervals(self, intervals: List[Tuple[str, str]]):
+        """
+        Downloads intervals with a bounded pool of workers.
+        Intervals scheduled for retry wait in a queue ordered by their retry time
+        while workers keep downloading other intervals.
+        """
+        logger.info("Started downloading files.")
+        download_urls: List[DownloadUrl] = []
+        for from_date, to_date in intervals:
+            logger.debug(f"Generating data download url between {from_date} and {to_date}")
+            download_urls.append(self.get_download_url(from_date=from_date, to_date=to_date))
+
+        max_workers = self.data_ingestion_config.max_workers
+        logger.info(f"Downloading {len(download_urls)} intervals with {max_workers} workers")
+        delayed_download_urls = []
+        sequence = itertools.count()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(self.download_data, download_url) for download_url in download_urls}
+            while len(pending) > 0 or len(delayed_download_urls) > 0:
+                now = time.monotonic()
+                while len(delayed_download_urls) > 0 and delayed_download_urls[0][0] <= now:
+                    _, _, download_url = heapq.heappop(delayed_download_urls)
+                    pending.add(executor.submit(self.download_data, download_url))
+                timeout = None
+                if len(delayed_download_urls) > 0:
+                    timeout = max(0.0, delayed_download_urls[0][0] - now)
+                if len(pending) == 0:
+                    time.sleep(timeout)
+                    continue
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # intervals split after a timeout and intervals to be retried are queued again
+                    for download_url in future.result():
+                        heapq.heappush(delayed_download_urls,
+                                       (download_url.not_before, next(sequence), download_url))
+
+    def write_interval_plan(self) -> None:
+        try:
+            logger.info(f"Writing {len(self.interval_stats)} observed interval stats into interval plan file.")
+            interval_plan = DataIngestionIntervalPlan(self.data_ingestion_config.interval_plan_file_path)
+            interval_plan.write_interval_stats(interval_stats=self.interval_stats)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_downloaded_file_paths(self, json_data_dir: str) -> List[str]:
+        return [os.path.join(json_data_dir, file_name) for file_name in sorted(os.listdir(json_data_dir))
+                if not file_name.startswith((".", "_"))]
+
+    def get_conversion_engine(self, engine_type: str) -> ConversionEngine:
+        config = self.data_ingestion_config
+        return get_conversion_engine(engine_type=engine_type,
+                                     schema=self.schema,
+                                     max_workers=config.max_workers,
+                                     landing_staging_dir=config.landing_staging_dir,
+                                     feature_store_staging_dir=config.feature_store_staging_dir)
+
+    def read_downloaded_files(self, json_data_dir: str) -> DataFrame:
+        """
+        All downloaded files read by spark with fixed schema along with partition columns
+        """
+        engine: SparkConversionEngine = self.get_conversion_engine(CONVERSION_ENGINE_SPARK)
+        return engine.read_files(self.get_downloaded_file_paths(json_data_dir))
+
     def convert_files_to_parquet(self) -> str:
         """
         downloaded files will be converted and merged into single parquet file
         json_data_dir: downloaded json file directory
         data_dir: converted and combined file will be generated in data_dir
         output_file_name: output file name
+
+        feature store is partitioned by year and month of date_received.
+        In upsert mode records are merged on complaint_id so re-running an interval is idempotent,
+        in append mode records are written as they are.
+        Conversion engine is picked from size of downloaded files: a daily increment is converted
+        in process by arrow engine without starting spark, a backfill is converted by spark.
         =======================================================================================
         returns output_file_path
         """
@@ -174,14 +538,31 @@ class DataIngestion:
             os.makedirs(data_dir, exist_ok=True)
             file_path = os.path.join(data_dir, f"{output_file_name}")
             logger.info(f"Parquet file will be created at: {file_path}")
-            if not os.path.exists(json_data_dir):
+            if not os.path.exists(json_data_dir) or len(os.listdir(json_data_dir)) == 0:
                 return file_path
-            for file_name in os.listdir(json_data_dir):
-                json_file_path = os.path.join(json_data_dir, file_name)
-                logger.debug(f"Converting {json_file_path} into parquet format at {file_path}")
-                df = spark_session.read.json(json_file_path)
-                if df.count() > 0:
-                    df.write.mode('append').parquet(file_path)
+            file_paths = self.get_downloaded_file_paths(json_data_dir)
+            input_size = sum(os.path.getsize(downloaded_file_path) for downloaded_file_path in file_paths)
+            engine_type = select_conversion_engine(
+                engine_type=self.data_ingestion_config.conversion_engine,
+                input_size=input_size,
+                arrow_engine_max_input_size=self.data_ingestion_config.arrow_engine_max_input_size)
+            logger.debug(f"Converting {json_data_dir} into parquet format at {file_path} with {engine_type} engine")
+            engine = self.get_conversion_engine(engine_type)
+            start_time = time.perf_counter()
+            with span("data_ingestion.convert_files_to_parquet", n_byte=input_size, engine=engine_type):
+                partition_watermarks = engine.convert(file_paths=file_paths,
+                                                      file_path=file_path,
+                                                      write_mode=self.data_ingestion_config.feature_store_write_mode)
+                # statistics of new files are indexed while they are still in page cache
+                FeatureStoreIndex(file_path=file_path, schema=self.schema,
+                                  max_workers=self.data_ingestion_config.max_workers).refresh()
+            if self.data_ingestion_config.feature_store_write_mode == FEATURE_STORE_WRITE_MODE_UPSERT:
+                self.partition_watermarks = partition_watermarks
+            # records downloaded in this run if engine did not count converted records
+            self.n_converted_record = engine.n_converted_record
+            if self.n_converted_record is None:
+                self.n_converted_record = sum(stat.n_record for stat in self.interval_stats)
+            observe_records_per_second("parquet_conversion", self.n_converted_record, time.perf_counter() - start_time)
             return file_path
         except Exception as e:
             raise FinanceException(e, sys)
@@ -192,21 +573,192 @@ class DataIngestion:
             meta_data = DataIngestionMetadata(metadata_file_path=self.data_ingestion_config.metadata_file_path)
             meta_data.write_metadata_info(from_date=self.data_ingestion_config.from_date,
                                           to_date=self.data_ingestion_config.to_date,
-                                          data_file_path=file_path)
+                                          data_file_path=file_path,
+                                          partition_watermarks=self.partition_watermarks)
             logger.info(f"Metadata has been written.")
         except Exception as e:
             raise FinanceException(e, sys)
 
-    def initiate_data_ingestion(self) -> DataIngestionArtifact:
+    def write_partition_watermarks(self, file_path: str) -> None:
+        """
+        Merges partition watermarks of this run into metadata without moving ingested date range,
+        used when records outside of regular date range reach feature store
+        """
+        try:
+            meta_data = DataIngestionMetadata(metadata_file_path=self.data_ingestion_config.metadata_file_path)
+            if meta_data.is_metadata_file_present:
+                metadata_info = meta_data.get_metadata_info()
+                meta_data.write_metadata_info(from_date=metadata_info.from_date,
+                                              to_date=metadata_info.to_date,
+                                              data_file_path=file_path,
+                                              partition_watermarks=self.partition_watermarks)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_complaint_store(self) -> ComplaintStore:
+        config = self.data_ingestion_config
+        return get_complaint_store(store_type=config.complaint_store,
+                                   collection_name=config.complaint_collection_name,
+                                   batch_size=config.complaint_store_batch_size,
+                                   local_store_dir=config.local_complaint_store_dir)
+
+    def mirror_to_complaint_store(self) -> None:
+        """
+        Upserts complaints downloaded in this run into complaint store.
+        Every spark partition is written by its own worker in unordered bulk batches.
+        """
+        try:
+            config = self.data_ingestion_config
+            df = self.read_downloaded_files(config.download_dir) \
+                .drop(*self.schema.partition_columns) \
+                .dropDuplicates([self.schema.col_complaint_id])
+            # plain values are shipped to workers, each worker builds its own store
+            store_args = (config.complaint_store, config.complaint_collection_name,
+                          config.complaint_store_batch_size, config.local_complaint_store_dir)
+
+            def write_partition(rows):
+                get_complaint_store(*store_args).save_documents(row.asDict() for row in rows)
+
+            logger.info(f"Mirroring downloaded complaints into {config.complaint_store} complaint store")
+            df.foreachPartition(write_partition)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_export_files(self, documents: Iterable[dict]) -> Tuple[int, str, set]:
+        """
+        Writes documents into download directory in landing format, same as downloaded files
+        returns number of records, max date_received and complaint_ids of documents at max date_received
+        """
+        config = self.data_ingestion_config
+        os.makedirs(config.download_dir, exist_ok=True)
+        documents = iter(documents)
+        n_record, max_date_received, max_date_ids = 0, None, set()
+        for file_index in itertools.count():
+            chunk = list(itertools.islice(documents, config.complaint_store_export_file_records))
+            if len(chunk) == 0:
+                break
+            file_path = get_landing_file_path(os.path.join(config.download_dir,
+                                                           f"complaint_store_export_{file_index}"),
+                                              config.landing_format)
+            with self.get_landing_file_writer(file_path) as landing_file_writer:
+                for document in chunk:
+                    document.pop("_id", None)
+                    landing_file_writer.write(document)
+                    date_received = document.get(self.schema.col_date_received)
+                    if date_received is None:
+                        continue
+                    if max_date_received is None or date_received > max_date_received:
+                        max_date_received, max_date_ids = date_received, set()
+                    if date_received == max_date_received:
+                        max_date_ids.add(document[self.schema.col_complaint_id])
+            n_record += len(chunk)
+        return n_record, max_date_received, max_date_ids
+
+    def initiate_complaint_store_export(self) -> DataIngestionArtifact:
+        """
+        Exports complaints added to complaint store since previous export into feature store.
+        Only complaints on or after date_received watermark are read through its index, those already
+        exported at watermark are skipped by complaint_id. In change_stream mode only changes after
+        last resume token are read, so collection is never scanned fully again.
+        """
+        try:
+            config = self.data_ingestion_config
+            complaint_store = self.get_complaint_store()
+            sync_metadata = ComplaintStoreSyncMetadata(config.complaint_store_sync_file_path)
+            sync_state = sync_metadata.get_sync_state()
+            watermark, watermark_ids = sync_state["watermark"], set(sync_state["watermark_ids"] or [])
+            resume_token = sync_state["resume_token"]
+
+            documents = None
+            if config.complaint_store_sync_mode == "change_stream":
+                try:
+                    if resume_token is not None:
+                        documents, resume_token = complaint_store.watch_changes(resume_token)
+                    else:
+                        # stream position is taken before first export so changes made meanwhile are not missed
+                        resume_token = complaint_store.get_resume_token()
+                except ChangeStreamNotSupported as e:
+                    logger.warning(f"Change stream is not available, using date_received watermark: {e}")
+                    resume_token = None
+            if documents is None:
+                documents = complaint_store.find_new(watermark, watermark_ids)
+
+            n_record, max_date_received, max_date_ids = self.write_export_files(documents)
+            logger.info(f"Exported {n_record} complaints from complaint store after watermark: {watermark}")
+            if n_record > 0:
+                file_path = self.convert_files_to_parquet()
+                self.write_partition_watermarks(file_path=file_path)
+            if max_date_received is not None and (watermark is None or max_date_received > watermark):
+                watermark, watermark_ids = max_date_received, max_date_ids
+            elif max_date_received == watermark:
+                watermark_ids.update(max_date_ids)
+            # position moves only after exported complaints reached feature store
+            sync_metadata.write_sync_state(watermark=watermark, watermark_ids=watermark_ids,
+                                           resume_token=resume_token)
+
+            artifact = DataIngestionArtifact(
+                feature_store_file_path=os.path.join(config.feature_store_dir, config.file_name),
+                download_dir=config.download_dir,
+                metadata_file_path=config.metadata_file_path,
+            )
+            logger.info(f"Complaint store export artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def resume_previous_run(self) -> bool:
+        """
+        Switches this run to directories of latest run that did not complete.
+        returns True if a previous run is resumed
+        """
+        try:
+            data_ingestion_master_dir = os.path.dirname(self.data_ingestion_config.data_ingestion_dir)
+            manifest_file_path = DataIngestionManifest.find_resumable_manifest(
+                data_ingestion_master_dir=data_ingestion_master_dir,
+                manifest_file_name=os.path.basename(self.data_ingestion_config.manifest_file_path),
+                exclude_dir=self.data_ingestion_config.data_ingestion_dir)
+            if manifest_file_path is None:
+                return False
+            manifest = DataIngestionManifest(manifest_file_path)
+            run_dir = os.path.dirname(manifest_file_path)
+
+            def relocate(path: str) -> str:
+                return os.path.join(run_dir, os.path.relpath(path, self.data_ingestion_config.data_ingestion_dir))
+
+            # date range of this run is kept, crashed run only lends its directories and pending intervals
+            config = self.data_ingestion_config
+            self.data_ingestion_config = replace(config,
+                                                 data_ingestion_dir=run_dir,
+                                                 download_dir=relocate(config.download_dir),
+                                                 failed_dir=relocate(config.failed_dir),
+                                                 feature_store_staging_dir=relocate(config.feature_store_staging_dir),
+                                                 landing_staging_dir=relocate(config.landing_staging_dir),
+                                                 manifest_file_path=manifest_file_path)
+            self.manifest = manifest
+            logger.info(f"Resuming crashed data ingestion of {manifest.from_date} - {manifest.to_date} "
+                        f"from {run_dir}")
+            return True
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def initiate_data_ingestion(self, resume: bool = True) -> DataIngestionArtifact:
+        """
+        resume: if True latest run that crashed or was interrupted is resumed,
+        its remaining intervals are downloaded along with date range of this run
+        """
         try:
+            is_resumed = resume and self.resume_previous_run()
             logger.info(f"Started downloading json file")
-            if self.data_ingestion_config.from_date != self.data_ingestion_config.to_date:
+            if self.data_ingestion_config.from_date != self.data_ingestion_config.to_date or is_resumed:
                 self.download_files()
 
             if os.path.exists(self.data_ingestion_config.download_dir):
                 logger.info(f"Converting and combining downloaded json into parquet file")
                 file_path = self.convert_files_to_parquet()
                 self.write_metadata(file_path=file_path)
+                # validators are persisted only after data has reached feature store
+                self.http_cache.write_http_cache()
+                self.manifest.mark_converted()
 
             feature_store_file_path = os.path.join(self.data_ingestion_config.feature_store_dir,
                                                    self.data_ingestion_config.file_name)
@@ -219,3 +771,62 @@ class DataIngestion:
             return artifact
         except Exception as e:
             raise FinanceException(e, sys)
+
+    def initiate_complaint_store_mirror(self) -> DataIngestionArtifact:
+        """
+        Upserts complaints downloaded by ingestion run into complaint store if mirroring is enabled.
+        It is a stage of its own so that it runs alongside data validation.
+        """
+        try:
+            config = self.data_ingestion_config
+            if config.mirror_to_complaint_store and os.path.exists(config.download_dir):
+                self.mirror_to_complaint_store()
+            artifact = DataIngestionArtifact(
+                feature_store_file_path=os.path.join(config.feature_store_dir, config.file_name),
+                download_dir=config.download_dir,
+                metadata_file_path=config.metadata_file_path,
+            )
+            logger.info(f"Complaint store mirror artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def initiate_dead_letter_replay(self) -> DataIngestionArtifact:
+        """
+        Downloads only intervals present in dead letter queue and upserts them into feature store.
+        Ingested date range in metadata is not moved as replayed intervals were part of earlier runs.
+        Intervals failing again stay in dead letter queue.
+        Replay is tracked in a manifest of its own, regular ingestion never resumes it
+        and so never takes date range of replayed intervals as its own.
+        """
+        try:
+            dead_letters = self.dead_letter_queue.get_dead_letters()
+            logger.info(f"Replaying {len(dead_letters)} intervals from dead letter queue")
+            self.manifest = DataIngestionManifest(os.path.join(self.data_ingestion_config.data_ingestion_dir,
+                                                               DATA_INGESTION_REPLAY_MANIFEST_FILE_NAME))
+            if len(dead_letters) > 0:
+                intervals = [(dead_letter.from_date, dead_letter.to_date) for dead_letter in dead_letters]
+                self.manifest.start(from_date=min(interval[0] for interval in intervals),
+                                    to_date=max(interval[1] for interval in intervals),
+                                    intervals=intervals)
+                self.download_intervals(intervals)
+                self.write_interval_plan()
+                if os.path.exists(self.data_ingestion_config.download_dir):
+                    file_path = self.convert_files_to_parquet()
+                    self.write_partition_watermarks(file_path=file_path)
+                    self.http_cache.write_http_cache()
+                    self.manifest.mark_converted()
+                failed_urls = {download_url.url for download_url in self.failed_download_urls}
+                self.dead_letter_queue.remove_dead_letters([dead_letter.url for dead_letter in dead_letters
+                                                            if dead_letter.url not in failed_urls])
+
+            artifact = DataIngestionArtifact(
+                feature_store_file_path=os.path.join(self.data_ingestion_config.feature_store_dir,
+                                                     self.data_ingestion_config.file_name),
+                download_dir=self.data_ingestion_config.download_dir,
+                metadata_file_path=self.data_ingestion_config.metadata_file_path,
+            )
+            logger.info(f"Dead letter replay artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
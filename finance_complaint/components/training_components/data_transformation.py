@@ -0,0 +1,141 @@
+import os
+import shutil
+import sys
+from typing import Dict, List
+
+from pyspark.ml import Pipeline, PipelineModel
+from pyspark.ml.feature import HashingTF, IDF, OneHotEncoder, RegexTokenizer, SQLTransformer, StopWordsRemover, \
+    StringIndexer, VectorAssembler
+from pyspark.sql import DataFrame
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.constants.training_pipeline_constants import DATA_TRANSFORMATION_CACHE_INDEX_FILE_NAME, \
+    DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX, DATA_TRANSFORMATION_PIPELINE_DIR, \
+    DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR
+from finance_complaint.entities.artifact_entities import DataValidationArtifact, DataTransformationArtifact
+from finance_complaint.entities.config_entities import DataTransformationConfig
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import get_config_fingerprint, get_partition_fingerprints, get_path_size, \
+    read_yaml_file, write_yaml_file
+
+
+class DataTransformation:
+    """
+    Turns narrative and categorical columns into a feature vector.
+    Fitted pipeline and transformed data are cached per transformation config and
+    every input partition is fingerprinted, so a rerun only transforms new or changed
+    partitions and reuses everything else.
+    """
+
+    def __init__(self, data_transformation_config: DataTransformationConfig,
+                 data_validation_artifact: DataValidationArtifact):
+        try:
+            logger.info(f"{'>>' * 20}Starting data transformation.{'<<' * 20}")
+            self.data_transformation_config = data_transformation_config
+            self.data_validation_artifact = data_validation_artifact
+            self.schema = FinanceDataSchema()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @property
+    def config_fingerprint(self) -> str:
+        config = self.data_transformation_config
+        return get_config_fingerprint({
+            "num_features": config.num_features,
+            "min_doc_freq": config.min_doc_freq,
+            "text_column": config.text_column,
+            "categorical_columns": config.categorical_columns,
+            "passthrough_columns": config.passthrough_columns,
+            "features_column": config.features_column,
+            # pipelines cached before narratives were filled by pipeline itself are fitted again
+            "filled_text_column_suffix": DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX,
+        })
+
+    def get_pipeline(self) -> Pipeline:
+        config = self.data_transformation_config
+        indexed_columns = [f"{column}_index" for column in config.categorical_columns]
+        encoded_columns = [f"{column}_encoded" for column in config.categorical_columns]
+        filled_text_column = f"{config.text_column}{DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX}"
+        stages = [
+            # missing narratives are filled inside pipeline so saved model scores raw complaints as they are
+            SQLTransformer(statement=f"SELECT *, COALESCE({config.text_column}, '') AS {filled_text_column} "
+                                     f"FROM __THIS__"),
+            # null and unseen categories are kept in an extra index instead of failing
+            StringIndexer(inputCols=config.categorical_columns, outputCols=indexed_columns,
+                          handleInvalid="keep"),
+            OneHotEncoder(inputCols=indexed_columns, outputCols=encoded_columns, handleInvalid="keep"),
+            RegexTokenizer(inputCol=filled_text_column, outputCol="tokens", pattern="\\W+", minTokenLength=2),
+            StopWordsRemover(inputCol="tokens", outputCol="filtered_tokens"),
+            HashingTF(inputCol="filtered_tokens", outputCol="term_frequency", numFeatures=config.num_features),
+            IDF(inputCol="term_frequency", outputCol="tf_idf", minDocFreq=config.min_doc_freq),
+            VectorAssembler(inputCols=encoded_columns + ["tf_idf"], outputCol=config.features_column),
+        ]
+        return Pipeline(stages=stages)
+
+    def transform(self, model: PipelineModel, dataframe: DataFrame) -> DataFrame:
+        config = self.data_transformation_config
+        output_columns = config.passthrough_columns + self.schema.partition_columns + [config.features_column]
+        return model.transform(dataframe).select(*output_columns)
+
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        try:
+            config = self.data_transformation_config
+            input_file_path = self.data_validation_artifact.accepted_file_path
+            cache_dir = os.path.join(config.cache_dir, self.config_fingerprint)
+            cache_index_file_path = os.path.join(cache_dir, DATA_TRANSFORMATION_CACHE_INDEX_FILE_NAME)
+            pipeline_file_path = os.path.join(cache_dir, DATA_TRANSFORMATION_PIPELINE_DIR)
+            transformed_file_path = os.path.join(cache_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR)
+
+            partition_fingerprints: Dict[str, str] = get_partition_fingerprints(input_file_path)
+            cached_fingerprints: Dict[str, str] = {}
+            if os.path.exists(cache_index_file_path) and os.path.exists(pipeline_file_path):
+                cached_fingerprints = read_yaml_file(cache_index_file_path) or {}
+            changed_partitions: List[str] = [partition for partition, fingerprint in partition_fingerprints.items()
+                                             if cached_fingerprints.get(partition) != fingerprint]
+            removed_partitions: List[str] = [partition for partition in cached_fingerprints
+                                             if partition not in partition_fingerprints]
+            is_refit = len(cached_fingerprints) == 0 or \
+                len(changed_partitions) > config.refit_ratio * len(partition_fingerprints)
+            logger.info(f"{len(changed_partitions)} changed and {len(removed_partitions)} removed partitions "
+                        f"out of {len(partition_fingerprints)}, refit: {is_refit}")
+
+            is_cache_hit = len(changed_partitions) == 0 and len(removed_partitions) == 0
+            if not is_cache_hit:
+                # cache index is removed while cache is rewritten so an interrupted run is never trusted
+                if os.path.exists(cache_index_file_path):
+                    os.remove(cache_index_file_path)
+                spark_session = get_spark_session(input_size=get_path_size(input_file_path))
+                dataframe = spark_session.read.parquet(input_file_path)
+                if is_refit:
+                    # pipeline is fitted on full history and every partition is transformed again
+                    dataframe = dataframe.persist()
+                    model = self.get_pipeline().fit(dataframe)
+                    model.write().overwrite().save(pipeline_file_path)
+                    self.transform(model, dataframe) \
+                        .write.mode("overwrite") \
+                        .partitionBy(*self.schema.partition_columns) \
+                        .parquet(transformed_file_path)
+                    dataframe.unpersist()
+                else:
+                    # only changed partitions are read and transformed with already fitted pipeline
+                    model = PipelineModel.load(pipeline_file_path)
+                    partition_filter = self.schema.get_partition_filter(
+                        [self.schema.parse_partition_path(partition) for partition in changed_partitions])
+                    self.transform(model, dataframe.filter(partition_filter)) \
+                        .write.mode("overwrite") \
+                        .option("partitionOverwriteMode", "dynamic") \
+                        .partitionBy(*self.schema.partition_columns) \
+                        .parquet(transformed_file_path)
+                    for partition in removed_partitions:
+                        shutil.rmtree(os.path.join(transformed_file_path, partition), ignore_errors=True)
+                write_yaml_file(file_path=cache_index_file_path, data=partition_fingerprints)
+
+            artifact = DataTransformationArtifact(transformed_file_path=transformed_file_path,
+                                                  transformation_pipeline_file_path=pipeline_file_path,
+                                                  is_cache_hit=is_cache_hit)
+            logger.info(f"Data transformation artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
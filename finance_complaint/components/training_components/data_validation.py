@@ -0,0 +1,159 @@
+import os
+import sys
+from typing import Dict, List
+
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.constants.training_pipeline_constants import DATA_VALIDATION_PRODUCT_DOMAIN, \
+    DATA_VALIDATION_STATE_DOMAIN, DATA_VALIDATION_COMPANY_RESPONSE_DOMAIN
+from finance_complaint.entities.artifact_entities import DataIngestionArtifact, DataValidationArtifact
+from finance_complaint.entities.config_entities import DataValidationConfig
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import get_partition_fingerprints, get_path_size, read_yaml_file, write_yaml_file
+
+
+class DataValidation:
+
+    def __init__(self, data_validation_config: DataValidationConfig,
+                 data_ingestion_artifact: DataIngestionArtifact):
+        try:
+            logger.info(f"{'>>' * 20}Starting data validation.{'<<' * 20}")
+            self.data_validation_config = data_validation_config
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.schema = FinanceDataSchema()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @property
+    def domains(self) -> Dict[str, List[str]]:
+        return {
+            self.schema.col_product: DATA_VALIDATION_PRODUCT_DOMAIN,
+            self.schema.col_state: DATA_VALIDATION_STATE_DOMAIN,
+            self.schema.col_company_response: DATA_VALIDATION_COMPANY_RESPONSE_DOMAIN,
+        }
+
+    def validate_schema(self, dataframe: DataFrame) -> List[str]:
+        """
+        Compares columns and types with expected schema, it only needs dataframe metadata
+        returns list of schema errors
+        """
+        errors = []
+        actual_fields = {field.name: field.dataType for field in dataframe.schema.fields}
+        for field in self.schema.dataframe_schema.fields:
+            if field.name not in actual_fields:
+                errors.append(f"Missing column: {field.name}")
+            elif actual_fields[field.name] != field.dataType:
+                errors.append(f"Column {field.name} has type {actual_fields[field.name].simpleString()} "
+                              f"expected {field.dataType.simpleString()}")
+        return errors
+
+    def get_aggregations(self, columns: List[str]) -> list:
+        """
+        Every check is expressed as an aggregate so that all of them are computed in a single pass
+        """
+        aggregations = [F.count(F.lit(1)).alias("n_record")]
+        for column in columns:
+            aggregations.append(F.sum(F.when(F.col(column).isNull(), 1).otherwise(0)).alias(f"null__{column}"))
+        for column, domain in self.domains.items():
+            if column not in columns:
+                continue
+            is_violation = F.col(column).isNotNull() & ~F.col(column).isin(domain)
+            aggregations.append(F.sum(F.when(is_violation, 1).otherwise(0)).alias(f"domain__{column}"))
+        if self.schema.col_date_received in columns:
+            date_received = F.to_date(F.substring(self.schema.col_date_received, 1, 10))
+            is_out_of_range = (date_received < F.lit(self.data_validation_config.min_date).cast("date")) | \
+                              (date_received > F.lit(self.data_validation_config.max_date).cast("date"))
+            aggregations.extend([
+                F.min(date_received).cast("string").alias("min_date_received"),
+                F.max(date_received).cast("string").alias("max_date_received"),
+                F.sum(F.when(is_out_of_range, 1).otherwise(0)).alias("date__out_of_range"),
+            ])
+        return aggregations
+
+    def get_partitions_to_validate(self, partition_fingerprints: Dict[str, str]) -> List[str]:
+        """
+        returns every partition, or in fast mode only partitions new or changed since last valid validation
+        """
+        config = self.data_validation_config
+        if not config.fast_mode or not os.path.exists(config.validated_partitions_file_path):
+            return sorted(partition_fingerprints)
+        validated_fingerprints = read_yaml_file(config.validated_partitions_file_path) or {}
+        return sorted(partition for partition, fingerprint in partition_fingerprints.items()
+                      if validated_fingerprints.get(partition) != fingerprint)
+
+    def initiate_data_validation(self) -> DataValidationArtifact:
+        try:
+            config = self.data_validation_config
+            file_path = self.data_ingestion_artifact.feature_store_file_path
+            partition_fingerprints = get_partition_fingerprints(file_path)
+            partitions = self.get_partitions_to_validate(partition_fingerprints)
+            logger.info(f"Validating {len(partitions)} of {len(partition_fingerprints)} partitions "
+                        f"of feature store: {file_path}, fast mode: {config.fast_mode}")
+            partition_paths = [os.path.join(file_path, partition) for partition in partitions]
+            spark_session = get_spark_session(input_size=sum(get_path_size(path) for path in partition_paths))
+            if len(partitions) == len(partition_fingerprints):
+                dataframe = spark_session.read.parquet(file_path)
+            elif len(partitions) > 0:
+                # base path keeps year and month partition columns of partitions read one by one
+                dataframe = spark_session.read.option("basePath", file_path).parquet(*partition_paths)
+            else:
+                dataframe = spark_session.read.parquet(file_path).limit(0)
+
+            schema_errors = self.validate_schema(dataframe)
+            columns = dataframe.columns
+            result = dataframe.agg(*self.get_aggregations(columns)).collect()[0].asDict()
+            n_record = result["n_record"]
+
+            errors = list(schema_errors)
+            # in fast mode no new partition only means nothing was ingested since last validation
+            if len(partition_fingerprints) == 0 or (n_record == 0 and len(partitions) > 0):
+                errors.append("No record available in feature store")
+            null_ratio = {column: result[f"null__{column}"] / max(1, n_record) for column in columns}
+            for column in self.data_validation_config.mandatory_columns:
+                if column in null_ratio and null_ratio[column] > self.data_validation_config.max_null_ratio:
+                    errors.append(f"Null ratio of {column} is {null_ratio[column]:.4f}")
+            domain_violation_ratio = {}
+            for column in self.domains:
+                if f"domain__{column}" not in result:
+                    continue
+                domain_violation_ratio[column] = result[f"domain__{column}"] / max(1, n_record)
+                if domain_violation_ratio[column] > self.data_validation_config.max_domain_violation_ratio:
+                    errors.append(f"{domain_violation_ratio[column]:.4f} of {column} values are outside known domain")
+            if result.get("date__out_of_range", 0) > 0:
+                errors.append(f"{result['date__out_of_range']} records have date_received outside "
+                              f"{self.data_validation_config.min_date} - {self.data_validation_config.max_date}")
+
+            is_valid = len(errors) == 0
+            report = {
+                "file_path": file_path,
+                "fast_mode": self.data_validation_config.fast_mode,
+                "partitions": partitions,
+                "n_record": n_record,
+                "is_valid": is_valid,
+                "errors": errors,
+                "null_ratio": null_ratio,
+                "domain_violation_ratio": domain_violation_ratio,
+                "min_date_received": result.get("min_date_received"),
+                "max_date_received": result.get("max_date_received"),
+            }
+            write_yaml_file(file_path=self.data_validation_config.report_file_path, data=report)
+            logger.info(f"Data validation report has been written: {self.data_validation_config.report_file_path}")
+            if is_valid:
+                validated_fingerprints = {}
+                if config.fast_mode and os.path.exists(config.validated_partitions_file_path):
+                    validated_fingerprints = read_yaml_file(config.validated_partitions_file_path) or {}
+                validated_fingerprints.update({partition: partition_fingerprints[partition]
+                                               for partition in partitions})
+                write_yaml_file(file_path=config.validated_partitions_file_path, data=validated_fingerprints)
+
+            artifact = DataValidationArtifact(accepted_file_path=file_path,
+                                              report_file_path=self.data_validation_config.report_file_path,
+                                              is_valid=is_valid)
+            logger.info(f"Data validation artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,118 @@
+import os
+import sys
+
+from pyspark.ml import PipelineModel
+from pyspark.ml.evaluation import BinaryClassificationEvaluator
+from pyspark.ml.functions import vector_to_array
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.constants.training_pipeline_constants import MODEL_TRAINER_LABEL_COLUMN
+from finance_complaint.entities.artifact_entities import ModelTrainerArtifact, ModelEvaluationArtifact
+from finance_complaint.entities.config_entities import ModelEvaluationConfig
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import get_config_fingerprint, get_partition_fingerprints, get_path_size, \
+    get_temp_file_path, is_dataset_complete, replace_dir, write_yaml_file
+from finance_complaint.utils.model_resolver import ModelResolver
+
+LABEL_COLUMN = MODEL_TRAINER_LABEL_COLUMN
+TRAINED_MODEL_SCORE_COLUMN = "trained_model_score"
+BEST_MODEL_SCORE_COLUMN = "best_model_score"
+
+
+class ModelEvaluation:
+    """
+    Compares trained model with currently pushed model on the fixed hold-out set selected by model trainer.
+    Predictions of pushed model do not change as long as pushed model and hold-out set
+    are same, so they are cached and only trained model is scored in later runs.
+    """
+
+    def __init__(self, model_evaluation_config: ModelEvaluationConfig,
+                 model_trainer_artifact: ModelTrainerArtifact):
+        try:
+            logger.info(f"{'>>' * 20}Starting model evaluation.{'<<' * 20}")
+            self.model_evaluation_config = model_evaluation_config
+            self.model_trainer_artifact = model_trainer_artifact
+            self.model_resolver = ModelResolver(model_dir=model_evaluation_config.saved_model_dir)
+            self.schema = FinanceDataSchema()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def score(self, model_path: str, dataframe: DataFrame, score_column: str) -> DataFrame:
+        """
+        Adds probability of positive label as score_column, intermediate columns of model are dropped
+        so that another model can score the same dataframe in the same pass
+        """
+        model = PipelineModel.load(model_path)
+        return model.transform(dataframe) \
+            .select(*dataframe.columns, vector_to_array(F.col("probability"))[1].alias(score_column))
+
+    def get_metric(self, dataframe: DataFrame, score_column: str) -> float:
+        evaluator = BinaryClassificationEvaluator(labelCol=LABEL_COLUMN, rawPredictionCol=score_column,
+                                                  metricName="areaUnderROC")
+        return float(evaluator.evaluate(dataframe))
+
+    def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
+        try:
+            config = self.model_evaluation_config
+            holdout_file_path = self.model_trainer_artifact.holdout_file_path
+            holdout_df = get_spark_session(input_size=get_path_size(holdout_file_path)).read.parquet(holdout_file_path)
+            trained_model_path = self.model_trainer_artifact.trained_model_file_path
+            scored_df = self.score(trained_model_path, holdout_df, TRAINED_MODEL_SCORE_COLUMN)
+            score_columns = [TRAINED_MODEL_SCORE_COLUMN]
+
+            best_model_path = None
+            # predictions of pushed model are cached once scored_df is persisted
+            uncached_prediction_path = None
+            if self.model_resolver.is_model_present:
+                best_model_path = self.model_resolver.get_latest_model_path()
+                cache_key = get_config_fingerprint({"model_path": best_model_path,
+                                                    "holdout": get_partition_fingerprints(holdout_file_path)})
+                prediction_cache_path = os.path.join(config.prediction_cache_dir, cache_key)
+                if is_dataset_complete(prediction_cache_path):
+                    logger.info(f"Using cached predictions of pushed model: {prediction_cache_path}")
+                    best_predictions_df = get_spark_session().read.parquet(prediction_cache_path)
+                    scored_df = scored_df.join(best_predictions_df, on=self.schema.col_complaint_id, how="inner")
+                else:
+                    # both models score the hold-out set in the same pass
+                    scored_df = self.score(best_model_path, scored_df, BEST_MODEL_SCORE_COLUMN)
+                    uncached_prediction_path = prediction_cache_path
+                score_columns.append(BEST_MODEL_SCORE_COLUMN)
+            scored_df = scored_df.select(self.schema.col_complaint_id, LABEL_COLUMN, *score_columns).persist()
+            if uncached_prediction_path is not None:
+                # written aside and moved into place so an interrupted write is never taken as cache
+                temp_dir = get_temp_file_path(uncached_prediction_path)
+                scored_df.select(self.schema.col_complaint_id, BEST_MODEL_SCORE_COLUMN) \
+                    .write.mode("overwrite").parquet(temp_dir)
+                replace_dir(temp_dir, uncached_prediction_path)
+
+            trained_model_metric = self.get_metric(scored_df, TRAINED_MODEL_SCORE_COLUMN)
+            best_model_metric = None
+            if best_model_path is not None:
+                best_model_metric = self.get_metric(scored_df, BEST_MODEL_SCORE_COLUMN)
+            scored_df.unpersist()
+
+            changed_metric = trained_model_metric - (best_model_metric or 0.0)
+            model_accepted = best_model_metric is None or changed_metric >= config.change_threshold
+            write_yaml_file(file_path=config.report_file_path,
+                            data={"metric_name": "areaUnderROC",
+                                  "trained_model_path": trained_model_path,
+                                  "trained_model_metric": trained_model_metric,
+                                  "best_model_path": best_model_path,
+                                  "best_model_metric": best_model_metric,
+                                  "changed_metric": changed_metric,
+                                  "model_accepted": model_accepted})
+            artifact = ModelEvaluationArtifact(model_accepted=model_accepted,
+                                               changed_metric=changed_metric,
+                                               trained_model_path=trained_model_path,
+                                               trained_model_metric=trained_model_metric,
+                                               best_model_path=best_model_path,
+                                               best_model_metric=best_model_metric,
+                                               report_file_path=config.report_file_path)
+            logger.info(f"Model evaluation artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import sys
+
+from finance_complaint.cloud_storage import ContentAddressedStorage, LocalStorageBackend, S3StorageBackend, \
+    StorageBackend
+from finance_complaint.constants.prediction_pipeline_constants import ONLINE_SCORING_SCORER_DIR
+from finance_complaint.entities.artifact_entities import DataIngestionArtifact, ModelTrainerArtifact, \
+    ModelEvaluationArtifact, ModelPusherArtifact
+from finance_complaint.entities.config_entities import ModelPusherConfig
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.online_scoring.exporter import export_online_scorer
+from finance_complaint.utils.model_resolver import ModelResolver
+
+
+class ModelPusher:
+    """
+    Saves an accepted model as a new version next to its reports and online scorer and pushes it,
+    together with feature store, to artifact storage.
+    """
+
+    def __init__(self, model_pusher_config: ModelPusherConfig,
+                 data_ingestion_artifact: DataIngestionArtifact,
+                 model_trainer_artifact: ModelTrainerArtifact,
+                 model_evaluation_artifact: ModelEvaluationArtifact):
+        try:
+            logger.info(f"{'>>' * 20}Starting model pusher.{'<<' * 20}")
+            self.model_pusher_config = model_pusher_config
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.model_trainer_artifact = model_trainer_artifact
+            self.model_evaluation_artifact = model_evaluation_artifact
+            self.model_resolver = ModelResolver(model_dir=model_pusher_config.saved_model_dir)
+            self.storage = ContentAddressedStorage(backend=self.get_storage_backend(),
+                                                   prefix=model_pusher_config.storage_prefix,
+                                                   max_workers=model_pusher_config.max_workers,
+                                                   hash_cache_file_path=model_pusher_config.hash_cache_file_path)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_storage_backend(self) -> StorageBackend:
+        config = self.model_pusher_config
+        if config.storage_backend == "local":
+            return LocalStorageBackend(root_dir=config.local_storage_dir)
+        if config.storage_backend == "s3":
+            return S3StorageBackend(bucket_name=config.bucket_name,
+                                    region_name=config.region_name,
+                                    multipart_chunksize=config.multipart_chunksize,
+                                    max_concurrency=config.max_concurrency)
+        raise Exception(f"Unknown storage backend: {config.storage_backend}, expected one of [local, s3]")
+
+    def save_model(self) -> str:
+        """
+        Copies trained model and its reports into a new version directory of saved models
+        """
+        saved_model_path = self.model_resolver.get_save_model_path()
+        version_dir = os.path.dirname(saved_model_path)
+        shutil.copytree(self.model_trainer_artifact.trained_model_file_path, saved_model_path, dirs_exist_ok=True)
+        for report_file_path in [self.model_trainer_artifact.metric_report_file_path,
+                                 self.model_evaluation_artifact.report_file_path]:
+            shutil.copy(report_file_path, version_dir)
+        # numpy scorer is pushed with the model so online scoring never needs spark
+        export_online_scorer(model_path=saved_model_path,
+                             scorer_dir=os.path.join(version_dir, ONLINE_SCORING_SCORER_DIR))
+        logger.info(f"Model saved at: {saved_model_path}")
+        return saved_model_path
+
+    def initiate_model_pusher(self) -> ModelPusherArtifact:
+        try:
+            config = self.model_pusher_config
+            saved_model_path, model_manifest_key = None, None
+            n_uploaded_file, n_uploaded_byte = 0, 0
+            if self.model_evaluation_artifact.model_accepted:
+                saved_model_path = self.save_model()
+                version = self.model_resolver.get_latest_version()
+                push_result = self.storage.push_dir(local_dir=os.path.dirname(saved_model_path),
+                                                    name=config.model_name, version=version)
+                model_manifest_key = push_result.manifest_key
+                n_uploaded_file += push_result.n_uploaded_file
+                n_uploaded_byte += push_result.n_uploaded_byte
+            else:
+                logger.info("Trained model is not better than pushed model, model is not pushed")
+
+            # feature store is synced on every run, only new and changed partition files are uploaded
+            feature_store_version = os.path.basename(config.model_pusher_dir)
+            push_result = self.storage.push_dir(local_dir=self.data_ingestion_artifact.feature_store_file_path,
+                                                name=config.feature_store_name, version=feature_store_version)
+            n_uploaded_file += push_result.n_uploaded_file
+            n_uploaded_byte += push_result.n_uploaded_byte
+
+            artifact = ModelPusherArtifact(model_pushed=saved_model_path is not None,
+                                           saved_model_path=saved_model_path,
+                                           model_manifest_key=model_manifest_key,
+                                           feature_store_manifest_key=push_result.manifest_key,
+                                           n_uploaded_file=n_uploaded_file,
+                                           n_uploaded_byte=n_uploaded_byte)
+            logger.info(f"Model pusher artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
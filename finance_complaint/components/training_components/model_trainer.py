@@ -0,0 +1,221 @@
+import itertools
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from pyspark import StorageLevel
+from pyspark.ml import PipelineModel
+from pyspark.ml.classification import LogisticRegression
+from pyspark.ml.evaluation import BinaryClassificationEvaluator
+from pyspark.sql import Column, DataFrame
+from pyspark.sql import functions as F
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.constants.training_pipeline_constants import DATA_TRANSFORMATION_FEATURES_COLUMN
+from finance_complaint.entities.artifact_entities import DataTransformationArtifact, DataValidationArtifact, \
+    ModelTrainerArtifact
+from finance_complaint.entities.config_entities import ModelTrainerConfig
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import get_config_fingerprint, get_partition_fingerprints, get_path_size, \
+    get_temp_file_path, is_dataset_complete, read_yaml_file, replace_dir, write_yaml_file
+
+FOLD_COLUMN = "fold"
+
+
+class ModelTrainer:
+    """
+    Trains logistic regression on transformed complaints with a k-fold grid search.
+    Hold-out set of model evaluation is selected here once and never used for training.
+    Every fold/grid point is trained in parallel on data persisted once, and each finished
+    evaluation is checkpointed so that an interrupted search resumes where it stopped.
+    """
+
+    def __init__(self, model_trainer_config: ModelTrainerConfig,
+                 data_validation_artifact: DataValidationArtifact,
+                 data_transformation_artifact: DataTransformationArtifact):
+        try:
+            logger.info(f"{'>>' * 20}Starting model trainer.{'<<' * 20}")
+            self.model_trainer_config = model_trainer_config
+            self.data_validation_artifact = data_validation_artifact
+            self.data_transformation_artifact = data_transformation_artifact
+            self.features_column = DATA_TRANSFORMATION_FEATURES_COLUMN
+            self.schema = FinanceDataSchema()
+            self._checkpoint_lock = threading.Lock()
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def add_label(self, dataframe: DataFrame) -> DataFrame:
+        """
+        Only records having positive or negative target are kept, target is converted into 1.0/0.0 label
+        """
+        config = self.model_trainer_config
+        dataframe = dataframe.filter(F.col(config.target_column).isin(config.positive_label, config.negative_label))
+        return dataframe.withColumn(config.label_column,
+                                    (F.col(config.target_column) == config.positive_label).cast("double"))
+
+    def get_holdout_dataframe(self) -> DataFrame:
+        """
+        Hold-out set is selected once from validated complaints and reused by every later run.
+        It is written into a hidden directory and moved into place, an interrupted write is never used.
+        """
+        config = self.model_trainer_config
+        accepted_file_path = self.data_validation_artifact.accepted_file_path
+        spark_session = get_spark_session(input_size=get_path_size(accepted_file_path))
+        if not is_dataset_complete(config.holdout_file_path):
+            logger.info(f"Creating hold-out set at: {config.holdout_file_path}")
+            dataframe = self.add_label(spark_session.read.parquet(accepted_file_path))
+            temp_dir = get_temp_file_path(config.holdout_file_path)
+            self.schema.select_holdout(dataframe, config.holdout_ratio, config.label_column) \
+                .write.mode("overwrite") \
+                .partitionBy(*self.schema.partition_columns) \
+                .parquet(temp_dir)
+            replace_dir(temp_dir, config.holdout_file_path)
+        return spark_session.read.parquet(config.holdout_file_path)
+
+    def get_labelled_dataframe(self) -> DataFrame:
+        """
+        Labelled transformed complaints except those of hold-out set
+        """
+        config = self.model_trainer_config
+        holdout_df = self.get_holdout_dataframe()
+        transformed_file_path = self.data_transformation_artifact.transformed_file_path
+        spark_session = get_spark_session(input_size=get_path_size(transformed_file_path))
+        dataframe = self.add_label(spark_session.read.parquet(transformed_file_path))
+        # hold-out complaints are reserved for model evaluation
+        dataframe = dataframe.join(holdout_df.select(self.schema.col_complaint_id),
+                                   on=self.schema.col_complaint_id, how="left_anti")
+        return dataframe.select(self.schema.col_complaint_id, self.features_column, config.label_column)
+
+    def get_param_maps(self) -> List[Dict]:
+        param_names = sorted(self.model_trainer_config.param_grid)
+        return [dict(zip(param_names, values)) for values in
+                itertools.product(*[self.model_trainer_config.param_grid[name] for name in param_names])]
+
+    def get_estimator(self, params: Dict) -> LogisticRegression:
+        return LogisticRegression(featuresCol=self.features_column,
+                                  labelCol=self.model_trainer_config.label_column,
+                                  maxIter=self.model_trainer_config.max_iter,
+                                  **params)
+
+    def get_evaluator(self) -> BinaryClassificationEvaluator:
+        return BinaryClassificationEvaluator(labelCol=self.model_trainer_config.label_column,
+                                             rawPredictionCol="rawPrediction",
+                                             metricName="areaUnderROC")
+
+    def get_checkpoint_file_path(self) -> str:
+        """
+        Checkpoint is valid only for same transformed data and same search configuration
+        """
+        config = self.model_trainer_config
+        fingerprint = get_config_fingerprint({
+            "data": get_partition_fingerprints(self.data_transformation_artifact.transformed_file_path),
+            "target_column": config.target_column,
+            "positive_label": config.positive_label,
+            "negative_label": config.negative_label,
+            "label_column": config.label_column,
+            "holdout": get_partition_fingerprints(config.holdout_file_path),
+            "n_folds": config.n_folds,
+            "test_size": config.test_size,
+            "seed": config.seed,
+            "max_iter": config.max_iter,
+            # checkpoints of folds drawn with rand() do not match hashed folds
+            "fold_assignment": "xxhash64",
+        })
+        return os.path.join(config.checkpoint_dir, f"{fingerprint}.yaml")
+
+    def get_hash_bucket(self, n_bucket: int, seed: int) -> Column:
+        """
+        Bucket decided by hash of complaint_id only, so a complaint lands in same bucket
+        whatever the partitioning of dataframe is and a resumed search sees same folds
+        """
+        return F.pmod(F.xxhash64(F.col(self.schema.col_complaint_id), F.lit(seed)), F.lit(n_bucket))
+
+    def evaluate_fold(self, dataframe: DataFrame, fold: int, params: Dict) -> float:
+        train_df = dataframe.filter(F.col(FOLD_COLUMN) != fold)
+        validation_df = dataframe.filter(F.col(FOLD_COLUMN) == fold)
+        model = self.get_estimator(params).fit(train_df)
+        return self.get_evaluator().evaluate(model.transform(validation_df))
+
+    def run_cross_validation(self, dataframe: DataFrame) -> Tuple[Dict, float, Dict]:
+        """
+        dataframe: training data having fold column, it should be persisted by caller
+        returns best params, their average metric and metric of every fold/grid point
+        """
+        config = self.model_trainer_config
+        checkpoint_file_path = self.get_checkpoint_file_path()
+        results: Dict[str, float] = {}
+        if os.path.exists(checkpoint_file_path):
+            results = read_yaml_file(checkpoint_file_path) or {}
+            logger.info(f"Resuming cross validation, {len(results)} evaluations found in {checkpoint_file_path}")
+
+        param_maps = self.get_param_maps()
+        tasks = [(fold, params) for params in param_maps for fold in range(config.n_folds)
+                 if f"{fold}|{json.dumps(params, sort_keys=True)}" not in results]
+        logger.info(f"Evaluating {len(tasks)} fold/grid points with parallelism {config.parallelism}")
+
+        def run_task(task):
+            fold, params = task
+            metric = self.evaluate_fold(dataframe, fold, params)
+            logger.info(f"Fold {fold} params {params} metric {metric}")
+            with self._checkpoint_lock:
+                results[f"{fold}|{json.dumps(params, sort_keys=True)}"] = metric
+                write_yaml_file(file_path=checkpoint_file_path, data=results)
+
+        with ThreadPoolExecutor(max_workers=config.parallelism) as executor:
+            # consuming the iterator so that exceptions are raised here
+            list(executor.map(run_task, tasks))
+
+        best_params, best_metric = None, None
+        for params in param_maps:
+            metric = sum(results[f"{fold}|{json.dumps(params, sort_keys=True)}"]
+                         for fold in range(config.n_folds)) / config.n_folds
+            if best_metric is None or metric > best_metric:
+                best_params, best_metric = params, metric
+        return best_params, best_metric, results
+
+    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+        try:
+            config = self.model_trainer_config
+            dataframe = self.get_labelled_dataframe()
+            n_bucket = 10000
+            is_test = self.get_hash_bucket(n_bucket, config.seed + 1) < int(config.test_size * n_bucket)
+            train_df, test_df = dataframe.filter(~is_test), dataframe.filter(is_test)
+            # training data is persisted once and shared by every fold and grid point
+            train_df = train_df.withColumn(FOLD_COLUMN, self.get_hash_bucket(config.n_folds, config.seed)) \
+                .persist(StorageLevel.MEMORY_AND_DISK)
+            try:
+                best_params, cv_metric, results = self.run_cross_validation(train_df)
+                logger.info(f"Best params: {best_params} with cross validation metric: {cv_metric}")
+                model = self.get_estimator(best_params).fit(train_df)
+            finally:
+                train_df.unpersist()
+            test_metric = self.get_evaluator().evaluate(model.transform(test_df))
+            logger.info(f"Test metric: {test_metric}")
+
+            # transformation stages are saved together with estimator so model can score raw complaints
+            transformation_model = PipelineModel.load(
+                self.data_transformation_artifact.transformation_pipeline_file_path)
+            trained_model = PipelineModel(stages=transformation_model.stages + [model])
+            trained_model.write().overwrite().save(config.trained_model_file_path)
+
+            write_yaml_file(file_path=config.metric_report_file_path,
+                            data={"metric_name": "areaUnderROC",
+                                  "best_params": best_params,
+                                  "cv_metric": float(cv_metric),
+                                  "test_metric": float(test_metric),
+                                  "cv_results": results})
+            artifact = ModelTrainerArtifact(trained_model_file_path=config.trained_model_file_path,
+                                            metric_report_file_path=config.metric_report_file_path,
+                                            holdout_file_path=config.holdout_file_path,
+                                            best_params=best_params,
+                                            cv_metric=float(cv_metric),
+                                            test_metric=float(test_metric))
+            logger.info(f"Model trainer artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
@@ -0,0 +1,37 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpClient:
+    """
+    Shared requests session so that every download reuses keep-alive connections
+    from a single connection pool instead of opening a new TCP/TLS connection per request.
+    """
+    session = None
+
+    def __init__(self, pool_size: int, connect_timeout: float, read_timeout: float) -> None:
+        if HttpClient.session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "Accept": "application/json",
+                "User-Agent": "finance-complaint",
+            })
+            HttpClient.session = session
+        self.session = HttpClient.session
+        self.timeout = (connect_timeout, read_timeout)
+
+    def get(self, url: str, etag: str = None, last_modified: str = None) -> requests.Response:
+        """
+        Streams response of url, body is decompressed transparently while it is read.
+        etag, last_modified: validators of previous response, if given server can answer with 304
+        """
+        headers = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+        return self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
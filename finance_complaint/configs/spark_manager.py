@@ -1,37 +1,135 @@
 from finance_complaint.constants.environment_constants.variable_key import AWS_ACCESS_KEY_ID_ENV_KEY, \
-    AWS_SECRET_ACCESS_KEY_ENV_KEY
+    AWS_SECRET_ACCESS_KEY_ENV_KEY, SPARK_PROFILE_ENV_KEY
+from finance_complaint.logger import logger
+import math
 import os
-from pyspark.sql import SparkSession
+import threading
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
 load_dotenv()
-access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_ENV_KEY")
-secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_ENV_KEY")
-
-# spark = SparkSession.builder.master('local[*]').appName('finance_complaint') .getOrCreate()
-# hadoop_conf = spark._jsc.hadoopConfiguration()
-# hadoop_conf.set("fs.s3n.impl", "org.apache.hadoop.fs.s3native.NativeS3FileSystem")
-# hadoop_conf.set("fs.s3n.awsAccessKeyId", access_key_id)
-# hadoop_conf.set("fs.s3n.awsSecretAccessKey", secret_access_key)
-#
-# spark_session=spark
-
-
-spark_session = SparkSession.builder.master('local[*]').appName('finance_complaint') \
-    .config("spark.executor.instances", "1") \
-    .config("spark.executor.memory", "6g") \
-    .config("spark.driver.memory", "6g") \
-    .config("spark.executor.memoryOverhead", "8g") \
-    .config('spark.jars.packages', "com.amazonaws:aws-java-sdk:1.7.4,org.apache.hadoop:hadoop-aws:2.7.3") \
-    .getOrCreate()
-#
-
-spark_session._jsc.hadoopConfiguration().set("fs.s3a.awsAccessKeyId", access_key_id)
-spark_session._jsc.hadoopConfiguration().set("fs.s3a.awsSecretAccessKey", secret_access_key)
-spark_session._jsc.hadoopConfiguration().set("fs.s3a.impl", "org.apache.hadoop.fs.s3a.S3AFileSystem")
-spark_session._jsc.hadoopConfiguration().set("fs.s3a.impl", "org.apache.hadoop.fs.s3native.NativeS3FileSystem")
-spark_session._jsc.hadoopConfiguration().set("com.amazonaws.services.s3.enableV4", "true")
-spark_session._jsc.hadoopConfiguration().set("fs.s3a.aws.credentials.provider",
-                                             "org.apache.hadoop.fs.s3a.BasicAWSCredentialsProvider")
-spark_session._jsc.hadoopConfiguration().set("fs.s3a.endpoint", "ap-south-1.amazonaws.com")
-spark_session._jsc.hadoopConfiguration().set(" fs.s3.buffer.dir", "tmp")
+
+SPARK_PROFILE_TINY = "tiny"
+SPARK_PROFILE_BACKFILL = "backfill"
+SPARK_PROFILE_CLUSTER = "cluster"
+
+# inputs smaller than this are handled by tiny profile when profile is not given
+TINY_PROFILE_MAX_INPUT_SIZE = 256 * 1024 * 1024
+# target amount of input data handled by single shuffle partition
+SHUFFLE_PARTITION_SIZE = 128 * 1024 * 1024
+S3_JAR_PACKAGES = "com.amazonaws:aws-java-sdk:1.7.4,org.apache.hadoop:hadoop-aws:2.7.3"
+
+
+@dataclass
+class SparkProfile:
+    name: str
+    master: str
+    # fraction of physical memory given to driver, executor memory is same as driver in local mode
+    memory_fraction: float
+    max_cores: int
+    with_s3: bool
+
+
+SPARK_PROFILES = {
+    SPARK_PROFILE_TINY: SparkProfile(name=SPARK_PROFILE_TINY, master="local[2]", memory_fraction=0.25,
+                                     max_cores=2, with_s3=False),
+    SPARK_PROFILE_BACKFILL: SparkProfile(name=SPARK_PROFILE_BACKFILL, master="local[*]", memory_fraction=0.6,
+                                         max_cores=None, with_s3=True),
+    # master is provided by spark-submit on cluster
+    SPARK_PROFILE_CLUSTER: SparkProfile(name=SPARK_PROFILE_CLUSTER, master=None, memory_fraction=None,
+                                        max_cores=None, with_s3=True),
+}
+
+_spark_session = None
+_lock = threading.Lock()
+
+
+def get_physical_memory() -> int:
+    try:
+        import psutil
+        return psutil.virtual_memory().total
+    except ImportError:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def select_spark_profile(input_size: int = None) -> SparkProfile:
+    """
+    Profile given in environment variable takes precedence,
+    otherwise tiny profile is used for small inputs and backfill profile for rest.
+    Input of unknown size is treated as small, backfills are large enough to be measured by caller.
+    """
+    profile_name = os.getenv(SPARK_PROFILE_ENV_KEY)
+    if profile_name is None:
+        is_tiny = input_size is None or input_size < TINY_PROFILE_MAX_INPUT_SIZE
+        profile_name = SPARK_PROFILE_TINY if is_tiny else SPARK_PROFILE_BACKFILL
+    if profile_name not in SPARK_PROFILES:
+        raise Exception(f"Unknown spark profile: {profile_name}, available: {list(SPARK_PROFILES)}")
+    return SPARK_PROFILES[profile_name]
+
+
+def build_spark_session(profile: SparkProfile, input_size: int = None):
+    from pyspark.sql import SparkSession
+
+    n_cores = os.cpu_count() or 1
+    if profile.max_cores is not None:
+        n_cores = min(n_cores, profile.max_cores)
+    n_shuffle_partitions = n_cores
+    if input_size is not None:
+        n_shuffle_partitions = max(n_cores, math.ceil(input_size / SHUFFLE_PARTITION_SIZE))
+
+    builder = SparkSession.builder.appName('finance_complaint') \
+        .config("spark.sql.shuffle.partitions", str(n_shuffle_partitions))
+    if profile.master is not None:
+        builder = builder.master(profile.master if profile.max_cores is None else f"local[{n_cores}]")
+    if profile.memory_fraction is not None:
+        memory_mb = max(512, int(get_physical_memory() * profile.memory_fraction / (1024 * 1024)))
+        builder = builder.config("spark.executor.instances", "1") \
+            .config("spark.driver.memory", f"{memory_mb}m") \
+            .config("spark.executor.memory", f"{memory_mb}m")
+    if profile.with_s3:
+        builder = builder.config('spark.jars.packages', S3_JAR_PACKAGES)
+    logger.info(f"Starting spark session with profile: {profile}, shuffle partitions: {n_shuffle_partitions}")
+    spark_session = builder.getOrCreate()
+
+    if profile.with_s3:
+        access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_ENV_KEY")
+        secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_ENV_KEY")
+        spark_session._jsc.hadoopConfiguration().set("fs.s3a.awsAccessKeyId", access_key_id)
+        spark_session._jsc.hadoopConfiguration().set("fs.s3a.awsSecretAccessKey", secret_access_key)
+        spark_session._jsc.hadoopConfiguration().set("fs.s3a.impl", "org.apache.hadoop.fs.s3a.S3AFileSystem")
+        spark_session._jsc.hadoopConfiguration().set("fs.s3a.impl", "org.apache.hadoop.fs.s3native.NativeS3FileSystem")
+        spark_session._jsc.hadoopConfiguration().set("com.amazonaws.services.s3.enableV4", "true")
+        spark_session._jsc.hadoopConfiguration().set("fs.s3a.aws.credentials.provider",
+                                                     "org.apache.hadoop.fs.s3a.BasicAWSCredentialsProvider")
+        spark_session._jsc.hadoopConfiguration().set("fs.s3a.endpoint", "ap-south-1.amazonaws.com")
+        spark_session._jsc.hadoopConfiguration().set(" fs.s3.buffer.dir", "tmp")
+    return spark_session
+
+
+def get_spark_session(profile: str = None, input_size: int = None):
+    """
+    Spark session is created on first call only, later calls return the same session.
+    profile: name of spark profile (tiny, backfill, cluster), selected automatically if not given
+    input_size: size of input data in bytes used to pick profile and number of shuffle partitions
+    """
+    global _spark_session
+    if _spark_session is None:
+        with _lock:
+            if _spark_session is None:
+                spark_profile = SPARK_PROFILES[profile] if profile is not None else select_spark_profile(input_size)
+                _spark_session = build_spark_session(spark_profile, input_size=input_size)
+    return _spark_session
+
+
+def get_active_spark_session():
+    """
+    returns spark session if it has been started already, never starts one
+    """
+    return _spark_session
+
+
+def __getattr__(name):
+    # keeps `from spark_manager import spark_session` working while still starting spark lazily
+    if name == "spark_session":
+        return get_spark_session()
+    raise AttributeError(f"module {__name__} has no attribute {name}")
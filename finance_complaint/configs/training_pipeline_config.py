@@ -1,11 +1,14 @@
 from finance_complaint.constants import TIMESTAMP
 from finance_complaint.constants.training_pipeline_constants import *
+from finance_complaint.constants.prediction_pipeline_constants import *
+from finance_complaint.constants.environment_constants.variable_key import ARTIFACT_STORAGE_BACKEND_ENV_KEY, \
+    DATA_VALIDATION_FAST_MODE_ENV_KEY
 from finance_complaint.entities.config_entities import *
 from finance_complaint.entities.metadata_entity import DataIngestionMetadata
 from finance_complaint.exception import FinanceException
 from finance_complaint.logger import logger
 from datetime import datetime, date
-import sys
+import sys, os
 
 class FinanceConfig:
 
@@ -28,6 +31,18 @@ class FinanceConfig:
         except Exception as e:
             raise FinanceException(e, sys)
 
+    def get_stage_scheduler_config(self) -> StageSchedulerConfig:
+        try:
+            stage_scheduler_config = StageSchedulerConfig(
+                cache_dir=os.path.join(self.pipeline_config.artifact_dir, STAGE_SCHEDULER_CACHE_DIR),
+                timestamp=self.timestamp,
+                max_workers=STAGE_SCHEDULER_MAX_WORKERS
+            )
+            logger.info(f"Stage scheduler config: {stage_scheduler_config}")
+            return stage_scheduler_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
     def get_data_ingestion_config(self, from_date=DATA_INGESTION_MIN_START_DATE,
                                   to_date=None) -> DataIngestionConfig:
         """
@@ -57,6 +72,19 @@ class FinanceConfig:
 
         metadata_file_path = os.path.join(data_ingestion_master_dir, DATA_INGESTION_META_DATA_FILE_NAME)
 
+        # observed interval volume is kept across runs to plan interval boundaries
+        interval_plan_file_path = os.path.join(data_ingestion_master_dir, DATA_INGESTION_INTERVAL_PLAN_FILE_NAME)
+
+        # ETag/Last-Modified of downloaded intervals to skip unchanged intervals in next run
+        http_cache_file_path = os.path.join(data_ingestion_master_dir, DATA_INGESTION_HTTP_CACHE_FILE_NAME)
+
+        # intervals failed after all retries, kept across runs to be replayed
+        dead_letter_file_path = os.path.join(data_ingestion_master_dir, DATA_INGESTION_DEAD_LETTER_FILE_NAME)
+
+        # position up to which complaint store has been exported into feature store
+        complaint_store_sync_file_path = os.path.join(data_ingestion_master_dir,
+                                                      DATA_INGESTION_COMPLAINT_STORE_SYNC_FILE_NAME)
+
         data_ingestion_metadata = DataIngestionMetadata(metadata_file_path=metadata_file_path)
 
         if data_ingestion_metadata.is_metadata_file_present:
@@ -65,6 +93,10 @@ class FinanceConfig:
 
         feature_store_dir=os.path.join(data_ingestion_master_dir, DATA_INGESTION_FEATURE_STORE_DIR)
         failed_dir=os.path.join(data_ingestion_dir, DATA_INGESTION_FAILED_DIR)
+        feature_store_staging_dir = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_STAGING_DIR)
+        landing_staging_dir = os.path.join(data_ingestion_dir, DATA_INGESTION_LANDING_STAGING_DIR)
+        # state of every interval downloaded in this run, used to resume a failed run
+        manifest_file_path = os.path.join(data_ingestion_dir, DATA_INGESTION_MANIFEST_FILE_NAME)
 
         data_ingestion_config = DataIngestionConfig(
             from_date=from_date,
@@ -75,11 +107,241 @@ class FinanceConfig:
             feature_store_dir=feature_store_dir,
             failed_dir=failed_dir,
             metadata_file_path=metadata_file_path,
-            data_source_url=DATA_INGESTION_DATA_SOURCE_URL
+            data_source_url=DATA_INGESTION_DATA_SOURCE_URL,
+            max_workers=DATA_INGESTION_MAX_WORKERS,
+            requests_per_second=DATA_INGESTION_REQUESTS_PER_SECOND,
+            rate_limit_burst=DATA_INGESTION_RATE_LIMIT_BURST,
+            interval_plan_file_path=interval_plan_file_path,
+            target_interval_size=DATA_INGESTION_TARGET_INTERVAL_SIZE,
+            min_interval_records=DATA_INGESTION_MIN_INTERVAL_RECORDS,
+            connect_timeout=DATA_INGESTION_CONNECT_TIMEOUT,
+            read_timeout=DATA_INGESTION_READ_TIMEOUT,
+            feature_store_staging_dir=feature_store_staging_dir,
+            feature_store_write_mode=DATA_INGESTION_FEATURE_STORE_WRITE_MODE,
+            http_cache_file_path=http_cache_file_path,
+            manifest_file_path=manifest_file_path,
+            dead_letter_file_path=dead_letter_file_path,
+            retry_base_delay=DATA_INGESTION_RETRY_BASE_DELAY,
+            retry_max_delay=DATA_INGESTION_RETRY_MAX_DELAY,
+            complaint_store=DATA_INGESTION_COMPLAINT_STORE,
+            local_complaint_store_dir=os.path.join(self.pipeline_config.artifact_dir,
+                                                   DATA_INGESTION_LOCAL_COMPLAINT_STORE_DIR),
+            complaint_collection_name=DATA_INGESTION_COMPLAINT_COLLECTION_NAME,
+            complaint_store_batch_size=DATA_INGESTION_COMPLAINT_STORE_BATCH_SIZE,
+            mirror_to_complaint_store=DATA_INGESTION_MIRROR_TO_COMPLAINT_STORE,
+            complaint_store_sync_mode=DATA_INGESTION_COMPLAINT_STORE_SYNC_MODE,
+            complaint_store_sync_file_path=complaint_store_sync_file_path,
+            complaint_store_export_file_records=DATA_INGESTION_COMPLAINT_STORE_EXPORT_FILE_RECORDS,
+            landing_format=DATA_INGESTION_LANDING_FORMAT,
+            landing_staging_dir=landing_staging_dir,
+            landing_compression_level=DATA_INGESTION_LANDING_COMPRESSION_LEVEL,
+            landing_batch_records=DATA_INGESTION_LANDING_BATCH_RECORDS,
+            conversion_engine=DATA_INGESTION_CONVERSION_ENGINE,
+            arrow_engine_max_input_size=DATA_INGESTION_ARROW_ENGINE_MAX_INPUT_SIZE
         )
 
         logger.info(f"Data ingestion config: {data_ingestion_config}")
         return data_ingestion_config
 
+    def get_data_validation_config(self, fast_mode: bool = None) -> DataValidationConfig:
+        """
+        fast_mode: if True only partitions ingested since last valid validation are validated,
+        meant for daily runs. Taken from DATA_VALIDATION_FAST_MODE_ENV_KEY if not given.
+        """
+        try:
+            if fast_mode is None:
+                fast_mode = os.getenv(DATA_VALIDATION_FAST_MODE_ENV_KEY, "0").lower() in ("1", "true", "yes")
+            data_validation_master_dir = os.path.join(self.pipeline_config.artifact_dir, DATA_VALIDATION_DIR)
+            data_validation_dir = os.path.join(data_validation_master_dir, self.timestamp)
+            report_file_path = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
+
+            data_validation_config = DataValidationConfig(
+                data_validation_dir=data_validation_dir,
+                report_file_path=report_file_path,
+                mandatory_columns=DATA_VALIDATION_MANDATORY_COLUMNS,
+                max_null_ratio=DATA_VALIDATION_MAX_NULL_RATIO,
+                max_domain_violation_ratio=DATA_VALIDATION_MAX_DOMAIN_VIOLATION_RATIO,
+                min_date=DATA_INGESTION_MIN_START_DATE,
+                max_date=str(date.today()),
+                fast_mode=fast_mode,
+                validated_partitions_file_path=os.path.join(data_validation_master_dir,
+                                                            DATA_VALIDATION_VALIDATED_PARTITIONS_FILE_NAME)
+            )
+            logger.info(f"Data validation config: {data_validation_config}")
+            return data_validation_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_data_transformation_config(self) -> DataTransformationConfig:
+        try:
+            data_transformation_master_dir = os.path.join(self.pipeline_config.artifact_dir,
+                                                          DATA_TRANSFORMATION_DIR)
+            data_transformation_config = DataTransformationConfig(
+                data_transformation_dir=os.path.join(data_transformation_master_dir, self.timestamp),
+                cache_dir=os.path.join(data_transformation_master_dir, DATA_TRANSFORMATION_CACHE_DIR),
+                num_features=DATA_TRANSFORMATION_NUM_FEATURES,
+                min_doc_freq=DATA_TRANSFORMATION_MIN_DOC_FREQ,
+                refit_ratio=DATA_TRANSFORMATION_REFIT_RATIO,
+                text_column=DATA_TRANSFORMATION_TEXT_COLUMN,
+                categorical_columns=DATA_TRANSFORMATION_CATEGORICAL_COLUMNS,
+                passthrough_columns=DATA_TRANSFORMATION_PASSTHROUGH_COLUMNS,
+                features_column=DATA_TRANSFORMATION_FEATURES_COLUMN
+            )
+            logger.info(f"Data transformation config: {data_transformation_config}")
+            return data_transformation_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_model_trainer_config(self) -> ModelTrainerConfig:
+        try:
+            model_trainer_master_dir = os.path.join(self.pipeline_config.artifact_dir, MODEL_TRAINER_DIR)
+            model_trainer_dir = os.path.join(model_trainer_master_dir, self.timestamp)
+            model_trainer_config = ModelTrainerConfig(
+                model_trainer_dir=model_trainer_dir,
+                trained_model_file_path=os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR,
+                                                     MODEL_TRAINER_MODEL_NAME),
+                metric_report_file_path=os.path.join(model_trainer_dir, MODEL_TRAINER_METRIC_REPORT_FILE_NAME),
+                checkpoint_dir=os.path.join(model_trainer_master_dir, MODEL_TRAINER_CHECKPOINT_DIR),
+                holdout_file_path=os.path.join(model_trainer_master_dir, MODEL_TRAINER_HOLDOUT_DIR),
+                holdout_ratio=MODEL_TRAINER_HOLDOUT_RATIO,
+                target_column=MODEL_TRAINER_TARGET_COLUMN,
+                positive_label=MODEL_TRAINER_POSITIVE_LABEL,
+                negative_label=MODEL_TRAINER_NEGATIVE_LABEL,
+                label_column=MODEL_TRAINER_LABEL_COLUMN,
+                n_folds=MODEL_TRAINER_N_FOLDS,
+                parallelism=MODEL_TRAINER_PARALLELISM,
+                test_size=MODEL_TRAINER_TEST_SIZE,
+                seed=MODEL_TRAINER_SEED,
+                max_iter=MODEL_TRAINER_MAX_ITER,
+                param_grid=MODEL_TRAINER_PARAM_GRID
+            )
+            logger.info(f"Model trainer config: {model_trainer_config}")
+            return model_trainer_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_model_evaluation_config(self) -> ModelEvaluationConfig:
+        try:
+            model_evaluation_master_dir = os.path.join(self.pipeline_config.artifact_dir, MODEL_EVALUATION_DIR)
+            model_evaluation_dir = os.path.join(model_evaluation_master_dir, self.timestamp)
+            model_evaluation_config = ModelEvaluationConfig(
+                model_evaluation_dir=model_evaluation_dir,
+                report_file_path=os.path.join(model_evaluation_dir, MODEL_EVALUATION_REPORT_FILE_NAME),
+                prediction_cache_dir=os.path.join(model_evaluation_master_dir, MODEL_EVALUATION_PREDICTION_CACHE_DIR),
+                saved_model_dir=os.path.join(self.pipeline_config.artifact_dir, MODEL_PUSHER_SAVED_MODEL_DIR),
+                change_threshold=MODEL_EVALUATION_CHANGE_THRESHOLD
+            )
+            logger.info(f"Model evaluation config: {model_evaluation_config}")
+            return model_evaluation_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_model_pusher_config(self) -> ModelPusherConfig:
+        try:
+            model_pusher_master_dir = os.path.join(self.pipeline_config.artifact_dir, MODEL_PUSHER_DIR)
+            model_pusher_config = ModelPusherConfig(
+                model_pusher_dir=os.path.join(model_pusher_master_dir, self.timestamp),
+                saved_model_dir=os.path.join(self.pipeline_config.artifact_dir, MODEL_PUSHER_SAVED_MODEL_DIR),
+                hash_cache_file_path=os.path.join(model_pusher_master_dir, MODEL_PUSHER_HASH_CACHE_FILE_NAME),
+                storage_backend=os.getenv(ARTIFACT_STORAGE_BACKEND_ENV_KEY, MODEL_PUSHER_STORAGE_BACKEND),
+                local_storage_dir=MODEL_PUSHER_LOCAL_STORAGE_DIR,
+                bucket_name=MODEL_PUSHER_BUCKET_NAME,
+                region_name=MODEL_PUSHER_REGION_NAME,
+                storage_prefix=MODEL_PUSHER_STORAGE_PREFIX,
+                model_name=MODEL_PUSHER_MODEL_NAME,
+                feature_store_name=MODEL_PUSHER_FEATURE_STORE_NAME,
+                multipart_chunksize=MODEL_PUSHER_MULTIPART_CHUNKSIZE,
+                max_concurrency=MODEL_PUSHER_MAX_CONCURRENCY,
+                max_workers=MODEL_PUSHER_MAX_WORKERS
+            )
+            logger.info(f"Model pusher config: {model_pusher_config}")
+            return model_pusher_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_batch_prediction_config(self) -> BatchPredictionConfig:
+        try:
+            batch_prediction_master_dir = os.path.join(self.pipeline_config.artifact_dir, BATCH_PREDICTION_DIR)
+            data_ingestion_master_dir = os.path.join(self.pipeline_config.artifact_dir, DATA_INGESTION_DIR)
+            batch_prediction_config = BatchPredictionConfig(
+                batch_prediction_dir=batch_prediction_master_dir,
+                feature_store_file_path=os.path.join(data_ingestion_master_dir, DATA_INGESTION_FEATURE_STORE_DIR,
+                                                     DATA_INGESTION_FILE_NAME),
+                data_ingestion_metadata_file_path=os.path.join(data_ingestion_master_dir,
+                                                               DATA_INGESTION_META_DATA_FILE_NAME),
+                saved_model_dir=os.path.join(self.pipeline_config.artifact_dir, MODEL_PUSHER_SAVED_MODEL_DIR),
+                prediction_file_path=os.path.join(batch_prediction_master_dir, BATCH_PREDICTION_PREDICTION_DIR),
+                metadata_file_path=os.path.join(batch_prediction_master_dir, BATCH_PREDICTION_META_DATA_FILE_NAME),
+                output_columns=BATCH_PREDICTION_OUTPUT_COLUMNS,
+                prediction_column=BATCH_PREDICTION_PREDICTION_COLUMN,
+                probability_column=BATCH_PREDICTION_PROBABILITY_COLUMN,
+                positive_label=MODEL_TRAINER_POSITIVE_LABEL,
+                negative_label=MODEL_TRAINER_NEGATIVE_LABEL,
+                write_to_mongodb=BATCH_PREDICTION_WRITE_TO_MONGODB,
+                collection_name=BATCH_PREDICTION_COLLECTION_NAME,
+                mongodb_batch_size=BATCH_PREDICTION_MONGODB_BATCH_SIZE
+            )
+            logger.info(f"Batch prediction config: {batch_prediction_config}")
+            return batch_prediction_config
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_online_scoring_config(self) -> OnlineScoringConfig:
+        try:
+            online_scoring_config = OnlineScoringConfig(
+                saved_model_dir=os.path.join(self.pipeline_config.artifact_dir, MODEL_PUSHER_SAVED_MODEL_DIR),
+                scorer_dir_name=ONLINE_SCORING_SCORER_DIR,
+                host=ONLINE_SCORING_HOST,
+                port=ONLINE_SCORING_PORT,
+                max_batch_size=ONLINE_SCORING_MAX_BATCH_SIZE,
+                max_wait_ms=ONLINE_SCORING_MAX_WAIT_MS,
+                request_timeout=ONLINE_SCORING_REQUEST_TIMEOUT
+            )
+            logger.info(f"Online scoring config: {online_scoring_config}")
+            return online_scoring_config
+        except Exception as e:
+            raise FinanceException(e, sys)
 
+    def get_benchmark_config(self) -> BenchmarkConfig:
+        try:
+            benchmark_dir = os.path.join(self.pipeline_config.artifact_dir, BENCHMARK_DIR)
+            benchmark_config = BenchmarkConfig(
+                benchmark_dir=benchmark_dir,
+                run_dir=os.path.join(benchmark_dir, BENCHMARK_RUN_DIR, self.timestamp),
+                result_dir=os.path.join(benchmark_dir, BENCHMARK_RESULT_DIR),
+                from_date=BENCHMARK_FROM_DATE,
+                to_date=BENCHMARK_TO_DATE,
+                records_per_day=BENCHMARK_RECORDS_PER_DAY,
+                narrative_words=BENCHMARK_NARRATIVE_WORDS,
+                latency_ms=BENCHMARK_LATENCY_MS,
+                throttle_ratio=BENCHMARK_THROTTLE_RATIO,
+                malformed_ratio=BENCHMARK_MALFORMED_RATIO,
+                retry_after=BENCHMARK_RETRY_AFTER,
+                retry_base_delay=BENCHMARK_RETRY_BASE_DELAY,
+                retry_max_delay=BENCHMARK_RETRY_MAX_DELAY,
+                requests_per_second=BENCHMARK_REQUESTS_PER_SECOND,
+                seed=BENCHMARK_SEED,
+                n_baseline_run=BENCHMARK_N_BASELINE_RUN,
+                regression_tolerance=BENCHMARK_REGRESSION_TOLERANCE
+            )
+            logger.info(f"Benchmark config: {benchmark_config}")
+            return benchmark_config
+        except Exception as e:
+            raise FinanceException(e, sys)
 
+    def get_feature_store_compaction_config(self) -> FeatureStoreCompactionConfig:
+        try:
+            data_ingestion_master_dir = os.path.join(self.pipeline_config.artifact_dir, DATA_INGESTION_DIR)
+            feature_store_compaction_config = FeatureStoreCompactionConfig(
+                feature_store_file_path=os.path.join(data_ingestion_master_dir, DATA_INGESTION_FEATURE_STORE_DIR,
+                                                     DATA_INGESTION_FILE_NAME),
+                target_file_size=FEATURE_STORE_COMPACTION_TARGET_FILE_SIZE,
+                row_group_records=FEATURE_STORE_COMPACTION_ROW_GROUP_RECORDS,
+                sort_columns=FEATURE_STORE_COMPACTION_SORT_COLUMNS,
+                max_workers=FEATURE_STORE_COMPACTION_MAX_WORKERS,
+                compact_after_ingestion=FEATURE_STORE_COMPACTION_AFTER_INGESTION
+            )
+            logger.info(f"Feature store compaction config: {feature_store_compaction_config}")
+            return feature_store_compaction_config
+        except Exception as e:
+            raise FinanceException(e, sys)
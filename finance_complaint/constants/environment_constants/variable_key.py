@@ -1,3 +1,12 @@
 AWS_ACCESS_KEY_ID_ENV_KEY = "AWS_ACCESS_KEY_ID_ENV_KEY"
 AWS_SECRET_ACCESS_KEY_ENV_KEY = "AWS_SECRET_ACCESS_KEY_ENV_KEY"
-MONGO_DB_URL_ENV_KEY = "MONGO_DB_URL_ENV_KEY"
\ No newline at end of file
+MONGO_DB_URL_ENV_KEY = "MONGO_DB_URL_ENV_KEY"
+SPARK_PROFILE_ENV_KEY = "SPARK_PROFILE_ENV_KEY"
+ARTIFACT_STORAGE_BACKEND_ENV_KEY = "ARTIFACT_STORAGE_BACKEND_ENV_KEY"
+LOG_FORMAT_ENV_KEY = "LOG_FORMAT_ENV_KEY"
+LOG_LEVEL_ENV_KEY = "LOG_LEVEL_ENV_KEY"
+LOG_MODULE_LEVELS_ENV_KEY = "LOG_MODULE_LEVELS_ENV_KEY"
+LOG_MODULE_SAMPLING_ENV_KEY = "LOG_MODULE_SAMPLING_ENV_KEY"
+METRICS_PORT_ENV_KEY = "METRICS_PORT_ENV_KEY"
+# "1" validates only partitions ingested since last valid validation, meant for daily runs
+DATA_VALIDATION_FAST_MODE_ENV_KEY = "DATA_VALIDATION_FAST_MODE_ENV_KEY"
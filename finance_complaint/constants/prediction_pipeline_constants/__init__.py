@@ -0,0 +1,2 @@
+from finance_complaint.constants.prediction_pipeline_constants.batch_prediction_constants import *
+from finance_complaint.constants.prediction_pipeline_constants.online_scoring_constants import *
@@ -0,0 +1,12 @@
+BATCH_PREDICTION_DIR = "batch_prediction"
+BATCH_PREDICTION_PREDICTION_DIR = "predictions"
+BATCH_PREDICTION_META_DATA_FILE_NAME = "meta_info.yaml"
+BATCH_PREDICTION_PREDICTION_COLUMN = "predicted_consumer_disputed"
+BATCH_PREDICTION_PROBABILITY_COLUMN = "dispute_probability"
+# columns of feature store kept with every prediction
+BATCH_PREDICTION_OUTPUT_COLUMNS = ["complaint_id", "date_received", "product", "state", "company"]
+
+# predictions are additionally upserted into mongodb on complaint_id when enabled
+BATCH_PREDICTION_WRITE_TO_MONGODB = False
+BATCH_PREDICTION_COLLECTION_NAME = "predictions"
+BATCH_PREDICTION_MONGODB_BATCH_SIZE = 1000
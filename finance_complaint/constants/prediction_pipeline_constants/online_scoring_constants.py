@@ -0,0 +1,8 @@
+# exported next to every saved model version by model pusher
+ONLINE_SCORING_SCORER_DIR = "online_scorer"
+ONLINE_SCORING_HOST = "127.0.0.1"
+ONLINE_SCORING_PORT = 8080
+# a batch is scored when it has this many records or its first record waited this long
+ONLINE_SCORING_MAX_BATCH_SIZE = 64
+ONLINE_SCORING_MAX_WAIT_MS = 2
+ONLINE_SCORING_REQUEST_TIMEOUT = 5 # seconds
@@ -4,3 +4,12 @@ PIPELINE_NAME = "finance-complaint"
 PIPELINE_ARTIFACT_DIR = os.path.join(os.getcwd(), "finance_artifact")
 
 from finance_complaint.constants.training_pipeline_constants.data_ingestion_constants import *
+from finance_complaint.constants.training_pipeline_constants.data_validation_constants import *
+from finance_complaint.constants.training_pipeline_constants.data_transformation_constants import *
+from finance_complaint.constants.training_pipeline_constants.model_trainer_constants import *
+from finance_complaint.constants.training_pipeline_constants.model_evaluvation_constants import *
+from finance_complaint.constants.training_pipeline_constants.model_pusher_constants import *
+from finance_complaint.constants.training_pipeline_constants.metrics_constants import *
+from finance_complaint.constants.training_pipeline_constants.benchmark_constants import *
+from finance_complaint.constants.training_pipeline_constants.stage_scheduler_constants import *
+from finance_complaint.constants.training_pipeline_constants.feature_store_compaction_constants import *
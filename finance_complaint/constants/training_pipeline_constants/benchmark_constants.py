@@ -0,0 +1,19 @@
+BENCHMARK_DIR = "benchmark"
+BENCHMARK_RUN_DIR = "runs" # artifact dir of every benchmark run, removed once run finishes
+BENCHMARK_RESULT_DIR = "results" # results are kept per scenario to compare runs of same scenario
+BENCHMARK_FROM_DATE = "2012-01-01"
+BENCHMARK_TO_DATE = "2012-07-01"
+BENCHMARK_RECORDS_PER_DAY = 200
+BENCHMARK_NARRATIVE_WORDS = 120 # words of synthetic complaint narrative
+BENCHMARK_LATENCY_MS = 50 # delay before fake server starts sending a response
+BENCHMARK_THROTTLE_RATIO = 0.05 # share of requests answered with 429
+BENCHMARK_MALFORMED_RATIO = 0.05 # share of requests answered with a broken body
+BENCHMARK_RETRY_AFTER = 0.2 # seconds, sent with throttled responses
+BENCHMARK_SEED = 42
+BENCHMARK_N_BASELINE_RUN = 5 # previous runs whose median is the baseline of a new run
+BENCHMARK_REGRESSION_TOLERANCE = 0.2 # allowed relative slowdown against baseline
+# fake server answers within milliseconds so retry delays and request rate are scaled down accordingly,
+# otherwise backoff sleeps and rate limiter would dominate measured time instead of ingestion code
+BENCHMARK_RETRY_BASE_DELAY = 0.1 # seconds
+BENCHMARK_RETRY_MAX_DELAY = 1 # seconds
+BENCHMARK_REQUESTS_PER_SECOND = 50
@@ -7,4 +7,41 @@ DATA_INGESTION_META_DATA_FILE_NAME = "meta_info.yaml"
 DATA_INGESTION_MIN_START_DATE = "2011-12-01" ##YY-MM-DD
 DATA_INGESTION_DATA_SOURCE_URL = f"https://www.consumerfinance.gov/data-research/consumer-complaints/search/api/v1/" \
                       f"?date_received_max=<todate>&date_received_min=<fromdate>" \
-                      f"&field=all&format=json"
\ No newline at end of file
+                      f"&field=all&format=json"
+DATA_INGESTION_MAX_WORKERS = 4 # number of in-flight download requests
+DATA_INGESTION_REQUESTS_PER_SECOND = 2
+DATA_INGESTION_RATE_LIMIT_BURST = 4
+DATA_INGESTION_STREAM_CHUNK_SIZE = 64 * 1024 # bytes read from response at a time
+DATA_INGESTION_FAILED_RESPONSE_MAX_BYTES = 64 * 1024 # bytes of failed response kept for debugging
+DATA_INGESTION_INTERVAL_PLAN_FILE_NAME = "interval_plan.yaml"
+DATA_INGESTION_TARGET_INTERVAL_SIZE = 64 * 1024 * 1024 # bytes, larger intervals are split
+DATA_INGESTION_MIN_INTERVAL_RECORDS = 5000 # intervals having fewer records are merged
+DATA_INGESTION_DENSITY_WINDOW = 12 # number of recent intervals used to estimate volume per day
+DATA_INGESTION_CONNECT_TIMEOUT = 10 # seconds
+DATA_INGESTION_READ_TIMEOUT = 300 # seconds
+DATA_INGESTION_FEATURE_STORE_STAGING_DIR = "feature_store_staging"
+DATA_INGESTION_FEATURE_STORE_WRITE_MODE = "upsert" # upsert or append
+DATA_INGESTION_HTTP_CACHE_FILE_NAME = "http_cache.yaml"
+DATA_INGESTION_MANIFEST_FILE_NAME = "manifest.yaml"
+# dead letter replay keeps its own manifest so it is never resumed as a regular ingestion run
+DATA_INGESTION_REPLAY_MANIFEST_FILE_NAME = "replay_manifest.yaml"
+DATA_INGESTION_DEAD_LETTER_FILE_NAME = "dead_letter.yaml"
+DATA_INGESTION_RETRY_BASE_DELAY = 2 # seconds, doubled on every retry
+DATA_INGESTION_RETRY_MAX_DELAY = 300 # seconds
+# complaint store is mongodb, "local" keeps complaints in DATA_INGESTION_LOCAL_COMPLAINT_STORE_DIR instead
+DATA_INGESTION_COMPLAINT_STORE = "mongodb"
+DATA_INGESTION_LOCAL_COMPLAINT_STORE_DIR = "complaint_store"
+DATA_INGESTION_COMPLAINT_COLLECTION_NAME = "complaints"
+DATA_INGESTION_COMPLAINT_STORE_BATCH_SIZE = 1000 # documents per bulk write and per cursor batch
+DATA_INGESTION_MIRROR_TO_COMPLAINT_STORE = False # ingested complaints are also upserted into complaint store
+DATA_INGESTION_COMPLAINT_STORE_SYNC_MODE = "watermark" # watermark or change_stream
+DATA_INGESTION_COMPLAINT_STORE_SYNC_FILE_NAME = "complaint_store_sync.yaml"
+DATA_INGESTION_COMPLAINT_STORE_EXPORT_FILE_RECORDS = 100000 # records per exported json file
+# format of downloaded files: ndjson, ndjson_gzip, ndjson_zstd or arrow (zstd compressed arrow ipc stream)
+DATA_INGESTION_LANDING_FORMAT = "arrow"
+DATA_INGESTION_LANDING_STAGING_DIR = "landing_parquet" # zstd and arrow landing files staged as parquet for spark
+DATA_INGESTION_LANDING_COMPRESSION_LEVEL = 3
+DATA_INGESTION_LANDING_BATCH_RECORDS = 10000 # records per arrow record batch
+# engine converting landing files into feature store: auto, arrow (in process, no jvm) or spark
+DATA_INGESTION_CONVERSION_ENGINE = "auto"
+DATA_INGESTION_ARROW_ENGINE_MAX_INPUT_SIZE = 64 * 1024 * 1024 # bytes of landing files, larger inputs use spark
@@ -0,0 +1,19 @@
+DATA_TRANSFORMATION_DIR = "data_transformation"
+# fitted pipeline and transformed data are cached here across runs
+DATA_TRANSFORMATION_CACHE_DIR = "cache"
+DATA_TRANSFORMATION_CACHE_INDEX_FILE_NAME = "cache_index.yaml"
+DATA_TRANSFORMATION_PIPELINE_DIR = "transformation_pipeline"
+DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR = "transformed_data"
+DATA_TRANSFORMATION_NUM_FEATURES = 2 ** 16 # size of hashed narrative vector
+DATA_TRANSFORMATION_MIN_DOC_FREQ = 2
+# pipeline is fitted again when this fraction of partitions is new or changed
+DATA_TRANSFORMATION_REFIT_RATIO = 0.25
+DATA_TRANSFORMATION_TEXT_COLUMN = "complaint_what_happened"
+# pipeline fills missing narratives with empty text into <text column><suffix> before tokenizing
+DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX = "_filled"
+DATA_TRANSFORMATION_CATEGORICAL_COLUMNS = ["product", "sub_product", "issue", "sub_issue", "company",
+                                           "state", "submitted_via", "company_response",
+                                           "consumer_consent_provided", "tags"]
+# columns carried as they are into transformed data
+DATA_TRANSFORMATION_PASSTHROUGH_COLUMNS = ["complaint_id", "date_received", "consumer_disputed", "timely"]
+DATA_TRANSFORMATION_FEATURES_COLUMN = "features"
@@ -0,0 +1,52 @@
+DATA_VALIDATION_DIR = "data_validation"
+DATA_VALIDATION_REPORT_FILE_NAME = "report.yaml"
+DATA_VALIDATION_MAX_NULL_RATIO = 0.2 # allowed null ratio of mandatory columns
+DATA_VALIDATION_MAX_DOMAIN_VIOLATION_RATIO = 0.01 # allowed ratio of values outside known domain
+# fingerprints of partitions of last valid validation, fast mode validates only partitions changed since then
+DATA_VALIDATION_VALIDATED_PARTITIONS_FILE_NAME = "validated_partitions.yaml"
+DATA_VALIDATION_MANDATORY_COLUMNS = ["complaint_id", "date_received", "product", "company",
+                                     "company_response", "timely"]
+
+DATA_VALIDATION_PRODUCT_DOMAIN = [
+    "Bank account or service",
+    "Checking or savings account",
+    "Consumer Loan",
+    "Credit card",
+    "Credit card or prepaid card",
+    "Credit reporting",
+    "Credit reporting or other personal consumer reports",
+    "Credit reporting, credit repair services, or other personal consumer reports",
+    "Debt collection",
+    "Debt or credit management",
+    "Money transfer, virtual currency, or money service",
+    "Money transfers",
+    "Mortgage",
+    "Other financial service",
+    "Payday loan",
+    "Payday loan, title loan, or personal loan",
+    "Payday loan, title loan, personal loan, or advance loan",
+    "Prepaid card",
+    "Student loan",
+    "Vehicle loan or lease",
+    "Virtual currency",
+]
+
+DATA_VALIDATION_COMPANY_RESPONSE_DOMAIN = [
+    "Closed",
+    "Closed with explanation",
+    "Closed with monetary relief",
+    "Closed with non-monetary relief",
+    "Closed with relief",
+    "Closed without relief",
+    "In progress",
+    "Untimely response",
+]
+
+DATA_VALIDATION_STATE_DOMAIN = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS",
+    "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC",
+    "ND", "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+    # territories and military addresses
+    "AS", "GU", "MP", "PR", "VI", "UM", "FM", "MH", "PW", "AA", "AE", "AP",
+    "UNITED STATES MINOR OUTLYING ISLANDS",
+]
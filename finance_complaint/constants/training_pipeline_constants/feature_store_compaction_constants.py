@@ -0,0 +1,6 @@
+FEATURE_STORE_COMPACTION_TARGET_FILE_SIZE = 128 * 1024 * 1024 # bytes, partitions are rewritten into files of this size
+FEATURE_STORE_COMPACTION_ROW_GROUP_RECORDS = 100000 # records per parquet row group of compacted files
+# rows of compacted files are sorted by these columns so row group statistics of them are narrow
+FEATURE_STORE_COMPACTION_SORT_COLUMNS = ["date_received", "product"]
+FEATURE_STORE_COMPACTION_MAX_WORKERS = 2 # partitions compacted at a time, each one is held in memory
+FEATURE_STORE_COMPACTION_AFTER_INGESTION = False # feature store is compacted right after data ingestion
@@ -0,0 +1,6 @@
+METRICS_DIR = "metrics"
+# prometheus textfile rewritten after every stage, can be picked up by node exporter textfile collector
+METRICS_TEXTFILE_NAME = "finance_complaint.prom"
+METRICS_DOWNLOAD_BYTE_BUCKETS = (64 * 1024, 1024 ** 2, 8 * 1024 ** 2, 32 * 1024 ** 2, 64 * 1024 ** 2,
+                                 128 * 1024 ** 2, 256 * 1024 ** 2)
+METRICS_SPARK_JOB_SECOND_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
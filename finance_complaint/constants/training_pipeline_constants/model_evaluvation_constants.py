@@ -0,0 +1,5 @@
+MODEL_EVALUATION_DIR = "model_evaluation"
+MODEL_EVALUATION_REPORT_FILE_NAME = "evaluation_report.yaml"
+MODEL_EVALUATION_PREDICTION_CACHE_DIR = "prediction_cache"
+# minimum improvement in areaUnderROC for trained model to replace pushed model
+MODEL_EVALUATION_CHANGE_THRESHOLD = 0.002
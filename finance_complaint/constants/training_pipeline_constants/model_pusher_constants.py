@@ -0,0 +1,20 @@
+import os
+
+MODEL_PUSHER_DIR = "model_pusher"
+MODEL_PUSHER_SAVED_MODEL_DIR = "saved_models"
+MODEL_PUSHER_HASH_CACHE_FILE_NAME = "hash_cache.yaml"
+
+# "local" keeps pushed objects in MODEL_PUSHER_LOCAL_STORAGE_DIR, "s3" in MODEL_PUSHER_BUCKET_NAME
+MODEL_PUSHER_STORAGE_BACKEND = "local"
+MODEL_PUSHER_LOCAL_STORAGE_DIR = os.path.join(os.getcwd(), "artifact_storage")
+MODEL_PUSHER_BUCKET_NAME = "finance-complaint-artifacts"
+MODEL_PUSHER_REGION_NAME = "ap-south-1"
+MODEL_PUSHER_STORAGE_PREFIX = "finance-complaint"
+MODEL_PUSHER_MODEL_NAME = "model"
+MODEL_PUSHER_FEATURE_STORE_NAME = "feature_store"
+
+# multipart transfer of a single file
+MODEL_PUSHER_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MODEL_PUSHER_MAX_CONCURRENCY = 4
+# files transferred at the same time
+MODEL_PUSHER_MAX_WORKERS = 8
@@ -0,0 +1,23 @@
+MODEL_TRAINER_DIR = "model_trainer"
+MODEL_TRAINER_TRAINED_MODEL_DIR = "trained_model"
+MODEL_TRAINER_MODEL_NAME = "finance_estimator"
+MODEL_TRAINER_METRIC_REPORT_FILE_NAME = "metric_report.yaml"
+# finished cross validation folds are checkpointed here across runs
+MODEL_TRAINER_CHECKPOINT_DIR = "cv_checkpoint"
+# hold-out set is selected once, kept out of every training and scored by model evaluation
+MODEL_TRAINER_HOLDOUT_DIR = "holdout"
+# fraction of complaints of each label kept out of training for evaluation
+MODEL_TRAINER_HOLDOUT_RATIO = 0.05
+MODEL_TRAINER_TARGET_COLUMN = "consumer_disputed"
+MODEL_TRAINER_POSITIVE_LABEL = "Yes"
+MODEL_TRAINER_NEGATIVE_LABEL = "No"
+MODEL_TRAINER_LABEL_COLUMN = "label"
+MODEL_TRAINER_N_FOLDS = 3
+MODEL_TRAINER_PARALLELISM = 4 # number of fold/grid point models trained at same time
+MODEL_TRAINER_TEST_SIZE = 0.2
+MODEL_TRAINER_SEED = 42
+MODEL_TRAINER_MAX_ITER = 50
+MODEL_TRAINER_PARAM_GRID = {
+    "regParam": [0.0, 0.01, 0.1],
+    "elasticNetParam": [0.0, 0.5],
+}
@@ -0,0 +1,2 @@
+STAGE_SCHEDULER_CACHE_DIR = "stage_cache" # artifacts of successful stage runs keyed by stage fingerprint
+STAGE_SCHEDULER_MAX_WORKERS = 2 # stages whose dependencies are done run concurrently
@@ -0,0 +1,2 @@
+from finance_complaint.data_access.complaint_store import ComplaintStore, MongoComplaintStore, LocalComplaintStore, \
+    ChangeStreamNotSupported, get_complaint_store
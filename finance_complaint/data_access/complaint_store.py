@@ -0,0 +1,220 @@
+import json
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, List, Tuple
+
+from finance_complaint.constants.database_constants import DATABASE_NAME
+from finance_complaint.exception import FinanceException
+
+COMPLAINT_ID_KEY = "complaint_id"
+DATE_RECEIVED_KEY = "date_received"
+
+
+class ChangeStreamNotSupported(Exception):
+    pass
+
+
+class ComplaintStore(ABC):
+    """
+    Bulk read/write of complaint documents keyed by complaint_id.
+    Documents are written in batches of batch_size, never one at a time.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    @abstractmethod
+    def write_batch(self, documents: List[dict], upsert: bool) -> int:
+        pass
+
+    @abstractmethod
+    def find_after(self, watermark: str = None) -> Iterator[dict]:
+        """
+        Documents having date_received on or after watermark in date_received order, all if watermark is None
+        """
+        pass
+
+    def find_new(self, watermark: str = None, watermark_ids: Iterable[str] = None) -> Iterator[dict]:
+        """
+        Documents not exported yet by previous export up to watermark. Complaints of a day share
+        date_received, so documents at watermark are read again and only those whose complaint_id
+        is not in watermark_ids, exported at watermark before, are returned.
+        """
+        watermark_ids = set(watermark_ids or [])
+        for document in self.find_after(watermark):
+            if document.get(DATE_RECEIVED_KEY) == watermark and document[COMPLAINT_ID_KEY] in watermark_ids:
+                continue
+            yield document
+
+    def get_resume_token(self):
+        """
+        Position of change stream as of now, changes after it are returned by watch_changes
+        """
+        raise ChangeStreamNotSupported(f"{type(self).__name__} does not support change streams")
+
+    def watch_changes(self, resume_token) -> Tuple[List[dict], object]:
+        """
+        returns latest version of documents inserted or replaced after resume_token and new resume token
+        """
+        raise ChangeStreamNotSupported(f"{type(self).__name__} does not support change streams")
+
+    def save_documents(self, documents: Iterable[dict], upsert: bool = True) -> int:
+        """
+        upsert: if True documents replace stored document of same complaint_id,
+        else documents already stored are skipped
+        returns number of documents written
+        """
+        try:
+            n_written, batch = 0, []
+            for document in documents:
+                batch.append(document)
+                if len(batch) >= self.batch_size:
+                    n_written += self.write_batch(batch, upsert)
+                    batch = []
+            if len(batch) > 0:
+                n_written += self.write_batch(batch, upsert)
+            return n_written
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+class MongoComplaintStore(ComplaintStore):
+    """
+    Complaint collection in mongodb accessed through shared MongodbClient.
+    complaint_id is unique indexed for upserts and date_received is indexed for watermark reads.
+    """
+
+    _indexed_collections = set()
+
+    def __init__(self, collection_name: str, batch_size: int, database_name: str = DATABASE_NAME):
+        try:
+            super().__init__(batch_size=batch_size)
+            from finance_complaint.configs.mongo_client import MongodbClient
+            self.collection = MongodbClient(database_name=database_name).database[collection_name]
+            if (database_name, collection_name) not in MongoComplaintStore._indexed_collections:
+                self.collection.create_index(COMPLAINT_ID_KEY, unique=True)
+                self.collection.create_index(DATE_RECEIVED_KEY)
+                MongoComplaintStore._indexed_collections.add((database_name, collection_name))
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_batch(self, documents: List[dict], upsert: bool) -> int:
+        from pymongo import ReplaceOne
+        from pymongo.errors import BulkWriteError
+        if upsert:
+            # unordered so that server applies the whole batch without stopping at first error
+            result = self.collection.bulk_write([ReplaceOne({COMPLAINT_ID_KEY: document[COMPLAINT_ID_KEY]},
+                                                            document, upsert=True)
+                                                 for document in documents], ordered=False)
+            return result.upserted_count + result.modified_count
+        try:
+            return len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # duplicate complaint_id means document is already stored, anything else is an error
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details.get("nInserted", 0)
+
+    def find_after(self, watermark: str = None) -> Iterator[dict]:
+        query = {} if watermark is None else {DATE_RECEIVED_KEY: {"$gte": watermark}}
+        return self.collection.find(query, {"_id": 0}) \
+            .sort(DATE_RECEIVED_KEY, 1) \
+            .batch_size(self.batch_size)
+
+    def _watch(self, resume_token=None, max_await_time_ms: int = 1000):
+        from pymongo.errors import OperationFailure
+        try:
+            return self.collection.watch(
+                pipeline=[{"$match": {"operationType": {"$in": ["insert", "replace", "update"]}}}],
+                full_document="updateLookup", resume_after=resume_token, max_await_time_ms=max_await_time_ms)
+        except OperationFailure as e:
+            # change streams are available only on replica sets and sharded clusters
+            raise ChangeStreamNotSupported(str(e))
+
+    def get_resume_token(self):
+        with self._watch() as change_stream:
+            change_stream.try_next()
+            return change_stream.resume_token
+
+    def watch_changes(self, resume_token) -> Tuple[List[dict], object]:
+        documents = {}
+        with self._watch(resume_token=resume_token) as change_stream:
+            while True:
+                change = change_stream.try_next()
+                if change is None:
+                    break
+                document = change.get("fullDocument")
+                if document is not None:
+                    document.pop("_id", None)
+                    documents[document[COMPLAINT_ID_KEY]] = document
+            return list(documents.values()), change_stream.resume_token
+
+
+class LocalComplaintStore(ComplaintStore):
+    """
+    Stands in for mongodb in tests and local runs. Every written batch is appended to a json lines
+    log with a single write, so spark workers of different processes can write concurrently.
+    Byte offset in the log is the resume token of its change stream.
+    """
+
+    LOG_FILE_NAME = "complaints.jsonl"
+
+    def __init__(self, store_dir: str, batch_size: int):
+        super().__init__(batch_size=batch_size)
+        self.store_dir = store_dir
+        self.log_file_path = os.path.join(store_dir, self.LOG_FILE_NAME)
+
+    def _read_log(self, offset: int = 0) -> Tuple[dict, int]:
+        documents = {}
+        if not os.path.exists(self.log_file_path):
+            return documents, offset
+        with open(self.log_file_path, "rb") as log_file:
+            log_file.seek(offset)
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    # batch being appended by another writer
+                    break
+                document = json.loads(line)
+                documents[document[COMPLAINT_ID_KEY]] = document
+                offset += len(line)
+        return documents, offset
+
+    def write_batch(self, documents: List[dict], upsert: bool) -> int:
+        if not upsert:
+            stored_documents, _ = self._read_log()
+            documents = [document for document in documents if document[COMPLAINT_ID_KEY] not in stored_documents]
+        if len(documents) == 0:
+            return 0
+        os.makedirs(self.store_dir, exist_ok=True)
+        data = "".join(json.dumps(document, default=str) + "\n" for document in documents).encode("utf-8")
+        file_descriptor = os.open(self.log_file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+        try:
+            os.write(file_descriptor, data)
+        finally:
+            os.close(file_descriptor)
+        return len(documents)
+
+    def find_after(self, watermark: str = None) -> Iterator[dict]:
+        documents, _ = self._read_log()
+        return iter(sorted((document for document in documents.values()
+                            if watermark is None or (document.get(DATE_RECEIVED_KEY) or "") >= watermark),
+                           key=lambda document: document.get(DATE_RECEIVED_KEY) or ""))
+
+    def get_resume_token(self) -> int:
+        return os.path.getsize(self.log_file_path) if os.path.exists(self.log_file_path) else 0
+
+    def watch_changes(self, resume_token: int) -> Tuple[List[dict], int]:
+        documents, offset = self._read_log(offset=resume_token)
+        return list(documents.values()), offset
+
+
+def get_complaint_store(store_type: str, collection_name: str, batch_size: int, local_store_dir: str) -> ComplaintStore:
+    """
+    store_type: mongodb or local, arguments are plain values so spark workers can build their own store
+    """
+    if store_type == "mongodb":
+        return MongoComplaintStore(collection_name=collection_name, batch_size=batch_size)
+    if store_type == "local":
+        return LocalComplaintStore(store_dir=os.path.join(local_store_dir, collection_name), batch_size=batch_size)
+    raise Exception(f"Unknown complaint store: {store_type}, expected one of [mongodb, local]")
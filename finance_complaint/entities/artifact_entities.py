@@ -5,4 +5,74 @@ from dataclasses import dataclass
 class DataIngestionArtifact:
     feature_store_file_path : str
     metadata_file_path : str
-    download_dir : str
\ No newline at end of file
+    download_dir : str
+    # stage duration, counter deltas and peak rss recorded by measure_stage
+    metrics : dict = None
+
+@dataclass
+class DataValidationArtifact:
+    accepted_file_path : str
+    report_file_path : str
+    is_valid : bool
+    metrics : dict = None
+
+@dataclass
+class DataTransformationArtifact:
+    transformed_file_path : str
+    transformation_pipeline_file_path : str
+    is_cache_hit : bool
+    metrics : dict = None
+
+@dataclass
+class ModelTrainerArtifact:
+    trained_model_file_path : str
+    metric_report_file_path : str
+    holdout_file_path : str
+    best_params : dict
+    cv_metric : float
+    test_metric : float
+    metrics : dict = None
+
+@dataclass
+class ModelEvaluationArtifact:
+    model_accepted : bool
+    changed_metric : float
+    trained_model_path : str
+    trained_model_metric : float
+    best_model_path : str
+    best_model_metric : float
+    report_file_path : str
+    metrics : dict = None
+
+@dataclass
+class ModelPusherArtifact:
+    model_pushed : bool
+    saved_model_path : str
+    model_manifest_key : str
+    feature_store_manifest_key : str
+    n_uploaded_file : int
+    n_uploaded_byte : int
+    metrics : dict = None
+
+@dataclass
+class BatchPredictionArtifact:
+    prediction_file_path : str
+    model_path : str
+    n_record : int
+    max_date_received : str
+    metrics : dict = None
+
+@dataclass
+class BenchmarkArtifact:
+    result_file_path : str
+    n_record : int
+    records_per_second : float
+    regressions : list
+
+@dataclass
+class FeatureStoreCompactionArtifact:
+    feature_store_file_path : str
+    compacted_partitions : list
+    n_file_before : int
+    n_file_after : int
+    metrics : dict = None
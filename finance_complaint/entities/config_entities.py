@@ -6,6 +6,12 @@ class TrainingPipelineConfig:
     pipeline_name : str
     artifact_dir : str
 
+@dataclass
+class StageSchedulerConfig:
+    cache_dir : str
+    timestamp : str
+    max_workers : int
+
 @dataclass
 class DataIngestionConfig:
     from_date : str
@@ -17,3 +23,155 @@ class DataIngestionConfig:
     failed_dir : str
     metadata_file_path : str
     data_source_url : str
+    max_workers : int
+    requests_per_second : float
+    rate_limit_burst : int
+    interval_plan_file_path : str
+    target_interval_size : int
+    min_interval_records : int
+    connect_timeout : float
+    read_timeout : float
+    feature_store_staging_dir : str
+    feature_store_write_mode : str
+    http_cache_file_path : str
+    manifest_file_path : str
+    dead_letter_file_path : str
+    retry_base_delay : float
+    retry_max_delay : float
+    complaint_store : str
+    local_complaint_store_dir : str
+    complaint_collection_name : str
+    complaint_store_batch_size : int
+    mirror_to_complaint_store : bool
+    complaint_store_sync_mode : str
+    complaint_store_sync_file_path : str
+    complaint_store_export_file_records : int
+    landing_format : str
+    landing_staging_dir : str
+    landing_compression_level : int
+    landing_batch_records : int
+    conversion_engine : str
+    arrow_engine_max_input_size : int
+
+@dataclass
+class DataValidationConfig:
+    data_validation_dir : str
+    report_file_path : str
+    mandatory_columns : list
+    max_null_ratio : float
+    max_domain_violation_ratio : float
+    min_date : str
+    max_date : str
+    fast_mode : bool
+    validated_partitions_file_path : str
+
+@dataclass
+class DataTransformationConfig:
+    data_transformation_dir : str
+    cache_dir : str
+    num_features : int
+    min_doc_freq : int
+    refit_ratio : float
+    text_column : str
+    categorical_columns : list
+    passthrough_columns : list
+    features_column : str
+
+@dataclass
+class ModelTrainerConfig:
+    model_trainer_dir : str
+    trained_model_file_path : str
+    metric_report_file_path : str
+    checkpoint_dir : str
+    holdout_file_path : str
+    holdout_ratio : float
+    target_column : str
+    positive_label : str
+    negative_label : str
+    label_column : str
+    n_folds : int
+    parallelism : int
+    test_size : float
+    seed : int
+    max_iter : int
+    param_grid : dict
+
+@dataclass
+class ModelEvaluationConfig:
+    model_evaluation_dir : str
+    report_file_path : str
+    prediction_cache_dir : str
+    saved_model_dir : str
+    change_threshold : float
+
+@dataclass
+class ModelPusherConfig:
+    model_pusher_dir : str
+    saved_model_dir : str
+    hash_cache_file_path : str
+    storage_backend : str
+    local_storage_dir : str
+    bucket_name : str
+    region_name : str
+    storage_prefix : str
+    model_name : str
+    feature_store_name : str
+    multipart_chunksize : int
+    max_concurrency : int
+    max_workers : int
+
+@dataclass
+class BatchPredictionConfig:
+    batch_prediction_dir : str
+    feature_store_file_path : str
+    data_ingestion_metadata_file_path : str
+    saved_model_dir : str
+    prediction_file_path : str
+    metadata_file_path : str
+    output_columns : list
+    prediction_column : str
+    probability_column : str
+    positive_label : str
+    negative_label : str
+    write_to_mongodb : bool
+    collection_name : str
+    mongodb_batch_size : int
+
+@dataclass
+class OnlineScoringConfig:
+    saved_model_dir : str
+    scorer_dir_name : str
+    host : str
+    port : int
+    max_batch_size : int
+    max_wait_ms : float
+    request_timeout : float
+
+@dataclass
+class BenchmarkConfig:
+    benchmark_dir : str
+    run_dir : str
+    result_dir : str
+    from_date : str
+    to_date : str
+    records_per_day : int
+    narrative_words : int
+    latency_ms : float
+    throttle_ratio : float
+    malformed_ratio : float
+    retry_after : float
+    retry_base_delay : float
+    retry_max_delay : float
+    requests_per_second : float
+    seed : int
+    n_baseline_run : int
+    regression_tolerance : float
+
+@dataclass
+class FeatureStoreCompactionConfig:
+    feature_store_file_path : str
+    target_file_size : int
+    row_group_records : int
+    sort_columns : list
+    max_workers : int
+    compact_after_ingestion : bool
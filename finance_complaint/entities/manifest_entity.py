@@ -0,0 +1,176 @@
+import hashlib
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import write_yaml_file, read_yaml_file
+
+INTERVAL_STATE_PENDING = "pending"
+INTERVAL_STATE_DOWNLOADED = "downloaded"
+INTERVAL_STATE_CONVERTED = "converted"
+# retries are used up, interval is owned by dead letter queue from now on and never resumed
+INTERVAL_STATE_FAILED = "failed"
+
+MANIFEST_STATUS_RUNNING = "running"
+MANIFEST_STATUS_INCOMPLETE = "incomplete"
+MANIFEST_STATUS_COMPLETED = "completed"
+
+
+@dataclass
+class IntervalManifest:
+    from_date: str
+    to_date: str
+    state: str
+    file_path: str = None
+    n_byte: int = 0
+    checksum: str = None
+
+
+def get_file_checksum(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class DataIngestionManifest:
+    """
+    Per run record of every interval's state so that a failed run can be resumed
+    from where it stopped instead of downloading everything again.
+    """
+
+    def __init__(self, manifest_file_path: str):
+        self.manifest_file_path = manifest_file_path
+        self.from_date: str = None
+        self.to_date: str = None
+        self.status: str = None
+        self.intervals: Dict[Tuple[str, str], IntervalManifest] = {}
+        self._lock = threading.Lock()
+        if self.is_manifest_file_present:
+            manifest = read_yaml_file(self.manifest_file_path)
+            self.from_date = manifest["from_date"]
+            self.to_date = manifest["to_date"]
+            self.status = manifest["status"]
+            for interval in manifest.get("intervals", []):
+                interval = IntervalManifest(**interval)
+                self.intervals[(interval.from_date, interval.to_date)] = interval
+
+    @property
+    def is_manifest_file_present(self):
+        return os.path.exists(self.manifest_file_path)
+
+    def write_manifest(self):
+        try:
+            write_yaml_file(file_path=self.manifest_file_path,
+                            data={"from_date": self.from_date,
+                                  "to_date": self.to_date,
+                                  "status": self.status,
+                                  "intervals": [interval.__dict__ for interval in
+                                                sorted(self.intervals.values(), key=lambda x: x.from_date)]})
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def start(self, from_date: str, to_date: str, intervals: List[Tuple[str, str]]):
+        with self._lock:
+            self.from_date = from_date
+            self.to_date = to_date
+            self.status = MANIFEST_STATUS_RUNNING
+            for interval in intervals:
+                if interval not in self.intervals:
+                    self.intervals[interval] = IntervalManifest(from_date=interval[0], to_date=interval[1],
+                                                                state=INTERVAL_STATE_PENDING)
+            self.write_manifest()
+
+    def get_intervals(self, state: str) -> List[IntervalManifest]:
+        return sorted([interval for interval in self.intervals.values() if interval.state == state],
+                      key=lambda x: x.from_date)
+
+    def is_interval_downloaded(self, interval: IntervalManifest) -> bool:
+        """
+        Downloaded file is trusted only if it still has recorded size and checksum
+        """
+        if interval.state != INTERVAL_STATE_DOWNLOADED or interval.file_path is None:
+            return False
+        if not os.path.exists(interval.file_path) or os.path.getsize(interval.file_path) != interval.n_byte:
+            return False
+        return get_file_checksum(interval.file_path) == interval.checksum
+
+    def mark_downloaded(self, from_date: str, to_date: str, file_path: str, n_byte: int, checksum: str):
+        with self._lock:
+            self.intervals[(from_date, to_date)] = IntervalManifest(from_date=from_date, to_date=to_date,
+                                                                    state=INTERVAL_STATE_DOWNLOADED,
+                                                                    file_path=file_path, n_byte=n_byte,
+                                                                    checksum=checksum)
+            self.write_manifest()
+
+    def mark_pending(self, from_date: str, to_date: str):
+        with self._lock:
+            self.intervals[(from_date, to_date)] = IntervalManifest(from_date=from_date, to_date=to_date,
+                                                                    state=INTERVAL_STATE_PENDING)
+            self.write_manifest()
+
+    def mark_not_modified(self, from_date: str, to_date: str):
+        """
+        Interval answered with 304 is already in feature store
+        """
+        with self._lock:
+            self.intervals[(from_date, to_date)] = IntervalManifest(from_date=from_date, to_date=to_date,
+                                                                    state=INTERVAL_STATE_CONVERTED)
+            self.write_manifest()
+
+    def mark_failed(self, from_date: str, to_date: str):
+        """
+        Interval moved into dead letter queue, it is replayed from there and not by resuming this run
+        """
+        with self._lock:
+            self.intervals[(from_date, to_date)] = IntervalManifest(from_date=from_date, to_date=to_date,
+                                                                    state=INTERVAL_STATE_FAILED)
+            self.write_manifest()
+
+    def mark_split(self, from_date: str, to_date: str, sub_intervals: List[Tuple[str, str]]):
+        with self._lock:
+            self.intervals.pop((from_date, to_date), None)
+            for interval in sub_intervals:
+                self.intervals[interval] = IntervalManifest(from_date=interval[0], to_date=interval[1],
+                                                            state=INTERVAL_STATE_PENDING)
+            self.write_manifest()
+
+    def mark_converted(self):
+        """
+        All downloaded intervals have reached feature store.
+        Run is completed only if no interval is left pending, failed intervals do not keep it open.
+        """
+        with self._lock:
+            for interval in self.intervals.values():
+                if interval.state == INTERVAL_STATE_DOWNLOADED:
+                    interval.state = INTERVAL_STATE_CONVERTED
+            has_pending = any(interval.state == INTERVAL_STATE_PENDING for interval in self.intervals.values())
+            self.status = MANIFEST_STATUS_INCOMPLETE if has_pending else MANIFEST_STATUS_COMPLETED
+            self.write_manifest()
+
+    @staticmethod
+    def find_resumable_manifest(data_ingestion_master_dir: str, manifest_file_name: str,
+                                exclude_dir: str = None) -> str:
+        """
+        returns manifest file path of latest run if it crashed or was interrupted i.e. it is still running,
+        None if there is no such run
+        """
+        if not os.path.exists(data_ingestion_master_dir):
+            return None
+        # run directories are named by timestamp so latest run is last in sorted order
+        for run_dir_name in sorted(os.listdir(data_ingestion_master_dir), reverse=True):
+            run_dir = os.path.join(data_ingestion_master_dir, run_dir_name)
+            manifest_file_path = os.path.join(run_dir, manifest_file_name)
+            if run_dir == exclude_dir or not os.path.exists(manifest_file_path):
+                continue
+            status = (read_yaml_file(manifest_file_path) or {}).get("status")
+            if status != MANIFEST_STATUS_RUNNING:
+                return None
+            logger.info(f"Found resumable run with status {status}: {run_dir}")
+            return manifest_file_path
+        return None
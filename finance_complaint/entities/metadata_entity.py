@@ -1,6 +1,8 @@
 import os, sys
+import threading
 from finance_complaint.exception import FinanceException
 from dataclasses import dataclass
+from typing import List
 from finance_complaint.utils import write_yaml_file, read_yaml_file
 from finance_complaint.logger import logger
 
@@ -9,6 +11,8 @@ class DataIngestionMetaDataInfo:
     from_date:str
     to_date:str
     data_file_path:str
+    # "<year>-<month>" -> {"max_date_received": str, "n_record": int}
+    partition_watermarks:dict = None
 
 class DataIngestionMetadata:
 
@@ -19,12 +23,22 @@ class DataIngestionMetadata:
     def is_metadata_file_present(self):
         return os.path.exists(self.metadata_file_path)
 
-    def write_metadata_info(self, from_date:str, to_date:str, data_file_path:str):
+    def write_metadata_info(self, from_date:str, to_date:str, data_file_path:str,
+                            partition_watermarks:dict = None):
+        """
+        partition_watermarks: watermarks of partitions touched by this run,
+        they are merged into watermarks of previous runs
+        """
         try:
+            all_partition_watermarks = {}
+            if self.is_metadata_file_present:
+                all_partition_watermarks.update(self.get_metadata_info().partition_watermarks or {})
+            all_partition_watermarks.update(partition_watermarks or {})
             metadata_info = DataIngestionMetaDataInfo(
                 from_date=from_date,
                 to_date=to_date,
-                data_file_path=data_file_path
+                data_file_path=data_file_path,
+                partition_watermarks=all_partition_watermarks
             )
 
             write_yaml_file(file_path=self.metadata_file_path,
@@ -42,4 +56,215 @@ class DataIngestionMetadata:
             else:
                 raise Exception("No meta data file available")
         except Exception as e:
-            raise FinanceException(e, sys)
\ No newline at end of file
+            raise FinanceException(e, sys)
+
+
+@dataclass
+class IntervalStat:
+    from_date:str
+    to_date:str
+    n_record:int
+    n_byte:int
+
+
+class DataIngestionIntervalPlan:
+    """
+    Keeps observed volume of each downloaded interval so that next run
+    can start from a partitioning that matches the actual data volume
+    """
+
+    def __init__(self, interval_plan_file_path):
+        self.interval_plan_file_path = interval_plan_file_path
+
+    @property
+    def is_interval_plan_file_present(self):
+        return os.path.exists(self.interval_plan_file_path)
+
+    def get_interval_stats(self) -> List[IntervalStat]:
+        try:
+            if not self.is_interval_plan_file_present:
+                return []
+            interval_plan = read_yaml_file(self.interval_plan_file_path) or {}
+            interval_stats = [IntervalStat(**stat) for stat in interval_plan.get("intervals", [])]
+            return sorted(interval_stats, key=lambda stat: stat.from_date)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_interval_stats(self, interval_stats: List[IntervalStat]):
+        """
+        Newly observed intervals replace previously persisted intervals they overlap with
+        """
+        try:
+            existing_stats = [stat for stat in self.get_interval_stats()
+                              if not any(stat.from_date < new_stat.to_date and new_stat.from_date < stat.to_date
+                                         for new_stat in interval_stats)]
+            all_stats = sorted(existing_stats + list(interval_stats), key=lambda stat: stat.from_date)
+            write_yaml_file(file_path=self.interval_plan_file_path,
+                            data={"intervals": [stat.__dict__ for stat in all_stats]})
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+class DataIngestionHttpCache:
+    """
+    Keeps ETag/Last-Modified of every downloaded interval url so that
+    unchanged intervals are answered with 304 and never downloaded again.
+    Validators are buffered in memory and written only once downloaded data
+    has reached feature store, so a failed run never marks an interval as done.
+    """
+
+    def __init__(self, http_cache_file_path):
+        self.http_cache_file_path = http_cache_file_path
+        self.validators = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.http_cache_file_path):
+            self.validators = read_yaml_file(self.http_cache_file_path) or {}
+        self.new_validators = {}
+
+    def get_validators(self, url:str) -> dict:
+        return self.validators.get(url, {})
+
+    def set_validators(self, url:str, etag:str = None, last_modified:str = None):
+        if etag is None and last_modified is None:
+            return
+        with self._lock:
+            self.new_validators[url] = {"etag": etag, "last_modified": last_modified}
+
+    def write_http_cache(self):
+        try:
+            with self._lock:
+                self.validators.update(self.new_validators)
+                self.new_validators = {}
+                write_yaml_file(file_path=self.http_cache_file_path, data=self.validators)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+@dataclass
+class DeadLetter:
+    url:str
+    from_date:str
+    to_date:str
+    error:str
+    failed_at:str
+
+
+class DataIngestionDeadLetterQueue:
+    """
+    Intervals that could not be downloaded after all retries.
+    Every failure is written immediately so it survives process exit and can be replayed later.
+    """
+
+    def __init__(self, dead_letter_file_path):
+        self.dead_letter_file_path = dead_letter_file_path
+        self._lock = threading.Lock()
+
+    @property
+    def is_dead_letter_file_present(self):
+        return os.path.exists(self.dead_letter_file_path)
+
+    def get_dead_letters(self) -> List[DeadLetter]:
+        try:
+            if not self.is_dead_letter_file_present:
+                return []
+            dead_letters = read_yaml_file(self.dead_letter_file_path) or {}
+            return [DeadLetter(**dead_letter) for dead_letter in dead_letters.get("dead_letters", [])]
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def _write_dead_letters(self, dead_letters: List[DeadLetter]):
+        write_yaml_file(file_path=self.dead_letter_file_path,
+                        data={"dead_letters": [dead_letter.__dict__ for dead_letter in dead_letters]})
+
+    def add_dead_letter(self, dead_letter: DeadLetter):
+        """
+        Dead letter of same url is replaced
+        """
+        try:
+            with self._lock:
+                dead_letters = [existing for existing in self.get_dead_letters() if existing.url != dead_letter.url]
+                dead_letters.append(dead_letter)
+                self._write_dead_letters(dead_letters)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def remove_dead_letters(self, urls: List[str]):
+        try:
+            with self._lock:
+                urls = set(urls)
+                self._write_dead_letters([dead_letter for dead_letter in self.get_dead_letters()
+                                          if dead_letter.url not in urls])
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+class BatchPredictionMetadata:
+    """
+    Keeps number of records of every feature store partition as of last prediction run,
+    so next run reads only partitions complaints have reached since then, whatever their date_received.
+    Max date_received of predicted complaints is kept for reporting only.
+    """
+
+    def __init__(self, metadata_file_path):
+        self.metadata_file_path = metadata_file_path
+
+    @property
+    def is_metadata_file_present(self):
+        return os.path.exists(self.metadata_file_path)
+
+    def get_watermark(self) -> str:
+        try:
+            if not self.is_metadata_file_present:
+                return None
+            return (read_yaml_file(self.metadata_file_path) or {}).get("max_date_received")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_partition_records(self) -> dict:
+        """
+        returns relative partition directory -> number of records, empty if nothing was predicted yet
+        """
+        try:
+            if not self.is_metadata_file_present:
+                return {}
+            return (read_yaml_file(self.metadata_file_path) or {}).get("partition_records") or {}
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_watermark(self, max_date_received: str, model_path: str, n_record: int, partition_records: dict):
+        try:
+            write_yaml_file(file_path=self.metadata_file_path,
+                            data={"max_date_received": max_date_received,
+                                  "model_path": model_path,
+                                  "n_record": n_record,
+                                  "partition_records": partition_records})
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+
+class ComplaintStoreSyncMetadata:
+    """
+    Position up to which complaint store has been exported into feature store,
+    max date_received along with complaint_ids exported at it for watermark sync
+    and resume token for change stream sync
+    """
+
+    def __init__(self, sync_file_path):
+        self.sync_file_path = sync_file_path
+
+    def get_sync_state(self) -> dict:
+        try:
+            sync_state = {"watermark": None, "watermark_ids": [], "resume_token": None}
+            if os.path.exists(self.sync_file_path):
+                sync_state.update(read_yaml_file(self.sync_file_path) or {})
+            return sync_state
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def write_sync_state(self, watermark: str, watermark_ids: list = None, resume_token=None):
+        try:
+            write_yaml_file(file_path=self.sync_file_path,
+                            data={"watermark": watermark, "watermark_ids": sorted(watermark_ids or []),
+                                  "resume_token": resume_token})
+        except Exception as e:
+            raise FinanceException(e, sys)
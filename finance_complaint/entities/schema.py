@@ -0,0 +1,119 @@
+from typing import List, Tuple
+
+import pyarrow as pa
+from pyspark.sql import Column, DataFrame
+from pyspark.sql import Window
+from pyspark.sql import functions as F
+from pyspark.sql.types import BooleanType, IntegerType, StringType, StructField, StructType
+
+
+class FinanceDataSchema:
+    """
+    Fixed schema of complaint records downloaded from CFPB api so that every
+    downloaded file is read with same column types instead of inferring them per file
+    """
+
+    def __init__(self):
+        self.col_complaint_id: str = "complaint_id"
+        self.col_date_received: str = "date_received"
+        self.col_date_sent_to_company: str = "date_sent_to_company"
+        self.col_product: str = "product"
+        self.col_sub_product: str = "sub_product"
+        self.col_issue: str = "issue"
+        self.col_sub_issue: str = "sub_issue"
+        self.col_complaint_what_happened: str = "complaint_what_happened"
+        self.col_company: str = "company"
+        self.col_company_response: str = "company_response"
+        self.col_company_public_response: str = "company_public_response"
+        self.col_consumer_consent_provided: str = "consumer_consent_provided"
+        self.col_consumer_disputed: str = "consumer_disputed"
+        self.col_submitted_via: str = "submitted_via"
+        self.col_state: str = "state"
+        self.col_zip_code: str = "zip_code"
+        self.col_tags: str = "tags"
+        self.col_timely: str = "timely"
+        self.col_has_narrative: str = "has_narrative"
+
+        # partition columns derived from date_received
+        self.col_year: str = "date_received_year"
+        self.col_month: str = "date_received_month"
+
+    @property
+    def dataframe_schema(self) -> StructType:
+        string_columns = [
+            self.col_complaint_id,
+            self.col_date_received,
+            self.col_date_sent_to_company,
+            self.col_product,
+            self.col_sub_product,
+            self.col_issue,
+            self.col_sub_issue,
+            self.col_complaint_what_happened,
+            self.col_company,
+            self.col_company_response,
+            self.col_company_public_response,
+            self.col_consumer_consent_provided,
+            self.col_consumer_disputed,
+            self.col_submitted_via,
+            self.col_state,
+            self.col_zip_code,
+            self.col_tags,
+            self.col_timely,
+        ]
+        fields = [StructField(column, StringType(), True) for column in string_columns]
+        fields.append(StructField(self.col_has_narrative, BooleanType(), True))
+        return StructType(fields)
+
+    @property
+    def arrow_schema(self) -> pa.Schema:
+        """
+        Same columns and types as dataframe_schema, used for arrow and zstd landing files
+        """
+        arrow_types = {StringType(): pa.string(), BooleanType(): pa.bool_()}
+        return pa.schema([pa.field(field.name, arrow_types[field.dataType], nullable=True)
+                          for field in self.dataframe_schema.fields])
+
+    @property
+    def partition_columns(self) -> List[str]:
+        return [self.col_year, self.col_month]
+
+    def add_partition_columns(self, dataframe: DataFrame) -> DataFrame:
+        """
+        date_received is an iso formatted string e.g. 2012-05-01T12:00:00-05:00
+        """
+        return dataframe.withColumn(self.col_year,
+                                    F.substring(self.col_date_received, 1, 4).cast(IntegerType())) \
+            .withColumn(self.col_month,
+                        F.substring(self.col_date_received, 6, 2).cast(IntegerType()))
+
+    def get_partition_filter(self, partitions: List[Tuple[int, int]]) -> Column:
+        """
+        partitions: list of (year, month)
+        returns condition selecting only given year/month partitions so spark prunes the rest
+        """
+        partition_filter = None
+        for year, month in partitions:
+            condition = (F.col(self.col_year) == year) & (F.col(self.col_month) == month)
+            partition_filter = condition if partition_filter is None else partition_filter | condition
+        return partition_filter
+
+    def parse_partition_path(self, partition_path: str) -> Tuple[int, int]:
+        """
+        partition_path: relative partition directory e.g. date_received_year=2012/date_received_month=5
+        returns (year, month)
+        """
+        values = dict(part.split("=", 1) for part in partition_path.replace("\\", "/").split("/"))
+        return int(values[self.col_year]), int(values[self.col_month])
+
+    def select_holdout(self, dataframe: DataFrame, holdout_ratio: float, label_column: str) -> DataFrame:
+        """
+        Selects exactly holdout_ratio (rounded) of records of every label. Records of a label are
+        ranked by hash of complaint_id, so same records are selected whatever the partitioning is.
+        """
+        rank_column, count_column = "_holdout_rank", "_holdout_count"
+        order_window = Window.partitionBy(label_column) \
+            .orderBy(F.xxhash64(F.col(self.col_complaint_id)), F.col(self.col_complaint_id))
+        return dataframe.withColumn(rank_column, F.row_number().over(order_window)) \
+            .withColumn(count_column, F.count(F.lit(1)).over(Window.partitionBy(label_column))) \
+            .filter(F.col(rank_column) <= F.round(F.col(count_column) * holdout_ratio)) \
+            .drop(rank_column, count_column)
@@ -0,0 +1,5 @@
+from finance_complaint.feature_store.conversion_engine import ConversionEngine, ArrowConversionEngine, \
+    SparkConversionEngine, get_conversion_engine, select_conversion_engine
+from finance_complaint.feature_store.feature_store_index import FeatureStoreIndex
+from finance_complaint.feature_store.feature_store_reader import FeatureStoreFilter, FeatureStoreReader
+from finance_complaint.feature_store.compaction import FeatureStoreCompaction
@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from finance_complaint.entities.artifact_entities import FeatureStoreCompactionArtifact
+from finance_complaint.entities.config_entities import FeatureStoreCompactionConfig
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.exception import FinanceException
+from finance_complaint.feature_store.conversion_engine import ArrowConversionEngine
+from finance_complaint.feature_store.feature_store_index import FeatureStoreIndex
+from finance_complaint.logger import logger, span
+from finance_complaint.utils import replace_dir
+
+# key of parquet key-value metadata where a compacted file records columns its rows are sorted by,
+# sorting_columns of row groups would need pyarrow 15 and above
+SORT_COLUMNS_METADATA_KEY = b"finance_complaint.sort_columns"
+
+
+class FeatureStoreCompaction:
+    """
+    Rewrites feature store partitions made of many small files into files of target size whose rows are
+    sorted by sort columns, so spark lists and schedules few files and row group statistics of
+    date_received and product are narrow enough to skip row groups.
+
+    A partition is compacted when more than one of its files is smaller than target size or when any of
+    its files is not sorted by sort columns, a sorted file records its sort order in key-value metadata
+    of parquet footer.
+    Compacted partition is written into a hidden directory and swapped into place with replace_dir,
+    it is skipped if a writer has changed the partition meanwhile.
+    """
+
+    def __init__(self, feature_store_compaction_config: FeatureStoreCompactionConfig):
+        try:
+            logger.info(f"{'>>' * 20}Starting feature store compaction.{'<<' * 20}")
+            self.feature_store_compaction_config = feature_store_compaction_config
+            self.schema = FinanceDataSchema()
+            self.index = FeatureStoreIndex(file_path=feature_store_compaction_config.feature_store_file_path,
+                                           schema=self.schema)
+            # reads partitions written by any engine and writes files named the same way
+            self.engine = ArrowConversionEngine(schema=self.schema,
+                                                max_workers=feature_store_compaction_config.max_workers)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    @property
+    def sort_keys(self) -> List[Tuple[str, str]]:
+        return [(column, "ascending") for column in self.feature_store_compaction_config.sort_columns]
+
+    @property
+    def sort_columns_metadata(self) -> bytes:
+        return json.dumps(self.feature_store_compaction_config.sort_columns).encode("utf-8")
+
+    def is_sorted(self, data_file_path: str) -> bool:
+        key_value_metadata = pq.read_metadata(data_file_path).metadata or {}
+        return key_value_metadata.get(SORT_COLUMNS_METADATA_KEY) == self.sort_columns_metadata
+
+    def needs_compaction(self, files: List[Tuple[str, int]]) -> bool:
+        # last file of a compacted partition holds the remainder and is usually smaller than target size
+        n_small_file = sum(1 for _, size in files if size < self.feature_store_compaction_config.target_file_size)
+        if n_small_file > 1:
+            return True
+        file_path = self.feature_store_compaction_config.feature_store_file_path
+        return not all(self.is_sorted(os.path.join(file_path, relative_file_path))
+                       for relative_file_path, _ in files)
+
+    def write_sorted_files(self, table: pa.Table, dir_path: str) -> int:
+        """
+        Writes table row group by row group, a new file is started once current one reaches target size
+        returns number of files written
+        """
+        config = self.feature_store_compaction_config
+        # arrow schema metadata is written into key-value metadata of every file
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               SORT_COLUMNS_METADATA_KEY: self.sort_columns_metadata})
+        os.makedirs(dir_path, exist_ok=True)
+        n_file, sink, writer = 0, None, None
+        for offset in range(0, max(table.num_rows, 1), config.row_group_records):
+            if writer is None:
+                data_file_path = os.path.join(dir_path, self.engine.get_data_file_name(part=n_file))
+                sink = pa.OSFile(data_file_path, "wb")
+                writer = pq.ParquetWriter(sink, table.schema, compression="snappy")
+                n_file += 1
+            writer.write_table(table.slice(offset, config.row_group_records), row_group_size=config.row_group_records)
+            if sink.tell() >= config.target_file_size:
+                writer.close()
+                sink.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+            sink.close()
+        return n_file
+
+    def compact_partition(self, partition_dir: str, files: List[Tuple[str, int]]) -> int:
+        """
+        returns number of files partition is rewritten into, 0 if partition changed while it was compacted
+        """
+        config = self.feature_store_compaction_config
+        absolute_partition_dir = os.path.join(config.feature_store_file_path, partition_dir)
+        new_dir = self.engine.get_new_partition_dir(absolute_partition_dir)
+        with span("feature_store.compact_partition", partition=partition_dir, n_file=len(files)) as span_attributes:
+            try:
+                table = self.engine.read_partition(absolute_partition_dir).sort_by(self.sort_keys)
+                # new directory is hidden so its files are written in place without temporary names
+                n_output_file = self.write_sorted_files(table, new_dir)
+                # records written after partition was read would be lost by swap
+                if self.index.list_files(partition_dir) != files:
+                    logger.warning(f"Partition {partition_dir} changed while it was compacted, it is skipped")
+                    return 0
+                replace_dir(new_dir, absolute_partition_dir)
+                span_attributes.update(n_record=table.num_rows, n_output_file=n_output_file)
+                return n_output_file
+            finally:
+                shutil.rmtree(new_dir, ignore_errors=True)
+
+    def initiate_compaction(self) -> FeatureStoreCompactionArtifact:
+        try:
+            config = self.feature_store_compaction_config
+            partition_files = {partition_dir: self.index.list_files(partition_dir)
+                               for partition_dir in self.index.list_partition_dirs()}
+            n_file_before = sum(len(files) for files in partition_files.values())
+            partitions = [(partition_dir, files) for partition_dir, files in partition_files.items()
+                          if self.needs_compaction(files)]
+            logger.info(f"Compacting {len(partitions)} of {len(partition_files)} partitions "
+                        f"of feature store: {config.feature_store_file_path}")
+            with ThreadPoolExecutor(max_workers=config.max_workers) as executor:
+                n_output_files = list(executor.map(lambda partition: self.compact_partition(*partition), partitions))
+            compacted_partitions = [partition_dir for (partition_dir, _), n_output_file
+                                    in zip(partitions, n_output_files) if n_output_file > 0]
+            if len(compacted_partitions) > 0:
+                self.index.refresh()
+            n_file_after = sum(len(self.index.list_files(partition_dir))
+                               for partition_dir in self.index.list_partition_dirs())
+            artifact = FeatureStoreCompactionArtifact(feature_store_file_path=config.feature_store_file_path,
+                                                      compacted_partitions=compacted_partitions,
+                                                      n_file_before=n_file_before,
+                                                      n_file_after=n_file_after)
+            logger.info(f"Feature store compaction artifact: {artifact}")
+            return artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
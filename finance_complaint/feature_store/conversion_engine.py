@@ -0,0 +1,339 @@
+import functools
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.logger import logger
+from finance_complaint.utils import get_temp_file_path, replace_dir
+from finance_complaint.utils.landing_file import is_staged_landing_file, read_landing_file, stage_landing_file
+
+CONVERSION_ENGINE_AUTO = "auto"
+CONVERSION_ENGINE_ARROW = "arrow"
+CONVERSION_ENGINE_SPARK = "spark"
+
+FEATURE_STORE_WRITE_MODE_UPSERT = "upsert"
+FEATURE_STORE_WRITE_MODE_APPEND = "append"
+
+
+def get_input_size(file_paths: List[str]) -> int:
+    return sum(os.path.getsize(file_path) for file_path in file_paths)
+
+
+def get_partition_key(year: int, month: int) -> str:
+    return f"{year}-{month:02d}"
+
+
+class ConversionEngine(ABC):
+    """
+    Converts downloaded landing files into feature store, a parquet dataset partitioned by
+    year and month of date_received e.g. date_received_year=2012/date_received_month=5.
+    Every engine writes same columns, types and partition layout so runs of different
+    engines can write into same feature store and it is read the same way afterwards.
+
+    In upsert mode records are merged on complaint_id so re-running an interval is idempotent,
+    in append mode records are written as they are.
+    """
+    name: str = None
+
+    def __init__(self, schema: FinanceDataSchema, max_workers: int):
+        self.schema = schema
+        self.max_workers = max_workers
+        # records written into feature store by last conversion, None if engine did not count them
+        self.n_converted_record: int = None
+
+    @abstractmethod
+    def convert(self, file_paths: List[str], file_path: str, write_mode: str) -> dict:
+        """
+        file_paths: downloaded landing files of any landing format
+        file_path: feature store directory
+        returns watermark of each rewritten partition by partition key, empty in append mode
+        """
+        pass
+
+
+class SparkConversionEngine(ConversionEngine):
+    """
+    Converts landing files with spark, used for backfills whose input does not fit in memory of one process.
+    Spark is started only here and sized from amount of input data.
+    """
+    name = CONVERSION_ENGINE_SPARK
+
+    def __init__(self, schema: FinanceDataSchema, max_workers: int, landing_staging_dir: str,
+                 feature_store_staging_dir: str):
+        super().__init__(schema=schema, max_workers=max_workers)
+        self.landing_staging_dir = landing_staging_dir
+        self.feature_store_staging_dir = feature_store_staging_dir
+
+    def stage_landing_files(self, file_paths: List[str]) -> List[str]:
+        """
+        Zstd and arrow landing files are staged as parquet by a pool of workers,
+        pyarrow releases the gil so files are staged in parallel
+        returns staged parquet file paths
+        """
+        arrow_schema = self.schema.arrow_schema
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(
+                lambda file_path: stage_landing_file(
+                    file_path, os.path.join(self.landing_staging_dir, f"{os.path.basename(file_path)}.parquet"),
+                    arrow_schema),
+                file_paths))
+
+    def read_files(self, file_paths: List[str]) -> DataFrame:
+        """
+        All landing files are read in a single job with fixed schema.
+        Plain and gzip json lines are read by spark itself, zstd and arrow landing files are read from
+        their parquet copies, so files of every landing format can be converted together.
+        Empty files simply produce no rows so no separate count action is required.
+        Records without complaint_id or date_received can not be placed in feature store hence dropped.
+        """
+        spark_session = get_spark_session(input_size=get_input_size(file_paths))
+        json_file_paths = [file_path for file_path in file_paths if not is_staged_landing_file(file_path)]
+        staged_file_paths = self.stage_landing_files([file_path for file_path in file_paths
+                                                      if is_staged_landing_file(file_path)])
+        dataframes = []
+        if len(json_file_paths) > 0:
+            dataframes.append(spark_session.read.schema(self.schema.dataframe_schema).json(json_file_paths))
+        if len(staged_file_paths) > 0:
+            dataframes.append(spark_session.read.schema(self.schema.dataframe_schema).parquet(*staged_file_paths))
+        if len(dataframes) == 0:
+            df = spark_session.createDataFrame([], self.schema.dataframe_schema)
+        else:
+            df = functools.reduce(DataFrame.unionByName, dataframes)
+        df = df.filter(F.col(self.schema.col_complaint_id).isNotNull() &
+                       F.col(self.schema.col_date_received).isNotNull())
+        return self.schema.add_partition_columns(df)
+
+    def upsert(self, df: DataFrame, file_path: str) -> dict:
+        """
+        Upserts new records into feature store on complaint_id.
+        Only year/month partitions present in new records are read and rewritten,
+        rest of the feature store is untouched.
+        ======================================================================
+        returns watermark of each rewritten partition
+        """
+        partition_columns = self.schema.partition_columns
+        # overlapping intervals can download same complaint more than once
+        new_df = df.dropDuplicates([self.schema.col_complaint_id]).persist()
+        try:
+            touched_partitions = new_df.groupBy(*partition_columns).count().collect()
+            self.n_converted_record = sum(partition["count"] for partition in touched_partitions)
+            if len(touched_partitions) == 0:
+                return {}
+            logger.info(f"Upserting {len(touched_partitions)} partitions into feature store: {file_path}")
+
+            merged_df = new_df
+            if os.path.exists(file_path):
+                partition_filter = self.schema.get_partition_filter(
+                    [(partition[self.schema.col_year], partition[self.schema.col_month])
+                     for partition in touched_partitions])
+                existing_df = get_spark_session().read.parquet(file_path).filter(partition_filter)
+                # existing records replaced by newly downloaded version of same complaint
+                existing_df = existing_df.join(new_df.select(self.schema.col_complaint_id),
+                                               on=self.schema.col_complaint_id, how="left_anti")
+                merged_df = existing_df.unionByName(new_df)
+
+            # merged partitions are staged first as feature store can not be overwritten while it is read
+            merged_df.repartition(*partition_columns) \
+                .write.mode('overwrite') \
+                .partitionBy(*partition_columns) \
+                .parquet(self.feature_store_staging_dir)
+
+            staged_df = get_spark_session().read.parquet(self.feature_store_staging_dir)
+            staged_df.write.mode('overwrite') \
+                .option("partitionOverwriteMode", "dynamic") \
+                .partitionBy(*partition_columns) \
+                .parquet(file_path)
+
+            partition_watermarks = {}
+            for row in staged_df.groupBy(*partition_columns).agg(
+                    F.max(self.schema.col_date_received).alias("max_date_received"),
+                    F.count(F.lit(1)).alias("n_record")).collect():
+                partition_key = get_partition_key(row[self.schema.col_year], row[self.schema.col_month])
+                partition_watermarks[partition_key] = {"max_date_received": row["max_date_received"],
+                                                       "n_record": row["n_record"]}
+            return partition_watermarks
+        finally:
+            new_df.unpersist()
+
+    def convert(self, file_paths: List[str], file_path: str, write_mode: str) -> dict:
+        df = self.read_files(file_paths)
+        if write_mode == FEATURE_STORE_WRITE_MODE_UPSERT:
+            return self.upsert(df, file_path)
+        # one task per partition so each run adds one file per year/month
+        df.repartition(*self.schema.partition_columns) \
+            .write.mode('append') \
+            .partitionBy(*self.schema.partition_columns) \
+            .parquet(file_path)
+        # appended records are not counted as it would need another pass over input
+        self.n_converted_record = None
+        return {}
+
+
+class ArrowConversionEngine(ConversionEngine):
+    """
+    Converts landing files in process with pyarrow, no jvm is started. Meant for daily increments
+    which touch a handful of partitions: every touched partition is read, merged and written
+    as a single parquet file named and compressed the way spark names its output files.
+
+    A rewritten partition is written into a hidden directory next to it and swapped in with replace_dir,
+    so readers see either old or new partition and a crash leaves no partial partition behind.
+    """
+    name = CONVERSION_ENGINE_ARROW
+
+    def read_files(self, file_paths: List[str]) -> pa.Table:
+        """
+        returns records having complaint_id and date_received along with year and month partition columns
+        """
+        arrow_schema = self.schema.arrow_schema
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            tables = list(executor.map(lambda file_path: read_landing_file(file_path, arrow_schema), file_paths))
+        table = pa.concat_tables(tables) if len(tables) > 0 else arrow_schema.empty_table()
+        date_received = table[self.schema.col_date_received]
+        table = table.filter(pc.and_(pc.is_valid(table[self.schema.col_complaint_id]),
+                                     pc.is_valid(date_received)))
+        # spark would place a date_received it can not parse into a null partition, such records are dropped
+        is_iso_date = pc.match_substring_regex(table[self.schema.col_date_received], r"^\d{4}-\d{2}")
+        n_invalid = table.num_rows - pc.sum(is_iso_date).as_py() if table.num_rows > 0 else 0
+        if n_invalid > 0:
+            logger.warning(f"Dropped {n_invalid} records whose date_received is not an iso date")
+            table = table.filter(is_iso_date)
+        date_received = table[self.schema.col_date_received]
+        year = pc.cast(pc.utf8_slice_codeunits(date_received, 0, 4), pa.int32())
+        month = pc.cast(pc.utf8_slice_codeunits(date_received, 5, 7), pa.int32())
+        return table.append_column(self.schema.col_year, year).append_column(self.schema.col_month, month)
+
+    def drop_duplicates(self, table: pa.Table) -> pa.Table:
+        """
+        Keeps last downloaded version of every complaint
+        """
+        row_column = "__row"
+        table = table.append_column(row_column, pa.array(range(table.num_rows), pa.int64()))
+        last_rows = table.group_by(self.schema.col_complaint_id).aggregate([(row_column, "max")])
+        last_rows = last_rows[f"{row_column}_max"]
+        return table.take(pc.take(last_rows, pc.sort_indices(last_rows))).drop([row_column])
+
+    def get_partitions(self, table: pa.Table) -> Dict[Tuple[int, int], pa.Table]:
+        """
+        returns records of every year/month partition without partition columns
+        """
+        partitions = {}
+        keys = table.group_by(self.schema.partition_columns).aggregate([])
+        for year, month in zip(keys[self.schema.col_year].to_pylist(), keys[self.schema.col_month].to_pylist()):
+            condition = pc.and_(pc.equal(table[self.schema.col_year], year),
+                                pc.equal(table[self.schema.col_month], month))
+            partitions[(year, month)] = table.filter(condition).drop(self.schema.partition_columns)
+        return partitions
+
+    def get_partition_dir(self, file_path: str, year: int, month: int) -> str:
+        return os.path.join(file_path, f"{self.schema.col_year}={year}", f"{self.schema.col_month}={month}")
+
+    def read_partition(self, partition_dir: str) -> pa.Table:
+        """
+        Reads data files of a partition written by any engine, hidden and marker files are skipped like spark does
+        """
+        arrow_schema = self.schema.arrow_schema
+        tables = [pq.read_table(os.path.join(partition_dir, file_name), columns=arrow_schema.names).cast(arrow_schema)
+                  for file_name in sorted(os.listdir(partition_dir))
+                  if not file_name.startswith((".", "_")) and file_name.endswith(".parquet")]
+        return pa.concat_tables(tables) if len(tables) > 0 else arrow_schema.empty_table()
+
+    @staticmethod
+    def get_data_file_name(part: int = 0) -> str:
+        return f"part-{part:05d}-{uuid.uuid4()}.c000.snappy.parquet"
+
+    def write_data_file(self, table: pa.Table, dir_path: str) -> str:
+        os.makedirs(dir_path, exist_ok=True)
+        data_file_path = os.path.join(dir_path, self.get_data_file_name())
+        temp_file_path = get_temp_file_path(data_file_path)
+        pq.write_table(table, temp_file_path, compression="snappy")
+        os.replace(temp_file_path, data_file_path)
+        return data_file_path
+
+    @staticmethod
+    def get_new_partition_dir(partition_dir: str) -> str:
+        """
+        Hidden sibling of partition directory where its new version is written before swap
+        """
+        parent_dir, dir_name = os.path.split(partition_dir)
+        return os.path.join(parent_dir, f".{dir_name}.{uuid.uuid4().hex}.new")
+
+    def replace_partition(self, table: pa.Table, partition_dir: str):
+        """
+        Writes partition into a hidden directory and swaps it with existing partition
+        """
+        new_dir = self.get_new_partition_dir(partition_dir)
+        try:
+            self.write_data_file(table, new_dir)
+            replace_dir(new_dir, partition_dir)
+        finally:
+            shutil.rmtree(new_dir, ignore_errors=True)
+
+    def upsert(self, table: pa.Table, file_path: str) -> dict:
+        # overlapping intervals can download same complaint more than once
+        table = self.drop_duplicates(table)
+        self.n_converted_record = table.num_rows
+        partitions = self.get_partitions(table)
+        if len(partitions) > 0:
+            logger.info(f"Upserting {len(partitions)} partitions into feature store: {file_path}")
+        partition_watermarks = {}
+        for (year, month), new_table in partitions.items():
+            partition_dir = self.get_partition_dir(file_path, year, month)
+            merged_table = new_table
+            if os.path.exists(partition_dir):
+                existing_table = self.read_partition(partition_dir)
+                # existing records replaced by newly downloaded version of same complaint
+                is_replaced = pc.is_in(existing_table[self.schema.col_complaint_id],
+                                       value_set=new_table[self.schema.col_complaint_id])
+                merged_table = pa.concat_tables([existing_table.filter(pc.invert(is_replaced)), new_table])
+            self.replace_partition(merged_table, partition_dir)
+            partition_watermarks[get_partition_key(year, month)] = {
+                "max_date_received": pc.max(merged_table[self.schema.col_date_received]).as_py(),
+                "n_record": merged_table.num_rows}
+        return partition_watermarks
+
+    def convert(self, file_paths: List[str], file_path: str, write_mode: str) -> dict:
+        table = self.read_files(file_paths)
+        if write_mode == FEATURE_STORE_WRITE_MODE_UPSERT:
+            return self.upsert(table, file_path)
+        for (year, month), partition_table in self.get_partitions(table).items():
+            self.write_data_file(partition_table, self.get_partition_dir(file_path, year, month))
+        self.n_converted_record = table.num_rows
+        return {}
+
+
+def select_conversion_engine(engine_type: str, input_size: int, arrow_engine_max_input_size: int) -> str:
+    """
+    engine_type: auto, arrow or spark. auto picks arrow engine for inputs up to arrow_engine_max_input_size
+    bytes of landing files and spark for larger ones
+    """
+    if engine_type == CONVERSION_ENGINE_AUTO:
+        return CONVERSION_ENGINE_ARROW if input_size <= arrow_engine_max_input_size else CONVERSION_ENGINE_SPARK
+    if engine_type not in (CONVERSION_ENGINE_ARROW, CONVERSION_ENGINE_SPARK):
+        engine_types = [CONVERSION_ENGINE_AUTO, CONVERSION_ENGINE_ARROW, CONVERSION_ENGINE_SPARK]
+        raise ValueError(f"Unknown conversion engine: {engine_type}, expected one of {engine_types}")
+    return engine_type
+
+
+def get_conversion_engine(engine_type: str, schema: FinanceDataSchema, max_workers: int,
+                          landing_staging_dir: str = None, feature_store_staging_dir: str = None) -> ConversionEngine:
+    """
+    engine_type: arrow or spark, use select_conversion_engine to resolve auto
+    """
+    if engine_type == CONVERSION_ENGINE_ARROW:
+        return ArrowConversionEngine(schema=schema, max_workers=max_workers)
+    if engine_type == CONVERSION_ENGINE_SPARK:
+        return SparkConversionEngine(schema=schema, max_workers=max_workers,
+                                     landing_staging_dir=landing_staging_dir,
+                                     feature_store_staging_dir=feature_store_staging_dir)
+    raise ValueError(f"Unknown conversion engine: {engine_type}")
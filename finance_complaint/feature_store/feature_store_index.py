@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.logger import logger
+from finance_complaint.utils import read_yaml_file, write_yaml_file
+
+# starts with "_" so spark and pyarrow skip it while reading feature store
+FEATURE_STORE_INDEX_FILE_NAME = "_feature_store_index.yaml"
+# columns whose distinct values are kept up to this many per file, above it only min/max is kept
+FEATURE_STORE_INDEX_MAX_DISTINCT_VALUES = 512
+
+
+def is_data_file(file_name: str) -> bool:
+    return not file_name.startswith((".", "_")) and file_name.endswith(".parquet")
+
+
+class FeatureStoreIndex:
+    """
+    Side index of feature store kept next to its partitions. For every parquet file and every
+    year/month partition it keeps number of records, min/max of date_received and min/max along
+    with distinct values of product, state and company, so readers can skip files that can not
+    match a filter without opening them.
+
+    index = FeatureStoreIndex(file_path)
+    index.refresh()  # after feature store has been written
+    index.files, index.partitions
+    """
+
+    def __init__(self, file_path: str, schema: FinanceDataSchema = None, max_workers: int = 4):
+        self.file_path = file_path
+        self.schema = schema or FinanceDataSchema()
+        self.max_workers = max_workers
+        self.index_file_path = os.path.join(file_path, FEATURE_STORE_INDEX_FILE_NAME)
+        # relative file path -> file stats
+        self.files: Dict[str, dict] = {}
+        # relative partition directory -> partition stats
+        self.partitions: Dict[str, dict] = {}
+        if os.path.exists(self.index_file_path):
+            index = read_yaml_file(self.index_file_path) or {}
+            self.files = index.get("files") or {}
+            self.partitions = index.get("partitions") or {}
+
+    @property
+    def date_column(self) -> str:
+        return self.schema.col_date_received
+
+    @property
+    def value_columns(self) -> List[str]:
+        """
+        columns filtered by equality, distinct values are indexed along with min/max
+        """
+        return [self.schema.col_product, self.schema.col_state, self.schema.col_company]
+
+    def list_partition_dirs(self) -> List[str]:
+        """
+        returns relative year/month partition directories present in feature store
+        """
+        partition_dirs = []
+        if not os.path.exists(self.file_path):
+            return partition_dirs
+        for year_dir in sorted(os.listdir(self.file_path)):
+            if not year_dir.startswith(f"{self.schema.col_year}="):
+                continue
+            for month_dir in sorted(os.listdir(os.path.join(self.file_path, year_dir))):
+                if month_dir.startswith(f"{self.schema.col_month}="):
+                    partition_dirs.append(f"{year_dir}/{month_dir}")
+        return partition_dirs
+
+    def list_files(self, partition_dir: str) -> List[Tuple[str, int]]:
+        """
+        returns relative path and size of every data file of partition
+        """
+        files = []
+        with os.scandir(os.path.join(self.file_path, partition_dir)) as entries:
+            for entry in entries:
+                if entry.is_file() and is_data_file(entry.name):
+                    files.append((f"{partition_dir}/{entry.name}", entry.stat().st_size))
+        return sorted(files)
+
+    def get_file_stats(self, relative_file_path: str, size: int) -> dict:
+        """
+        Reads only indexed columns of a data file
+        """
+        table = pq.read_table(os.path.join(self.file_path, relative_file_path),
+                              columns=[self.date_column, *self.value_columns])
+        columns = {}
+        for column in [self.date_column, *self.value_columns]:
+            min_max = pc.min_max(table[column])
+            columns[column] = {"min": min_max["min"].as_py(), "max": min_max["max"].as_py()}
+            if column in self.value_columns:
+                values = pc.unique(table[column].drop_null())
+                columns[column]["values"] = sorted(values.to_pylist()) \
+                    if len(values) <= FEATURE_STORE_INDEX_MAX_DISTINCT_VALUES else None
+        return {"size": size, "n_record": table.num_rows, "columns": columns}
+
+    @staticmethod
+    def merge_stats(stats: List[dict]) -> dict:
+        """
+        Stats of a partition from stats of its files
+        """
+        columns = {}
+        for file_stats in stats:
+            for column, column_stats in file_stats["columns"].items():
+                merged = columns.setdefault(column, {"min": None, "max": None})
+                if column_stats["min"] is not None:
+                    merged["min"] = column_stats["min"] if merged["min"] is None \
+                        else min(merged["min"], column_stats["min"])
+                    merged["max"] = column_stats["max"] if merged["max"] is None \
+                        else max(merged["max"], column_stats["max"])
+                if "values" in column_stats:
+                    if "values" not in merged:
+                        merged["values"] = set()
+                    if merged["values"] is None or column_stats["values"] is None:
+                        merged["values"] = None
+                    else:
+                        merged["values"].update(column_stats["values"])
+        for merged in columns.values():
+            if merged.get("values") is not None:
+                merged["values"] = sorted(merged["values"]) \
+                    if len(merged["values"]) <= FEATURE_STORE_INDEX_MAX_DISTINCT_VALUES else None
+        return {"n_file": len(stats), "n_record": sum(file_stats["n_record"] for file_stats in stats),
+                "columns": columns}
+
+    def refresh(self) -> None:
+        """
+        Brings index in line with feature store. Only files not indexed yet or whose size has changed
+        are read, entries of removed files and partitions are dropped.
+        """
+        current_files = {}
+        for partition_dir in self.list_partition_dirs():
+            current_files.update(self.list_files(partition_dir))
+        new_files = [(relative_file_path, size) for relative_file_path, size in current_files.items()
+                     if self.files.get(relative_file_path, {}).get("size") != size]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            new_stats = dict(zip([relative_file_path for relative_file_path, _ in new_files],
+                                 executor.map(lambda file: self.get_file_stats(*file), new_files)))
+        self.files = {relative_file_path: new_stats.get(relative_file_path) or self.files[relative_file_path]
+                      for relative_file_path in sorted(current_files)}
+
+        partition_files: Dict[str, List[dict]] = {}
+        for relative_file_path, file_stats in self.files.items():
+            partition_files.setdefault(os.path.dirname(relative_file_path), []).append(file_stats)
+        self.partitions = {partition_dir: self.merge_stats(stats) for partition_dir, stats in partition_files.items()}
+        write_yaml_file(file_path=self.index_file_path, data={"files": self.files, "partitions": self.partitions})
+        logger.info(f"Feature store index refreshed: {len(self.files)} files, {len(new_files)} indexed now, "
+                    f"{len(self.partitions)} partitions")
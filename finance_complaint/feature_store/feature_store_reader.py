@@ -0,0 +1,182 @@
+import os
+from typing import List, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as pa_ds
+from pyspark.sql import Column, DataFrame
+from pyspark.sql import functions as F
+from pyspark.sql.types import IntegerType, StructField, StructType
+
+from finance_complaint.configs.spark_manager import get_spark_session
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.feature_store.feature_store_index import FeatureStoreIndex
+from finance_complaint.logger import logger, span
+
+
+class FeatureStoreFilter:
+    """
+    Records of feature store to read.
+    from_date: date_received on or after it e.g. 2023-01-01 or a full watermark 2023-01-31T12:00:00-05:00
+    to_date: date_received on or before it, compared on its own length so 2023-01-31 includes whole day
+    products, states, companies: one value or list of values a record must have, None reads every value
+    partitions: (year, month) partitions to read, None reads every partition
+    """
+
+    def __init__(self, from_date: str = None, to_date: str = None,
+                 products: Union[str, List[str]] = None,
+                 states: Union[str, List[str]] = None,
+                 companies: Union[str, List[str]] = None,
+                 partitions: List[Tuple[int, int]] = None):
+        self.from_date = from_date
+        self.to_date = to_date
+        self.partitions = None if partitions is None else set(partitions)
+        self.products = [products] if isinstance(products, str) else products
+        self.states = [states] if isinstance(states, str) else states
+        self.companies = [companies] if isinstance(companies, str) else companies
+
+    def get_value_filters(self, schema: FinanceDataSchema) -> dict:
+        return {column: values for column, values in [(schema.col_product, self.products),
+                                                      (schema.col_state, self.states),
+                                                      (schema.col_company, self.companies)]
+                if values is not None}
+
+    def matches_partition(self, year: int, month: int) -> bool:
+        if self.partitions is not None and (year, month) not in self.partitions:
+            return False
+        partition_key = f"{year:04d}-{month:02d}"
+        if self.from_date is not None and partition_key < self.from_date[:7]:
+            return False
+        if self.to_date is not None and partition_key > self.to_date[:7]:
+            return False
+        return True
+
+    def matches_stats(self, stats: dict, schema: FinanceDataSchema) -> bool:
+        """
+        stats: index stats of a file or partition
+        returns False only if no record described by stats can match
+        """
+        date_stats = stats["columns"][schema.col_date_received]
+        if date_stats["min"] is None:
+            return False
+        if self.from_date is not None and date_stats["max"] < self.from_date:
+            return False
+        if self.to_date is not None and date_stats["min"][:len(self.to_date)] > self.to_date:
+            return False
+        for column, values in self.get_value_filters(schema).items():
+            column_stats = stats["columns"][column]
+            if column_stats.get("values") is not None:
+                if len(set(values).intersection(column_stats["values"])) == 0:
+                    return False
+            elif column_stats["min"] is None or \
+                    not any(column_stats["min"] <= value <= column_stats["max"] for value in values):
+                return False
+        return True
+
+    def get_arrow_expression(self, schema: FinanceDataSchema) -> pa_ds.Expression:
+        expression = pc.scalar(True)
+        date_received = pc.field(schema.col_date_received)
+        if self.from_date is not None:
+            expression = expression & (date_received >= self.from_date)
+        if self.to_date is not None:
+            expression = expression & (pc.utf8_slice_codeunits(date_received, 0, len(self.to_date)) <= self.to_date)
+        for column, values in self.get_value_filters(schema).items():
+            expression = expression & pc.field(column).isin(values)
+        return expression
+
+    def get_spark_condition(self, schema: FinanceDataSchema) -> Column:
+        condition = F.lit(True)
+        date_received = F.col(schema.col_date_received)
+        if self.from_date is not None:
+            condition = condition & (date_received >= self.from_date)
+        if self.to_date is not None:
+            condition = condition & (F.substring(date_received, 1, len(self.to_date)) <= self.to_date)
+        for column, values in self.get_value_filters(schema).items():
+            condition = condition & F.col(column).isin(values)
+        return condition
+
+
+class FeatureStoreReader:
+    """
+    Reads a slice of feature store touching only files that can hold matching records.
+    Partitions outside of date range are pruned from directory names, files are pruned
+    with statistics of FeatureStoreIndex. A file missing from index or changed since it was
+    indexed is always read, so a stale index never hides records.
+    Only requested columns are read by both pyarrow and spark.
+
+    reader = FeatureStoreReader(feature_store_file_path)
+    table = reader.read_table(columns=["complaint_id", "product"], from_date="2023-01-01", states="CA")
+    dataframe = reader.read_dataframe(products=["Mortgage"])
+    """
+
+    def __init__(self, file_path: str, schema: FinanceDataSchema = None):
+        self.file_path = file_path
+        self.schema = schema or FinanceDataSchema()
+        self.index = FeatureStoreIndex(file_path=file_path, schema=self.schema)
+
+    @property
+    def partition_schema(self) -> pa.Schema:
+        return pa.schema([pa.field(column, pa.int32()) for column in self.schema.partition_columns])
+
+    def get_files(self, feature_store_filter: FeatureStoreFilter) -> List[str]:
+        """
+        returns paths of data files that can hold records matching filter
+        """
+        file_paths, n_file = [], 0
+        for partition_dir in self.index.list_partition_dirs():
+            year, month = self.schema.parse_partition_path(partition_dir)
+            if not feature_store_filter.matches_partition(year, month):
+                continue
+            partition_stats = self.index.partitions.get(partition_dir)
+            files = self.index.list_files(partition_dir)
+            n_file += len(files)
+            is_indexed = partition_stats is not None and partition_stats["n_file"] == len(files) and \
+                all(self.index.files.get(relative_file_path, {}).get("size") == size
+                    for relative_file_path, size in files)
+            if is_indexed and not feature_store_filter.matches_stats(partition_stats, self.schema):
+                continue
+            for relative_file_path, size in files:
+                file_stats = self.index.files.get(relative_file_path)
+                if file_stats is not None and file_stats["size"] == size and \
+                        not feature_store_filter.matches_stats(file_stats, self.schema):
+                    continue
+                file_paths.append(os.path.join(self.file_path, relative_file_path))
+        logger.info(f"Feature store read prunes to {len(file_paths)} of {n_file} files in date range")
+        return file_paths
+
+    def read_table(self, columns: List[str] = None, **filters) -> pa.Table:
+        """
+        columns: columns to read, partition columns included, None reads every column
+        filters: arguments of FeatureStoreFilter
+        """
+        feature_store_filter = FeatureStoreFilter(**filters)
+        with span("feature_store.read_table") as span_attributes:
+            file_paths = self.get_files(feature_store_filter)
+            arrow_schema = pa.unify_schemas([self.schema.arrow_schema, self.partition_schema])
+            dataset = pa_ds.dataset(file_paths, schema=arrow_schema, format="parquet",
+                                    partitioning=pa_ds.partitioning(self.partition_schema, flavor="hive"),
+                                    partition_base_dir=self.file_path)
+            table = dataset.to_table(columns=columns, filter=feature_store_filter.get_arrow_expression(self.schema))
+            span_attributes.update(n_file=len(file_paths), n_record=table.num_rows)
+            return table
+
+    def read_dataframe(self, columns: List[str] = None, **filters) -> DataFrame:
+        """
+        columns: columns to read, partition columns included, None reads every column
+        filters: arguments of FeatureStoreFilter
+        """
+        feature_store_filter = FeatureStoreFilter(**filters)
+        file_paths = self.get_files(feature_store_filter)
+        spark_session = get_spark_session(input_size=sum(os.path.getsize(file_path) for file_path in file_paths))
+        dataframe_schema = StructType(self.schema.dataframe_schema.fields +
+                                      [StructField(column, IntegerType(), True)
+                                       for column in self.schema.partition_columns])
+        if len(file_paths) == 0:
+            dataframe = spark_session.createDataFrame([], dataframe_schema)
+        else:
+            # base path keeps year and month partition columns of files read one by one
+            dataframe = spark_session.read.schema(dataframe_schema) \
+                .option("basePath", self.file_path) \
+                .parquet(*file_paths)
+        dataframe = dataframe.filter(feature_store_filter.get_spark_condition(self.schema))
+        return dataframe.select(*columns) if columns is not None else dataframe
@@ -1,6 +1,19 @@
+import atexit
+import copy
+import json
 import logging
-from datetime import date
+import logging.handlers
 import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+from finance_complaint.constants.environment_constants.variable_key import LOG_FORMAT_ENV_KEY, LOG_LEVEL_ENV_KEY, \
+    LOG_MODULE_LEVELS_ENV_KEY, LOG_MODULE_SAMPLING_ENV_KEY
 
 def get_log_file_name():
     return str(date.today())+".log"
@@ -11,9 +24,148 @@ LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE_PATH= os.path.join(LOG_DIR,LOG_FILE_NAME)
 
-logging.basicConfig(filename=LOG_FILE_PATH,
-                    filemode="a", # a for appending to existing file , w for overwriting
-                    format="%(asctime)s - %(name)s -%(levelname)s - %(filename)s - %(funcName)s - %(lineno)d - %(message)s")
+LOG_TEXT_FORMAT = "%(asctime)s - %(name)s -%(levelname)s - %(filename)s - %(funcName)s - %(lineno)d - %(message)s"
+# attributes every LogRecord has, anything else was passed through extra= and is written as a json field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def parse_module_settings(value: str) -> dict:
+    """
+    "data_ingestion=INFO,spark_manager=WARNING" -> {"data_ingestion": "INFO", "spark_manager": "WARNING"}
+    """
+    settings = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            module, setting = item.split("=", 1)
+            settings[module.strip()] = setting.strip()
+    return settings
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One json object per line, fields passed with extra= are written as top level keys
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                log_record[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_record["exception"] = record.exc_text
+        return json.dumps(log_record, default=str)
+
+
+class FinanceQueueHandler(logging.handlers.QueueHandler):
+    """
+    Only message and traceback are rendered in the calling thread, formatting
+    into text or json is left to the writer thread
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class ModuleFilter(logging.Filter):
+    """
+    Level and sampling rate per module (file name without .py) e.g. data_ingestion.
+    Only records below WARNING are sampled, warnings and errors are always kept.
+    """
+
+    def __init__(self, default_level: int, module_levels: dict, module_sampling: dict):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = {module: logging.getLevelName(level.upper()) for module, level in module_levels.items()}
+        self.module_sampling = {module: float(rate) for module, rate in module_sampling.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.module_levels.get(record.module, self.default_level):
+            return False
+        if record.levelno < logging.WARNING and record.module in self.module_sampling:
+            return random.random() < self.module_sampling[record.module]
+        return True
+
+
+def configure_logger() -> logging.Logger:
+    """
+    Records are put on a queue by the calling thread and written to file by a background
+    listener thread, so logging never waits for disk. LOG_FORMAT_ENV_KEY=json writes json lines.
+    """
+    default_level = logging.getLevelName(os.getenv(LOG_LEVEL_ENV_KEY, "DEBUG").upper())
+    module_filter = ModuleFilter(default_level=default_level,
+                                 module_levels=parse_module_settings(os.getenv(LOG_MODULE_LEVELS_ENV_KEY)),
+                                 module_sampling=parse_module_settings(os.getenv(LOG_MODULE_SAMPLING_ENV_KEY)))
+
+    file_handler = logging.FileHandler(LOG_FILE_PATH, mode="a") # a for appending to existing file
+    if os.getenv(LOG_FORMAT_ENV_KEY, "text") == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(LOG_TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = FinanceQueueHandler(log_queue)
+    # filtered before queueing so dropped records cost nothing in the writer
+    queue_handler.addFilter(module_filter)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # remaining records are written before interpreter exits
+    atexit.register(listener.stop)
+
+    finance_logger = logging.getLogger("FinanceProjectLogger")
+    finance_logger.setLevel(min([default_level] + list(module_filter.module_levels.values())))
+    finance_logger.addHandler(queue_handler)
+    finance_logger.propagate = False
+    return finance_logger
+
+
+logger = configure_logger()
+
+# durations of latest finished spans of this process, name -> seconds, oldest first.
+# only a bounded history is kept, a span repeated in a long running process must not grow memory
+SPAN_DURATION_HISTORY = 100
+span_durations = defaultdict(lambda: deque(maxlen=SPAN_DURATION_HISTORY))
+_span_lock = threading.Lock()
+
+
+@contextmanager
+def span(name: str, /, **attributes):
+    """
+    Records duration of a block as one structured log record with span name, duration_ms, status
+    and given attributes nested under span_attributes, so an attribute never clashes with a LogRecord field.
 
-logger = logging.getLogger("FinanceProjectLogger")
-logger.setLevel(logging.DEBUG)
+    with span("data_ingestion.download", n_interval=10) as span_attributes:
+        ...
+        span_attributes["n_record"] = n_record
+    """
+    span_attributes = dict(attributes)
+    start_time = time.perf_counter()
+    status = "ok"
+    try:
+        yield span_attributes
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start_time
+        with _span_lock:
+            span_durations[name].append(duration)
+        # stacklevel points module, function and line of record to the block using the span
+        logger.info(f"Span {name} finished in {duration * 1000:.1f} ms with status {status}", stacklevel=3,
+                    extra={"span": name, "duration_ms": round(duration * 1000, 3), "status": status,
+                           "span_attributes": span_attributes})
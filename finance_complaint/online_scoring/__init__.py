@@ -0,0 +1,3 @@
+# exporter is not imported here as it needs spark, scorer and server only need numpy
+from finance_complaint.online_scoring.scorer import OnlineScorer
+from finance_complaint.online_scoring.server import MicroBatcher, serve_online_scorer
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import numpy as np
+from pyspark.ml import PipelineModel
+from pyspark.ml.classification import LogisticRegressionModel
+from pyspark.ml.feature import HashingTF, IDFModel, OneHotEncoderModel, RegexTokenizer, StopWordsRemover, \
+    StringIndexerModel, VectorAssembler
+
+from finance_complaint.constants.training_pipeline_constants import DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX, \
+    MODEL_TRAINER_POSITIVE_LABEL, MODEL_TRAINER_NEGATIVE_LABEL
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.online_scoring.scorer import SCORER_SPEC_FILE_NAME, SCORER_WEIGHTS_FILE_NAME
+from finance_complaint.utils import write_yaml_file
+
+
+def get_stage(model: PipelineModel, stage_type):
+    stages = [stage for stage in model.stages if isinstance(stage, stage_type)]
+    if len(stages) != 1:
+        raise Exception(f"Expected one {stage_type.__name__} stage in pipeline, found {len(stages)}")
+    return stages[0]
+
+
+def export_online_scorer(model_path: str, scorer_dir: str) -> str:
+    """
+    Exports pipeline saved by model trainer (SQLTransformer, StringIndexer, OneHotEncoder, RegexTokenizer,
+    StopWordsRemover, HashingTF, IDF, VectorAssembler, LogisticRegression) into files read by OnlineScorer
+    returns scorer_dir
+    """
+    try:
+        model = PipelineModel.load(model_path)
+        string_indexer: StringIndexerModel = get_stage(model, StringIndexerModel)
+        one_hot_encoder: OneHotEncoderModel = get_stage(model, OneHotEncoderModel)
+        tokenizer: RegexTokenizer = get_stage(model, RegexTokenizer)
+        stop_words_remover: StopWordsRemover = get_stage(model, StopWordsRemover)
+        hashing_tf: HashingTF = get_stage(model, HashingTF)
+        idf: IDFModel = get_stage(model, IDFModel)
+        assembler: VectorAssembler = get_stage(model, VectorAssembler)
+        classifier: LogisticRegressionModel = get_stage(model, LogisticRegressionModel)
+        if classifier.numClasses != 2:
+            raise Exception(f"Only binary logistic regression can be exported, found {classifier.numClasses} classes")
+
+        # sizes of one-hot vectors as computed by OneHotEncoderModel
+        keep_invalid = one_hot_encoder.getHandleInvalid() == "keep"
+        drop_last = one_hot_encoder.getDropLast()
+        category_sizes = list(one_hot_encoder.categorySizes)
+        encoded_sizes = [size + 1 if keep_invalid and not drop_last else
+                         size - 1 if drop_last and not keep_invalid else size for size in category_sizes]
+
+        # assembler input order decides offset of each block in feature vector
+        block_sizes = dict(zip(one_hot_encoder.getOutputCols(), encoded_sizes))
+        block_sizes[idf.getOutputCol()] = hashing_tf.getNumFeatures()
+        block_offsets, offset = {}, 0
+        for column in assembler.getInputCols():
+            block_offsets[column] = offset
+            offset += block_sizes[column]
+
+        weights = classifier.coefficients.toArray().astype(np.float64)
+        if len(weights) != offset:
+            raise Exception(f"Feature vector size {offset} does not match {len(weights)} coefficients")
+        text_offset = block_offsets[idf.getOutputCol()]
+        # tokenizer reads narrative filled by pipeline, scorer fills missing narrative of a record itself
+        text_column = tokenizer.getInputCol()
+        if text_column.endswith(DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX):
+            text_column = text_column[:-len(DATA_TRANSFORMATION_FILLED_TEXT_COLUMN_SUFFIX)]
+        # idf is a constant per feature so it is folded into coefficients of hashed features
+        weights[text_offset:text_offset + hashing_tf.getNumFeatures()] *= idf.idf.toArray()
+
+        os.makedirs(scorer_dir, exist_ok=True)
+        np.save(os.path.join(scorer_dir, SCORER_WEIGHTS_FILE_NAME), weights)
+        write_yaml_file(file_path=os.path.join(scorer_dir, SCORER_SPEC_FILE_NAME), data={
+            "intercept": float(classifier.intercept),
+            "threshold": float(classifier.getThreshold()),
+            "positive_label": MODEL_TRAINER_POSITIVE_LABEL,
+            "negative_label": MODEL_TRAINER_NEGATIVE_LABEL,
+            "categorical_columns": string_indexer.getInputCols(),
+            "category_labels": [list(labels) for labels in string_indexer.labelsArray],
+            "category_offsets": [block_offsets[column] for column in one_hot_encoder.getOutputCols()],
+            "category_sizes": category_sizes,
+            "encoded_sizes": encoded_sizes,
+            "keep_invalid": keep_invalid,
+            "text_column": text_column,
+            "token_pattern": tokenizer.getPattern(),
+            "gaps": tokenizer.getGaps(),
+            "min_token_length": tokenizer.getMinTokenLength(),
+            "to_lowercase": tokenizer.getToLowercase(),
+            "stop_words": list(stop_words_remover.getStopWords()),
+            "case_sensitive": stop_words_remover.getCaseSensitive(),
+            "num_features": hashing_tf.getNumFeatures(),
+            "binary": hashing_tf.getBinary(),
+            "text_offset": text_offset,
+        })
+        logger.info(f"Online scorer of [{model_path}] exported at: {scorer_dir}")
+        return scorer_dir
+    except Exception as e:
+        raise FinanceException(e, sys)
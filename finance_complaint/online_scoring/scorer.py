@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+from finance_complaint.exception import FinanceException
+from finance_complaint.utils import read_yaml_file
+
+SCORER_SPEC_FILE_NAME = "scorer_spec.yaml"
+SCORER_WEIGHTS_FILE_NAME = "weights.npy"
+
+_MASK_32 = 0xFFFFFFFF
+
+
+def _rotl32(value: int, n_bit: int) -> int:
+    return ((value << n_bit) | (value >> (32 - n_bit))) & _MASK_32
+
+
+def murmur3_32(data: bytes, seed: int = 42) -> int:
+    """
+    MurmurHash3 x86_32 as used by spark HashingTF, returns signed 32 bit hash
+    """
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h1 = seed & _MASK_32
+    n_aligned = len(data) - len(data) % 4
+    for i in range(0, n_aligned, 4):
+        k1 = int.from_bytes(data[i:i + 4], "little")
+        k1 = (_rotl32((k1 * c1) & _MASK_32, 15) * c2) & _MASK_32
+        h1 = (_rotl32(h1 ^ k1, 13) * 5 + 0xe6546b64) & _MASK_32
+    k1 = 0
+    for shift, byte in enumerate(data[n_aligned:]):
+        k1 ^= byte << (8 * shift)
+    if k1:
+        h1 ^= (_rotl32((k1 * c1) & _MASK_32, 15) * c2) & _MASK_32
+    h1 ^= len(data)
+    h1 ^= h1 >> 16
+    h1 = (h1 * 0x85ebca6b) & _MASK_32
+    h1 ^= h1 >> 13
+    h1 = (h1 * 0xc2b2ae35) & _MASK_32
+    h1 ^= h1 >> 16
+    return h1 - (1 << 32) if h1 >= (1 << 31) else h1
+
+
+class OnlineScorer:
+    """
+    Scores complaints with a trained pipeline exported by export_online_scorer, using only numpy.
+    Logistic regression is linear, so idf is folded into the coefficients at export time and the
+    margin of a complaint is intercept + weight of each one-hot category + weight of each token,
+    feature vectors are never built.
+    """
+
+    def __init__(self, scorer_dir: str):
+        try:
+            spec = read_yaml_file(os.path.join(scorer_dir, SCORER_SPEC_FILE_NAME))
+            self.weights: np.ndarray = np.load(os.path.join(scorer_dir, SCORER_WEIGHTS_FILE_NAME))
+            self.intercept: float = spec["intercept"]
+            self.threshold: float = spec["threshold"]
+            self.positive_label: str = spec["positive_label"]
+            self.negative_label: str = spec["negative_label"]
+
+            self.categorical_columns: List[str] = spec["categorical_columns"]
+            self.category_indexes: List[Dict[str, int]] = [{label: index for index, label in enumerate(labels)}
+                                                           for labels in spec["category_labels"]]
+            # offset of each one-hot block in feature vector and index of its feature per category index
+            self.category_offsets: List[int] = spec["category_offsets"]
+            self.category_sizes: List[int] = spec["category_sizes"]
+            self.encoded_sizes: List[int] = spec["encoded_sizes"]
+            self.keep_invalid: bool = spec["keep_invalid"]
+
+            self.text_column: str = spec["text_column"]
+            self.token_pattern = re.compile(spec["token_pattern"], re.ASCII)
+            self.gaps: bool = spec["gaps"]
+            self.min_token_length: int = spec["min_token_length"]
+            self.to_lowercase: bool = spec["to_lowercase"]
+            self.case_sensitive: bool = spec["case_sensitive"]
+            self.stop_words = frozenset(spec["stop_words"] if self.case_sensitive
+                                        else [stop_word.lower() for stop_word in spec["stop_words"]])
+            self.num_features: int = spec["num_features"]
+            self.binary: bool = spec["binary"]
+            self.text_offset: int = spec["text_offset"]
+            self._get_feature_index = lru_cache(maxsize=2 ** 18)(self._hash_token)
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def _hash_token(self, token: str) -> int:
+        return self.text_offset + murmur3_32(token.encode("utf-8")) % self.num_features
+
+    def tokenize(self, text: str) -> List[str]:
+        text = text or ""
+        if self.to_lowercase:
+            text = text.lower()
+        tokens = self.token_pattern.split(text) if self.gaps else self.token_pattern.findall(text)
+        return [token for token in tokens
+                if len(token) >= self.min_token_length and
+                (token if self.case_sensitive else token.lower()) not in self.stop_words]
+
+    def get_invalid_fields(self, record: dict) -> List[str]:
+        """
+        Columns read by scorer whose value in record is neither a string nor null
+        """
+        return [column for column in self.categorical_columns + [self.text_column]
+                if record.get(column) is not None and not isinstance(record.get(column), str)]
+
+    def get_feature_indices(self, record: dict) -> List[int]:
+        indices = []
+        for column, category_index, offset, category_size, encoded_size in zip(
+                self.categorical_columns, self.category_indexes, self.category_offsets,
+                self.category_sizes, self.encoded_sizes):
+            # unseen and missing categories take the extra index, same as StringIndexer with handleInvalid=keep
+            index = category_index.get(record.get(column), len(category_index))
+            if index >= category_size and self.keep_invalid:
+                index = category_size
+            if index < encoded_size:
+                indices.append(offset + index)
+        tokens = self.tokenize(record.get(self.text_column))
+        if self.binary:
+            tokens = set(tokens)
+        indices.extend(self._get_feature_index(token) for token in tokens)
+        return indices
+
+    def predict(self, records: List[dict]) -> List[dict]:
+        """
+        records: complaints having columns used by training pipeline, missing columns are treated as null
+        returns prediction and probability of positive label of each record
+        """
+        try:
+            row_ids, feature_indices = [], []
+            for row_id, record in enumerate(records):
+                indices = self.get_feature_indices(record)
+                feature_indices.extend(indices)
+                row_ids.extend([row_id] * len(indices))
+            margins = self.intercept + np.bincount(np.asarray(row_ids, dtype=np.int64),
+                                                   weights=self.weights[np.asarray(feature_indices, dtype=np.int64)],
+                                                   minlength=len(records))
+            probabilities = 1.0 / (1.0 + np.exp(-margins))
+            return [{"prediction": self.positive_label if probability > self.threshold else self.negative_label,
+                     "probability": float(probability)} for probability in probabilities]
+        except Exception as e:
+            raise FinanceException(e, sys)
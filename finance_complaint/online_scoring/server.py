@@ -0,0 +1,167 @@
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.online_scoring.scorer import OnlineScorer
+
+
+class MicroBatcher:
+    """
+    Collects records of concurrent requests and scores them together. A batch is scored
+    as soon as it has max_batch_size records or its first record has waited max_wait_ms,
+    so a lone request waits at most max_wait_ms and a burst is scored in a few numpy calls.
+    If a batch fails, each of its requests is scored on its own, so one bad request fails only itself.
+    """
+
+    def __init__(self, scorer: OnlineScorer, max_batch_size: int, max_wait_ms: float):
+        self.scorer = scorer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, records: List[dict]) -> Future:
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        n_record = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while n_record < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_record += len(item[0])
+        return batch
+
+    def _score(self, batch: list):
+        predictions = self.scorer.predict([record for records, _ in batch for record in records])
+        start = 0
+        for records, future in batch:
+            future.set_result(predictions[start:start + len(records)])
+            start += len(records)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._score(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    logger.exception(e)
+                    batch[0][1].set_exception(e)
+                    continue
+                logger.warning(f"Batch of {len(batch)} requests failed, scoring them one by one: {e}")
+                for item in batch:
+                    try:
+                        self._score([item])
+                    except Exception as e:
+                        logger.exception(e)
+                        item[1].set_exception(e)
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /predict with a complaint object or {"instances": [complaint, ...]}
+    GET /health
+    """
+    # keep-alive connections, a new tcp connection per request would dominate latency
+    protocol_version = "HTTP/1.1"
+    micro_batcher: MicroBatcher = None
+    request_timeout: float = None
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"unknown path: {self.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid json: {e}"})
+            return
+        is_single = not (isinstance(body, dict) and "instances" in body)
+        records = [body] if is_single else body["instances"]
+        if not isinstance(records, list):
+            self._send_json(400, {"error": "instances must be a list of complaint objects"})
+            return
+        invalid_indices = [i for i, record in enumerate(records) if not isinstance(record, dict)]
+        if len(invalid_indices) > 0:
+            self._send_json(400, {"error": "complaint must be a json object"} if is_single else
+                            {"error": f"instances at {invalid_indices[:10]} are not complaint objects"})
+            return
+        # a field of wrong type would fail scoring of the whole batch, it is a client error
+        scorer = self.micro_batcher.scorer
+        invalid_fields = {i: fields for i, fields in
+                          ((i, scorer.get_invalid_fields(record)) for i, record in enumerate(records))
+                          if len(fields) > 0}
+        if len(invalid_fields) > 0:
+            self._send_json(400, {"error": "; ".join(
+                f"{'complaint' if is_single else f'instance {i}'} fields {fields} must be strings or null"
+                for i, fields in list(invalid_fields.items())[:10])})
+            return
+        if len(records) == 0:
+            self._send_json(200, {"predictions": []})
+            return
+        try:
+            predictions = self.micro_batcher.submit(records).result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            self._send_json(504, {"error": f"scoring did not finish within {self.request_timeout} seconds"})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"scoring failed: {str(e) or type(e).__name__}"})
+            return
+        self._send_json(200, predictions[0] if is_single else {"predictions": predictions})
+
+    def log_message(self, format, *args):
+        # per request access log would cost more than scoring itself
+        pass
+
+
+def serve_online_scorer(scorer_dir: str, host: str, port: int, max_batch_size: int, max_wait_ms: float,
+                        request_timeout: float):
+    """
+    Loads scorer once and serves it until interrupted
+    """
+    try:
+        scorer = OnlineScorer(scorer_dir)
+        handler = type("FinanceScoringRequestHandler", (ScoringRequestHandler,),
+                       {"micro_batcher": MicroBatcher(scorer, max_batch_size, max_wait_ms),
+                        "request_timeout": request_timeout})
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        logger.info(f"Serving online scorer [{scorer_dir}] at http://{host}:{port}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    except Exception as e:
+        raise FinanceException(e, sys)
@@ -0,0 +1,27 @@
+from finance_complaint.configs.training_pipeline_config import FinanceConfig
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils.pipeline_metrics import measure_stage
+from finance_complaint.components.prediction_components.batch_prediction import BatchPrediction
+from finance_complaint.entities.artifact_entities import BatchPredictionArtifact
+import sys
+
+class PredictionPipeline:
+    def __init__(self, finance_config):
+        self.finance_config : FinanceConfig = finance_config
+
+    def start_batch_prediction(self) -> BatchPredictionArtifact:
+        try:
+            batch_prediction_config = self.finance_config.get_batch_prediction_config()
+            batch_prediction = BatchPrediction(batch_prediction_config=batch_prediction_config)
+            with measure_stage("batch_prediction") as stage_metrics:
+                batch_prediction_artifact = batch_prediction.initiate_batch_prediction()
+            batch_prediction_artifact.metrics = stage_metrics
+            return batch_prediction_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def start(self):
+        batch_prediction_artifact = self.start_batch_prediction()
+        logger.info(f"Batch Prediction completed, artifact generated: {batch_prediction_artifact}")
+        return batch_prediction_artifact
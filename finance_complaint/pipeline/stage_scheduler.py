@@ -0,0 +1,153 @@
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List
+
+from finance_complaint.entities.config_entities import StageSchedulerConfig
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger
+from finance_complaint.utils import get_config_fingerprint, get_path_fingerprint, read_yaml_file, write_yaml_file
+
+
+@dataclass
+class Stage:
+    name: str
+    # called with artifact of every dependency as keyword argument <dependency>_artifact
+    run: Callable
+    artifact_class: type
+    config: object = None
+    depends_on: List[str] = field(default_factory=list)
+    # stage reads inputs which can not be fingerprinted e.g. a remote api, it runs every time
+    always_run: bool = False
+    # raises if artifact must not be used by dependents, such an artifact is not cached
+    check: Callable = None
+    # config fields that can not change output of unchanged inputs e.g. a max date moving with today
+    ignored_config_fields: List[str] = field(default_factory=list)
+
+
+class StageScheduler:
+    """
+    Runs pipeline stages as a dag. Fingerprint of a stage is made from its config and from
+    content of artifacts of its dependencies. If a previous successful run of the stage had the
+    same fingerprint and its outputs are untouched, its artifact is reused and the stage is skipped.
+    Stages whose dependencies are done run concurrently.
+
+    Timestamp of the run is removed from config before fingerprinting and paths of artifacts are
+    fingerprinted by their content, so timestamped directories of each run do not change fingerprints.
+    """
+
+    def __init__(self, stage_scheduler_config: StageSchedulerConfig, stages: List[Stage]):
+        try:
+            self.stage_scheduler_config = stage_scheduler_config
+            self.stages: Dict[str, Stage] = {stage.name: stage for stage in stages}
+            for stage in stages:
+                unknown_stages = [name for name in stage.depends_on if name not in self.stages]
+                if len(unknown_stages) > 0:
+                    raise Exception(f"Stage {stage.name} depends on unknown stages: {unknown_stages}")
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def get_stage_config_fingerprint(self, stage: Stage) -> str:
+        if stage.config is None:
+            return None
+        values = {key: str(value).replace(self.stage_scheduler_config.timestamp, "")
+                  for key, value in stage.config.__dict__.items() if key not in stage.ignored_config_fields}
+        return get_config_fingerprint(values)
+
+    @staticmethod
+    def get_artifact_values(artifact) -> dict:
+        # metrics of a stage run are measurements, not output
+        return {artifact_field.name: getattr(artifact, artifact_field.name) for artifact_field in fields(artifact)
+                if artifact_field.name != "metrics"}
+
+    def get_artifact_fingerprint(self, artifact) -> str:
+        values = {}
+        for name, value in self.get_artifact_values(artifact).items():
+            if isinstance(value, str) and name.endswith(("_path", "_dir")):
+                values[name] = get_path_fingerprint(value)
+            else:
+                values[name] = value
+        return get_config_fingerprint(values)
+
+    def get_stage_fingerprint(self, stage: Stage, artifacts: dict) -> str:
+        return get_config_fingerprint({
+            "stage": stage.name,
+            "config": self.get_stage_config_fingerprint(stage),
+            "inputs": {name: self.get_artifact_fingerprint(artifacts[name]) for name in stage.depends_on},
+        })
+
+    def get_cache_file_path(self, stage: Stage, fingerprint: str) -> str:
+        return os.path.join(self.stage_scheduler_config.cache_dir, stage.name, f"{fingerprint}.yaml")
+
+    def get_cached_artifact(self, stage: Stage, fingerprint: str):
+        """
+        Artifact of previous run having same fingerprint, None if there is no such run
+        or if its outputs have been changed or removed since then
+        """
+        cache_file_path = self.get_cache_file_path(stage, fingerprint)
+        if not os.path.exists(cache_file_path):
+            return None
+        cache = read_yaml_file(cache_file_path) or {}
+        artifact = stage.artifact_class(**cache["artifact"])
+        if self.get_artifact_fingerprint(artifact) != cache["artifact_fingerprint"]:
+            logger.info(f"Outputs of cached run of stage {stage.name} have changed, cache is not used")
+            return None
+        return artifact
+
+    def write_cached_artifact(self, stage: Stage, fingerprint: str, artifact):
+        write_yaml_file(file_path=self.get_cache_file_path(stage, fingerprint),
+                        data={"timestamp": self.stage_scheduler_config.timestamp,
+                              "artifact": self.get_artifact_values(artifact),
+                              "artifact_fingerprint": self.get_artifact_fingerprint(artifact)})
+
+    def run_stage(self, stage: Stage, artifacts: dict):
+        fingerprint = self.get_stage_fingerprint(stage, artifacts)
+        if not stage.always_run:
+            artifact = self.get_cached_artifact(stage, fingerprint)
+            if artifact is not None:
+                logger.info(f"Stage {stage.name} is unchanged, fingerprint: {fingerprint}, skipped.")
+                return artifact
+        artifact = stage.run(**{f"{name}_artifact": artifacts[name] for name in stage.depends_on})
+        if stage.check is not None:
+            stage.check(artifact)
+        if not stage.always_run:
+            self.write_cached_artifact(stage, fingerprint, artifact)
+        return artifact
+
+    def run(self) -> dict:
+        """
+        returns artifact of every stage by stage name, first failure is raised once
+        running stages have finished and no dependent of failed stage is started
+        """
+        try:
+            artifacts = {}
+            submitted = set()
+            failure = None
+            with ThreadPoolExecutor(max_workers=self.stage_scheduler_config.max_workers) as executor:
+                running = {}
+                while True:
+                    if failure is None:
+                        for stage in self.stages.values():
+                            if stage.name not in submitted and all(name in artifacts for name in stage.depends_on):
+                                submitted.add(stage.name)
+                                running[executor.submit(self.run_stage, stage, dict(artifacts))] = stage
+                    if len(running) == 0:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = running.pop(future)
+                        try:
+                            artifacts[stage.name] = future.result()
+                            logger.info(f"Stage {stage.name} completed, artifact: {artifacts[stage.name]}")
+                        except Exception as e:
+                            logger.error(f"Stage {stage.name} failed: {e}")
+                            failure = failure or e
+            if failure is not None:
+                raise failure
+            not_run_stages = [name for name in self.stages if name not in artifacts]
+            if len(not_run_stages) > 0:
+                raise Exception(f"Stages never became ready, check dependencies: {not_run_stages}")
+            return artifacts
+        except Exception as e:
+            raise FinanceException(e, sys)
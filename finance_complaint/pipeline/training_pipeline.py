@@ -1,7 +1,19 @@
 from finance_complaint.configs.training_pipeline_config import FinanceConfig
 from finance_complaint.exception import FinanceException
 from finance_complaint.logger import logger
+from finance_complaint.utils.pipeline_metrics import measure_stage
 from finance_complaint.components.training_components.data_ingestion import DataIngestion
+from finance_complaint.components.training_components.data_transformation import DataTransformation
+from finance_complaint.components.training_components.data_validation import DataValidation
+from finance_complaint.components.training_components.model_evaluation import ModelEvaluation
+from finance_complaint.components.training_components.model_pusher import ModelPusher
+from finance_complaint.components.training_components.model_trainer import ModelTrainer
+from finance_complaint.entities.artifact_entities import DataIngestionArtifact, DataValidationArtifact, \
+    DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact, ModelPusherArtifact, \
+    FeatureStoreCompactionArtifact
+from finance_complaint.feature_store.compaction import FeatureStoreCompaction
+from finance_complaint.pipeline.stage_scheduler import Stage, StageScheduler
+from dataclasses import replace
 import sys
 
 class TrainingPipeline:
@@ -12,27 +24,191 @@ class TrainingPipeline:
         try:
             data_ingestion_config = self.finance_config.get_data_ingestion_config(to_date="2012-06-01")
             data_ingestion = DataIngestion(data_ingestion_config=data_ingestion_config)
-            data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            with measure_stage("data_ingestion") as stage_metrics:
+                data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
+            data_ingestion_artifact.metrics = stage_metrics
+            if self.finance_config.get_feature_store_compaction_config().compact_after_ingestion:
+                self.start_feature_store_compaction()
             return data_ingestion_artifact
 
         except Exception as e:
             raise FinanceException(e, sys)
 
-    def start_data_validation(self):
-        pass
+    def start_feature_store_compaction(self) -> FeatureStoreCompactionArtifact:
+        """
+        Rewrites small and unsorted files of feature store partitions into sorted files of target size
+        """
+        try:
+            feature_store_compaction_config = self.finance_config.get_feature_store_compaction_config()
+            feature_store_compaction = FeatureStoreCompaction(
+                feature_store_compaction_config=feature_store_compaction_config)
+            with measure_stage("feature_store_compaction") as stage_metrics:
+                feature_store_compaction_artifact = feature_store_compaction.initiate_compaction()
+            feature_store_compaction_artifact.metrics = stage_metrics
+            return feature_store_compaction_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def start_dead_letter_replay(self):
+        """
+        Downloads again only those intervals which failed permanently in earlier runs
+        """
+        try:
+            data_ingestion_config = self.finance_config.get_data_ingestion_config()
+            data_ingestion = DataIngestion(data_ingestion_config=data_ingestion_config)
+            with measure_stage("dead_letter_replay") as stage_metrics:
+                data_ingestion_artifact = data_ingestion.initiate_dead_letter_replay()
+            data_ingestion_artifact.metrics = stage_metrics
+            return data_ingestion_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def start_complaint_store_export(self):
+        """
+        Exports complaints added to complaint store since previous export into feature store
+        """
+        try:
+            data_ingestion_config = self.finance_config.get_data_ingestion_config()
+            data_ingestion = DataIngestion(data_ingestion_config=data_ingestion_config)
+            with measure_stage("complaint_store_export") as stage_metrics:
+                data_ingestion_artifact = data_ingestion.initiate_complaint_store_export()
+            data_ingestion_artifact.metrics = stage_metrics
+            return data_ingestion_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def start_complaint_store_mirror(self, data_ingestion_artifact: DataIngestionArtifact) -> DataIngestionArtifact:
+        """
+        Mirrors complaints downloaded by ingestion run into complaint store
+        """
+        try:
+            data_ingestion_config = replace(self.finance_config.get_data_ingestion_config(),
+                                            download_dir=data_ingestion_artifact.download_dir)
+            data_ingestion = DataIngestion(data_ingestion_config=data_ingestion_config)
+            with measure_stage("complaint_store_mirror") as stage_metrics:
+                data_ingestion_artifact = data_ingestion.initiate_complaint_store_mirror()
+            data_ingestion_artifact.metrics = stage_metrics
+            return data_ingestion_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
 
-    def start_data_transformation(self):
-        pass
+    def start_data_validation(self, data_ingestion_artifact: DataIngestionArtifact) -> DataValidationArtifact:
+        try:
+            data_validation_config = self.finance_config.get_data_validation_config()
+            data_validation = DataValidation(data_validation_config=data_validation_config,
+                                             data_ingestion_artifact=data_ingestion_artifact)
+            with measure_stage("data_validation") as stage_metrics:
+                data_validation_artifact = data_validation.initiate_data_validation()
+            data_validation_artifact.metrics = stage_metrics
+            return data_validation_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
 
-    def start_model_trainer(self):
-        pass
+    def start_data_transformation(self, data_validation_artifact: DataValidationArtifact) -> DataTransformationArtifact:
+        try:
+            data_transformation_config = self.finance_config.get_data_transformation_config()
+            data_transformation = DataTransformation(data_transformation_config=data_transformation_config,
+                                                     data_validation_artifact=data_validation_artifact)
+            with measure_stage("data_transformation") as stage_metrics:
+                data_transformation_artifact = data_transformation.initiate_data_transformation()
+            data_transformation_artifact.metrics = stage_metrics
+            return data_transformation_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
 
-    def start_model_evaluvation(self):
-        pass
+    def start_model_trainer(self, data_validation_artifact: DataValidationArtifact,
+                            data_transformation_artifact: DataTransformationArtifact) -> ModelTrainerArtifact:
+        try:
+            model_trainer_config = self.finance_config.get_model_trainer_config()
+            model_trainer = ModelTrainer(model_trainer_config=model_trainer_config,
+                                         data_validation_artifact=data_validation_artifact,
+                                         data_transformation_artifact=data_transformation_artifact)
+            with measure_stage("model_trainer") as stage_metrics:
+                model_trainer_artifact = model_trainer.initiate_model_trainer()
+            model_trainer_artifact.metrics = stage_metrics
+            return model_trainer_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
 
-    def start_model_pusher(self):
-        pass
+    def start_model_evaluvation(self, model_trainer_artifact: ModelTrainerArtifact) -> ModelEvaluationArtifact:
+        try:
+            model_evaluation_config = self.finance_config.get_model_evaluation_config()
+            model_evaluation = ModelEvaluation(model_evaluation_config=model_evaluation_config,
+                                               model_trainer_artifact=model_trainer_artifact)
+            with measure_stage("model_evaluation") as stage_metrics:
+                model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
+            model_evaluation_artifact.metrics = stage_metrics
+            return model_evaluation_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
+
+    def start_model_pusher(self, data_ingestion_artifact: DataIngestionArtifact,
+                           model_trainer_artifact: ModelTrainerArtifact,
+                           model_evaluation_artifact: ModelEvaluationArtifact) -> ModelPusherArtifact:
+        try:
+            model_pusher_config = self.finance_config.get_model_pusher_config()
+            model_pusher = ModelPusher(model_pusher_config=model_pusher_config,
+                                       data_ingestion_artifact=data_ingestion_artifact,
+                                       model_trainer_artifact=model_trainer_artifact,
+                                       model_evaluation_artifact=model_evaluation_artifact)
+            with measure_stage("model_pusher") as stage_metrics:
+                model_pusher_artifact = model_pusher.initiate_model_pusher()
+            model_pusher_artifact.metrics = stage_metrics
+            return model_pusher_artifact
+        except Exception as e:
+            raise FinanceException(e, sys)
 
-    def start(self):
-        data_ingestion_artifact = self.start_data_ingestion()
-        logger.info(f"Data Ingestion completed, artifact generated: {data_ingestion_artifact}")
+    @staticmethod
+    def check_data_validation(data_validation_artifact: DataValidationArtifact):
+        if not data_validation_artifact.is_valid:
+            raise Exception(f"Data validation failed, check report: {data_validation_artifact.report_file_path}")
+
+    def get_stages(self) -> list:
+        """
+        Stages of training pipeline with their dependencies, a stage is skipped when its config
+        and artifacts of its dependencies are same as in a previous successful run
+        """
+        finance_config = self.finance_config
+        return [
+            # ingestion asks data source for new complaints every time, it is incremental by itself
+            Stage(name="data_ingestion", run=self.start_data_ingestion, artifact_class=DataIngestionArtifact,
+                  always_run=True),
+            Stage(name="complaint_store_mirror", run=self.start_complaint_store_mirror,
+                  artifact_class=DataIngestionArtifact,
+                  config=finance_config.get_data_ingestion_config(),
+                  depends_on=["data_ingestion"],
+                  # only complaint store settings decide what mirroring does with downloaded files
+                  ignored_config_fields=["from_date", "to_date"]),
+            Stage(name="data_validation", run=self.start_data_validation, artifact_class=DataValidationArtifact,
+                  config=finance_config.get_data_validation_config(),
+                  depends_on=["data_ingestion"],
+                  check=self.check_data_validation,
+                  # max date follows today, data valid under an earlier max date stays valid
+                  ignored_config_fields=["max_date"]),
+            Stage(name="data_transformation", run=self.start_data_transformation,
+                  artifact_class=DataTransformationArtifact,
+                  config=finance_config.get_data_transformation_config(),
+                  depends_on=["data_validation"]),
+            Stage(name="model_trainer", run=self.start_model_trainer, artifact_class=ModelTrainerArtifact,
+                  config=finance_config.get_model_trainer_config(),
+                  # hold-out set is selected from validated complaints
+                  depends_on=["data_validation", "data_transformation"]),
+            # a model pushed by the previous run is not an input, an unchanged trained model
+            # has already been compared and pushed if it was better
+            Stage(name="model_evaluation", run=self.start_model_evaluvation, artifact_class=ModelEvaluationArtifact,
+                  config=finance_config.get_model_evaluation_config(),
+                  depends_on=["model_trainer"]),
+            Stage(name="model_pusher", run=self.start_model_pusher, artifact_class=ModelPusherArtifact,
+                  config=finance_config.get_model_pusher_config(),
+                  depends_on=["data_ingestion", "model_trainer", "model_evaluation"]),
+        ]
+
+    def start(self) -> dict:
+        try:
+            stage_scheduler = StageScheduler(stage_scheduler_config=self.finance_config.get_stage_scheduler_config(),
+                                             stages=self.get_stages())
+            artifacts = stage_scheduler.run()
+            logger.info(f"Training pipeline completed, artifacts generated: {artifacts}")
+            return artifacts
+        except Exception as e:
+            raise FinanceException(e, sys)
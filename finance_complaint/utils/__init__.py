@@ -1,16 +1,33 @@
 import yaml,os,sys
+import hashlib
+import shutil
+import json
+import uuid
 from finance_complaint.exception import FinanceException
 
 
+def get_temp_file_path(file_path: str) -> str:
+    """
+    Hidden temporary file next to file_path, spark and hadoop ignore files starting with "."
+    so a partially written file is never read. Being in same directory makes os.replace atomic.
+    Name is unique per call so threads writing same file never write into same temporary file.
+    """
+    return os.path.join(os.path.dirname(file_path), f".{os.path.basename(file_path)}.{uuid.uuid4().hex}.tmp")
+
+
 def write_yaml_file(file_path: str, data: dict = None):
     """
     Creates a yaml file and writes data into it
+    file is written into a temporary file first and then renamed
+    so a crash never leaves a partially written yaml file behind
     """
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w") as yaml_file:
+        temp_file_path = get_temp_file_path(file_path)
+        with open(temp_file_path, "w") as yaml_file:
             if data is not None:
                 yaml.dump(data,yaml_file)
+        os.replace(temp_file_path, file_path)
     except Exception as e:
         raise FinanceException(e, sys)
 
@@ -23,4 +40,117 @@ def read_yaml_file(file_path:str) -> dict:
         with open(file_path, "r") as yaml_file:
             return yaml.safe_load(yaml_file)
     except Exception as e:
-        raise FinanceException(e, sys)
\ No newline at end of file
+        raise FinanceException(e, sys)
+
+def get_config_fingerprint(config: dict) -> str:
+    """
+    Stable hash of a json serializable config, same config always gives same fingerprint
+    """
+    try:
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def get_partition_fingerprints(dir_path: str) -> dict:
+    """
+    Fingerprint of every partition directory of a partitioned parquet dataset computed
+    from name, size and modification time of its data files, no file is opened.
+    dir_path: root directory of dataset
+    returns dict of relative partition path e.g. date_received_year=2012/date_received_month=5 -> fingerprint
+    """
+    try:
+        partition_files = {}
+        for root, dir_names, file_names in os.walk(dir_path):
+            # hidden and metadata files e.g. _SUCCESS, .crc are not part of data
+            dir_names[:] = [dir_name for dir_name in dir_names if not dir_name.startswith((".", "_"))]
+            data_files = [file_name for file_name in file_names if not file_name.startswith((".", "_"))]
+            relative_path = os.path.relpath(root, dir_path).replace(os.sep, "/")
+            if len(data_files) == 0 or "=" not in relative_path:
+                continue
+            partition_files[relative_path] = sorted(
+                (file_name, os.path.getsize(os.path.join(root, file_name)),
+                 os.stat(os.path.join(root, file_name)).st_mtime_ns)
+                for file_name in data_files)
+        return {partition: get_config_fingerprint(files) for partition, files in partition_files.items()}
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def get_path_fingerprint(path: str) -> str:
+    """
+    Fingerprint of a file or of every file below a directory computed from relative name,
+    size and modification time, no file is opened. Location of path itself is not part of it,
+    returns None if path does not exist.
+    """
+    try:
+        if not os.path.exists(path):
+            return None
+        if os.path.isfile(path):
+            return get_config_fingerprint([os.path.getsize(path), os.stat(path).st_mtime_ns])
+        files = []
+        for root, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(root, file_name)
+                files.append((os.path.relpath(file_path, path).replace(os.sep, "/"),
+                              os.path.getsize(file_path), os.stat(file_path).st_mtime_ns))
+        return get_config_fingerprint(files)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def get_path_size(path: str) -> int:
+    """
+    Size in bytes of a file or of every file below a directory, 0 if path does not exist
+    """
+    try:
+        if not os.path.exists(path):
+            return 0
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        return sum(os.path.getsize(os.path.join(root, file_name))
+                   for root, _, file_names in os.walk(path) for file_name in file_names)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def is_dataset_complete(dir_path: str) -> bool:
+    """
+    Spark writes _SUCCESS marker only after every file of a dataset is written,
+    a directory without it is left over from an interrupted write
+    """
+    return os.path.exists(os.path.join(dir_path, "_SUCCESS"))
+
+def exchange_paths(path: str, other_path: str) -> bool:
+    """
+    Atomically swaps two existing paths with renameat2(RENAME_EXCHANGE) of linux,
+    returns False if platform or file system does not support it
+    """
+    import ctypes
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    result = renameat2(at_fdcwd, os.fsencode(path), at_fdcwd, os.fsencode(other_path), rename_exchange)
+    return result == 0
+
+def replace_dir(new_dir: str, dir_path: str) -> None:
+    """
+    Moves new_dir into place of dir_path and removes old content of dir_path.
+    Both directories are swapped in one atomic step where supported so a reader never finds
+    dir_path missing, otherwise dir_path is renamed away and new_dir renamed in right after.
+    new_dir must be on same file system e.g. a hidden sibling of dir_path.
+    """
+    try:
+        if not os.path.exists(dir_path):
+            os.rename(new_dir, dir_path)
+            return
+        if exchange_paths(new_dir, dir_path):
+            # new_dir now holds old content
+            shutil.rmtree(new_dir)
+            return
+        old_dir = f"{new_dir}.old"
+        os.rename(dir_path, old_dir)
+        os.rename(new_dir, dir_path)
+        shutil.rmtree(old_dir)
+    except Exception as e:
+        raise FinanceException(e, sys)
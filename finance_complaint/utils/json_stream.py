@@ -0,0 +1,89 @@
+import codecs
+import json
+from typing import Iterable, Iterator
+
+_JSON_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+# what parser expects next
+_EXPECT_ARRAY = 0
+_EXPECT_FIRST_ELEMENT = 1  # an element or "]" of an empty array
+_EXPECT_ELEMENT = 2  # an element after ","
+_EXPECT_SEPARATOR = 3  # "," or "]"
+_EXPECT_END = 4  # nothing but whitespace after "]"
+
+
+def iter_json_array(byte_chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator:
+    """
+    Incrementally parses a top level json array and yields its elements one by one.
+    Only the unparsed tail of the stream is kept in memory, so memory stays flat
+    irrespective of the size of the array.
+    Elements must be separated by exactly one comma and nothing but whitespace may follow
+    the closing bracket, otherwise ValueError is raised.
+
+    byte_chunks: iterable of raw bytes e.g. response.iter_content()
+    encoding: encoding of the byte stream
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ""
+    position = 0
+    expected = _EXPECT_ARRAY
+
+    def unexpected(description: str) -> ValueError:
+        return ValueError(f"Expected {description} but found: {buffer[position:position + 100]}")
+
+    def parse(final: bool):
+        nonlocal position, expected
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                return
+            character = buffer[position]
+            if expected == _EXPECT_END:
+                raise unexpected("end of json array")
+            if expected == _EXPECT_ARRAY:
+                if character != "[":
+                    raise unexpected("json array")
+                expected = _EXPECT_FIRST_ELEMENT
+                position += 1
+                continue
+            if expected == _EXPECT_SEPARATOR:
+                if character == ",":
+                    expected = _EXPECT_ELEMENT
+                elif character == "]":
+                    expected = _EXPECT_END
+                else:
+                    raise unexpected("',' or ']'")
+                position += 1
+                continue
+            if character == "]":
+                if expected == _EXPECT_ELEMENT:
+                    raise unexpected("json array element after ','")
+                expected = _EXPECT_END
+                position += 1
+                continue
+            try:
+                item, end = _JSON_DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # element is split across chunks, wait for more data
+                return
+            if not final and (end == len(buffer) or
+                              (isinstance(item, (int, float)) and buffer[end] not in _WHITESPACE + ",]")):
+                # a scalar at the end of buffer may still continue in next chunk e.g. "1." of "1.5"
+                return
+            position = end
+            expected = _EXPECT_SEPARATOR
+            yield item
+
+    for chunk in byte_chunks:
+        buffer = buffer[position:] + decoder.decode(chunk)
+        position = 0
+        yield from parse(final=False)
+    buffer = buffer[position:] + decoder.decode(b"", final=True)
+    position = 0
+    yield from parse(final=True)
+    if expected != _EXPECT_END:
+        raise ValueError("Json array is incomplete")
@@ -0,0 +1,239 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, List
+
+import pyarrow as pa
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+import zstandard
+
+from finance_complaint.utils import get_temp_file_path
+
+LANDING_FORMAT_NDJSON = "ndjson"
+LANDING_FORMAT_NDJSON_GZIP = "ndjson_gzip"
+LANDING_FORMAT_NDJSON_ZSTD = "ndjson_zstd"
+LANDING_FORMAT_ARROW = "arrow"
+
+LANDING_FORMAT_EXTENSIONS = {
+    LANDING_FORMAT_NDJSON: "",
+    LANDING_FORMAT_NDJSON_GZIP: ".json.gz",
+    LANDING_FORMAT_NDJSON_ZSTD: ".json.zst",
+    LANDING_FORMAT_ARROW: ".arrow",
+}
+# spark json reader picks gzip codec from file extension, other formats are staged as parquet
+STAGED_EXTENSIONS = (LANDING_FORMAT_EXTENSIONS[LANDING_FORMAT_NDJSON_ZSTD],
+                     LANDING_FORMAT_EXTENSIONS[LANDING_FORMAT_ARROW])
+
+
+def get_landing_file_path(file_path: str, landing_format: str) -> str:
+    if landing_format not in LANDING_FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown landing format: {landing_format}, "
+                         f"expected one of {list(LANDING_FORMAT_EXTENSIONS)}")
+    return file_path + LANDING_FORMAT_EXTENSIONS[landing_format]
+
+
+def is_staged_landing_file(file_path: str) -> bool:
+    """
+    True if spark can not read landing file by itself and it has to be staged as parquet first
+    """
+    return file_path.endswith(STAGED_EXTENSIONS)
+
+
+def coerce_record(record: dict, arrow_schema: pa.Schema) -> dict:
+    """
+    Values of schema columns converted to their arrow type, nested values are kept as json text
+    """
+    values = {}
+    for field in arrow_schema:
+        value = record.get(field.name)
+        if value is None:
+            values[field.name] = None
+        elif pa.types.is_boolean(field.type):
+            values[field.name] = value if isinstance(value, bool) else str(value).lower() == "true"
+        elif isinstance(value, str):
+            values[field.name] = value
+        elif isinstance(value, bool):
+            values[field.name] = "true" if value else "false"
+        elif isinstance(value, (dict, list)):
+            values[field.name] = json.dumps(value, default=str)
+        else:
+            values[field.name] = str(value)
+    return values
+
+
+class HashingFile:
+    """
+    Binary file that hashes every byte written into it, so checksum of a compressed
+    landing file is known without reading it again
+    """
+
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        return self.file_obj.write(data)
+
+    def flush(self):
+        self.file_obj.flush()
+
+    def close(self):
+        self.file_obj.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.file_obj.closed
+
+
+class LandingFileWriter:
+    """
+    Writes records of one downloaded interval in landing format while response is streamed.
+    ndjson formats keep every field of a record, zstd and arrow landing files keep only columns
+    of arrow_schema with values coerced to their type so they can be read without inference.
+    Data is written into a hidden temporary file which replaces file_path only on close.
+
+    with LandingFileWriter(file_path, "arrow", schema.arrow_schema) as writer:
+        for record in records:
+            writer.write(record)
+    writer.checksum, writer.n_record
+    """
+
+    def __init__(self, file_path: str, landing_format: str, arrow_schema: pa.Schema,
+                 compression_level: int = 3, batch_records: int = 10000):
+        if landing_format not in LANDING_FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown landing format: {landing_format}")
+        self.file_path = file_path
+        self.landing_format = landing_format
+        self.arrow_schema = arrow_schema
+        self.batch_records = batch_records
+        self.temp_file_path = get_temp_file_path(file_path)
+        self.n_record = 0
+        self.checksum: str = None
+        self._file = HashingFile(open(self.temp_file_path, "wb"))
+        self._stream = None
+        self._arrow_writer = None
+        self._columns: Dict[str, List] = {}
+        if landing_format == LANDING_FORMAT_NDJSON_GZIP:
+            self._stream = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=compression_level, mtime=0)
+        elif landing_format == LANDING_FORMAT_NDJSON_ZSTD:
+            self._stream = zstandard.ZstdCompressor(level=compression_level).stream_writer(self._file,
+                                                                                          closefd=False)
+        elif landing_format == LANDING_FORMAT_ARROW:
+            self._columns = {name: [] for name in arrow_schema.names}
+            options = pa.ipc.IpcWriteOptions(compression=pa.Codec("zstd", compression_level))
+            self._arrow_writer = pa.ipc.new_stream(pa.PythonFile(self._file, mode="w"), arrow_schema,
+                                                   options=options)
+        else:
+            self._stream = self._file
+
+    def write(self, record: dict):
+        if self._arrow_writer is not None:
+            for name, value in coerce_record(record, self.arrow_schema).items():
+                self._columns[name].append(value)
+            if len(self._columns[self.arrow_schema.names[0]]) >= self.batch_records:
+                self._write_batch()
+        else:
+            if self.landing_format == LANDING_FORMAT_NDJSON_ZSTD:
+                record = coerce_record(record, self.arrow_schema)
+            self._stream.write((json.dumps(record, default=str) + "\n").encode("utf-8"))
+        self.n_record += 1
+
+    def _write_batch(self):
+        if len(self._columns[self.arrow_schema.names[0]]) == 0:
+            return
+        self._arrow_writer.write_batch(pa.RecordBatch.from_pydict(self._columns, schema=self.arrow_schema))
+        self._columns = {name: [] for name in self.arrow_schema.names}
+
+    def close(self):
+        """
+        Completes landing file and moves it into file_path
+        """
+        if self._arrow_writer is not None:
+            self._write_batch()
+            self._arrow_writer.close()
+        elif self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+        self.checksum = self._file.sha256.hexdigest()
+        os.replace(self.temp_file_path, self.file_path)
+
+    def abort(self):
+        """
+        Removes partially written landing file
+        """
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.temp_file_path):
+            os.remove(self.temp_file_path)
+
+    def __enter__(self) -> "LandingFileWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_landing_file(file_path: str, arrow_schema: pa.Schema) -> pa.Table:
+    """
+    Reads landing file of any format into a table of arrow_schema, fields outside schema are ignored.
+    Json whose values do not match schema types e.g. a number in a string column
+    is parsed again record by record and coerced.
+    """
+    if file_path.endswith(LANDING_FORMAT_EXTENSIONS[LANDING_FORMAT_ARROW]):
+        with pa.OSFile(file_path, "rb") as source, pa.ipc.open_stream(source) as reader:
+            return reader.read_all()
+    compression = None
+    if file_path.endswith(LANDING_FORMAT_EXTENSIONS[LANDING_FORMAT_NDJSON_ZSTD]):
+        compression = "zstd"
+    elif file_path.endswith(LANDING_FORMAT_EXTENSIONS[LANDING_FORMAT_NDJSON_GZIP]):
+        compression = "gzip"
+    with pa.OSFile(file_path, "rb") as source:
+        if compression is None:
+            data = source.read()
+        else:
+            with pa.CompressedInputStream(source, compression) as stream:
+                data = stream.read()
+    # json reader fails on empty input, an interval without complaints stays an empty file
+    if len(data) == 0:
+        return arrow_schema.empty_table()
+    try:
+        table = pa_json.read_json(pa.BufferReader(data), parse_options=pa_json.ParseOptions(
+            explicit_schema=arrow_schema, unexpected_field_behavior="ignore"))
+        return table.select(arrow_schema.names)
+    except pa.ArrowInvalid:
+        records = [coerce_record(json.loads(line), arrow_schema) for line in data.splitlines()
+                   if len(line.strip()) > 0]
+        return pa.Table.from_pylist(records, schema=arrow_schema)
+
+
+def stage_landing_file(file_path: str, parquet_file_path: str, arrow_schema: pa.Schema) -> str:
+    """
+    Copies a zstd or arrow landing file into a parquet file that spark can split and read in parallel.
+    Arrow landing files are copied batch by batch without parsing any json.
+    Staged file is reused while it is newer than landing file.
+    returns parquet_file_path
+    """
+    if os.path.exists(parquet_file_path) and os.path.getmtime(parquet_file_path) >= os.path.getmtime(file_path):
+        return parquet_file_path
+    os.makedirs(os.path.dirname(parquet_file_path), exist_ok=True)
+    temp_file_path = get_temp_file_path(parquet_file_path)
+    try:
+        with pq.ParquetWriter(temp_file_path, arrow_schema) as parquet_writer:
+            if file_path.endswith(LANDING_FORMAT_EXTENSIONS[LANDING_FORMAT_ARROW]):
+                with pa.OSFile(file_path, "rb") as source, pa.ipc.open_stream(source) as reader:
+                    for batch in reader:
+                        parquet_writer.write_batch(batch)
+            else:
+                parquet_writer.write_table(read_landing_file(file_path, arrow_schema))
+        os.replace(temp_file_path, parquet_file_path)
+        return parquet_file_path
+    except Exception:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise
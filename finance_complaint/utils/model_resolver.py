@@ -0,0 +1,39 @@
+import os
+from typing import List
+
+from finance_complaint.constants import TIMESTAMP
+from finance_complaint.constants.training_pipeline_constants import MODEL_TRAINER_MODEL_NAME
+
+
+class ModelResolver:
+    """
+    Locates pushed models, every pushed model is kept in its own version directory
+    e.g. saved_models/20230101_000000/finance_estimator, latest version is the one in use.
+    """
+
+    def __init__(self, model_dir: str, model_name: str = MODEL_TRAINER_MODEL_NAME):
+        self.model_dir = model_dir
+        self.model_name = model_name
+
+    def get_versions(self) -> List[str]:
+        if not os.path.exists(self.model_dir):
+            return []
+        # versions are timestamps so they sort in pushed order
+        return sorted(version for version in os.listdir(self.model_dir)
+                      if os.path.exists(os.path.join(self.model_dir, version, self.model_name)))
+
+    @property
+    def is_model_present(self) -> bool:
+        return len(self.get_versions()) > 0
+
+    def get_latest_version(self) -> str:
+        versions = self.get_versions()
+        if len(versions) == 0:
+            raise Exception(f"No model available in: {self.model_dir}")
+        return versions[-1]
+
+    def get_latest_model_path(self) -> str:
+        return os.path.join(self.model_dir, self.get_latest_version(), self.model_name)
+
+    def get_save_model_path(self, version: str = TIMESTAMP) -> str:
+        return os.path.join(self.model_dir, version, self.model_name)
@@ -0,0 +1,207 @@
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, Summary, start_http_server, \
+    write_to_textfile
+
+from finance_complaint.constants import TIMESTAMP
+from finance_complaint.constants.environment_constants.variable_key import METRICS_PORT_ENV_KEY
+from finance_complaint.constants.training_pipeline_constants import PIPELINE_ARTIFACT_DIR, METRICS_DIR, \
+    METRICS_TEXTFILE_NAME, METRICS_DOWNLOAD_BYTE_BUCKETS, METRICS_SPARK_JOB_SECOND_BUCKETS
+from finance_complaint.exception import FinanceException
+from finance_complaint.logger import logger, span
+from finance_complaint.utils import read_yaml_file, write_yaml_file
+
+METRICS_TEXTFILE_PATH = os.path.join(PIPELINE_ARTIFACT_DIR, METRICS_DIR, METRICS_TEXTFILE_NAME)
+# metrics of every stage of this run, kept so runs can be compared over time
+RUN_METRICS_FILE_PATH = os.path.join(PIPELINE_ARTIFACT_DIR, METRICS_DIR, f"{TIMESTAMP}.yaml")
+
+REGISTRY = CollectorRegistry()
+
+STAGE_DURATION = Summary("finance_stage_duration_seconds", "Wall time of pipeline stages", ["stage"],
+                         registry=REGISTRY)
+STAGE_LAST_DURATION = Gauge("finance_stage_last_duration_seconds", "Wall time of latest run of pipeline stages",
+                            ["stage"], registry=REGISTRY)
+DOWNLOAD_INTERVAL_BYTES = Histogram("finance_download_interval_bytes", "Bytes downloaded per interval",
+                                    buckets=METRICS_DOWNLOAD_BYTE_BUCKETS, registry=REGISTRY)
+DOWNLOAD_RECORDS = Counter("finance_download_records", "Records downloaded", registry=REGISTRY)
+DOWNLOAD_INTERVALS = Counter("finance_download_intervals", "Intervals requested by outcome", ["outcome"],
+                             registry=REGISTRY)
+DOWNLOAD_RETRIES = Counter("finance_download_retries", "Interval download retries by reason", ["reason"],
+                           registry=REGISTRY)
+RECORDS_PER_SECOND = Gauge("finance_records_per_second", "Records processed per second by latest operation",
+                           ["operation"], registry=REGISTRY)
+SPARK_JOB_DURATION = Histogram("finance_spark_job_duration_seconds", "Duration of finished spark jobs",
+                               ["status"], buckets=METRICS_SPARK_JOB_SECOND_BUCKETS, registry=REGISTRY)
+PEAK_RSS = Gauge("finance_peak_rss_bytes", "Peak resident memory, children includes spark jvm", ["process"],
+                 registry=REGISTRY)
+
+_observed_spark_jobs = set()
+_peak_children_rss = 0
+_lock = threading.Lock()
+# stages run concurrently by the scheduler update same run metrics file
+_run_metrics_lock = threading.Lock()
+# stages being measured, token of each measurement -> names of stages that ran at same time as it
+_active_stages = {}
+
+
+def observe_records_per_second(operation: str, n_record: int, duration: float):
+    if duration > 0:
+        RECORDS_PER_SECOND.labels(operation=operation).set(n_record / duration)
+
+
+def observe_peak_rss():
+    """
+    Peak rss of this process comes from the os, rss of child processes such as the
+    local spark jvm is sampled so its peak is the highest value seen at sampling time
+    """
+    global _peak_children_rss
+    # ru_maxrss is in kilobytes on linux
+    PEAK_RSS.labels(process="python").set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+    try:
+        import psutil
+        children_rss = sum(child.memory_info().rss for child in psutil.Process().children(recursive=True))
+        with _lock:
+            _peak_children_rss = max(_peak_children_rss, children_rss)
+            PEAK_RSS.labels(process="children").set(_peak_children_rss)
+    except Exception as e:
+        logger.debug(f"Unable to sample rss of child processes: {e}")
+
+
+def parse_spark_time(value: str) -> float:
+    # e.g. 2023-01-01T10:00:00.000GMT
+    return datetime.strptime(value.replace("GMT", "+0000"), "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+
+
+def observe_spark_jobs():
+    """
+    Reads finished jobs from monitoring api of running spark session,
+    each job is observed once. Nothing is done if spark has not been started.
+    """
+    from finance_complaint.configs.spark_manager import get_active_spark_session
+    spark_session = get_active_spark_session()
+    if spark_session is None or spark_session.sparkContext.uiWebUrl is None:
+        return
+    try:
+        import requests
+        spark_context = spark_session.sparkContext
+        response = requests.get(f"{spark_context.uiWebUrl}/api/v1/applications/"
+                                f"{spark_context.applicationId}/jobs", timeout=5)
+        response.raise_for_status()
+        for job in response.json():
+            if job["jobId"] in _observed_spark_jobs or "completionTime" not in job:
+                continue
+            _observed_spark_jobs.add(job["jobId"])
+            duration = parse_spark_time(job["completionTime"]) - parse_spark_time(job["submissionTime"])
+            SPARK_JOB_DURATION.labels(status=job["status"].lower()).observe(duration)
+    except Exception as e:
+        logger.debug(f"Unable to read spark jobs: {e}")
+
+
+def get_metric_values() -> dict:
+    """
+    returns flat dict of every sample e.g. finance_download_retries_total{reason="429"} -> 3.0
+    """
+    values = {}
+    for metric in REGISTRY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_created"):
+                continue
+            labels = ",".join(f'{key}="{value}"' for key, value in sorted(sample.labels.items()))
+            values[f"{sample.name}{{{labels}}}" if labels else sample.name] = sample.value
+    return values
+
+
+def write_metrics_textfile(file_path: str = METRICS_TEXTFILE_PATH):
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_to_textfile(file_path, REGISTRY)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+
+def start_metrics_server():
+    """
+    Serves metrics for scraping on port given in METRICS_PORT_ENV_KEY, nothing is done if it is not set
+    """
+    port = os.getenv(METRICS_PORT_ENV_KEY)
+    if port is not None:
+        start_http_server(int(port), registry=REGISTRY)
+        logger.info(f"Serving metrics at http://0.0.0.0:{port}/metrics")
+
+
+@contextmanager
+def measure_stage(stage: str, metrics_dir: str = None, **attributes):
+    """
+    Runs a stage inside a span and yields a dict that is filled, once the stage finishes, with its
+    wall time, peak rss and change of every counter during the stage. Stage metrics are appended
+    to metrics file of this run and prometheus textfile is rewritten.
+    Counters are process wide, so if another stage ran at the same time their changes can not be
+    attributed to either stage. Only wall time, peak rss and names of overlapping stages are kept then.
+    metrics_dir: directory of run metrics file and prometheus textfile, pipeline metrics directory if None
+
+    with measure_stage("data_ingestion") as stage_metrics:
+        artifact = data_ingestion.initiate_data_ingestion()
+    artifact.metrics = stage_metrics
+    """
+    run_metrics_file_path, metrics_textfile_path = RUN_METRICS_FILE_PATH, METRICS_TEXTFILE_PATH
+    if metrics_dir is not None:
+        run_metrics_file_path = os.path.join(metrics_dir, os.path.basename(RUN_METRICS_FILE_PATH))
+        metrics_textfile_path = os.path.join(metrics_dir, METRICS_TEXTFILE_NAME)
+    stage_metrics = {}
+    token = object()
+    with _lock:
+        overlapping_stages = set()
+        for other_stage, other_overlapping_stages in _active_stages.values():
+            other_overlapping_stages.add(stage)
+            overlapping_stages.add(other_stage)
+        _active_stages[token] = (stage, overlapping_stages)
+    values_before = get_metric_values()
+    start_time = time.perf_counter()
+    try:
+        with span(stage, **attributes) as span_attributes:
+            yield stage_metrics
+    finally:
+        duration = time.perf_counter() - start_time
+        with _lock:
+            _active_stages.pop(token)
+        try:
+            observe_spark_jobs()
+            observe_peak_rss()
+            STAGE_DURATION.labels(stage=stage).observe(duration)
+            STAGE_LAST_DURATION.labels(stage=stage).set(duration)
+
+            stage_metrics["duration_seconds"] = duration
+            if len(overlapping_stages) > 0:
+                stage_metrics["overlapping_stages"] = sorted(overlapping_stages)
+            for name, value in get_metric_values().items():
+                base_name = name.split("{")[0]
+                if base_name.startswith("finance_stage_") or base_name.endswith("_bucket"):
+                    continue
+                if len(overlapping_stages) > 0 and base_name != "finance_peak_rss_bytes":
+                    continue
+                if base_name.endswith(("_total", "_sum", "_count")):
+                    # counters, histograms and summaries accumulate so only their change belongs to this stage
+                    change = value - values_before.get(name, 0.0)
+                    if change != 0:
+                        stage_metrics[name] = change
+                elif base_name == "finance_peak_rss_bytes" or values_before.get(name) != value:
+                    # gauges set during this stage
+                    stage_metrics[name] = value
+            stage_metrics.update({key: value for key, value in span_attributes.items()
+                                  if isinstance(value, (int, float, str))})
+
+            with _run_metrics_lock:
+                run_metrics = read_yaml_file(run_metrics_file_path) if os.path.exists(run_metrics_file_path) else {}
+                run_metrics = run_metrics or {}
+                run_metrics[stage] = stage_metrics
+                write_yaml_file(file_path=run_metrics_file_path, data=run_metrics)
+                write_metrics_textfile(metrics_textfile_path)
+        except Exception as e:
+            # metrics never fail a stage
+            logger.warning(f"Unable to record metrics of stage {stage}: {e}")
@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread safe token bucket shared by every download worker.
+
+    rate: number of requests allowed per second
+    capacity: maximum number of requests that can be fired in a burst
+    min_rate: lowest rate the limiter will back off to after repeated throttling
+    """
+
+    def __init__(self, rate: float, capacity: int, min_rate: float = None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate is not None else self.max_rate / 16
+        self.capacity = max(1, int(capacity))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = max(self.updated_at, now)
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available and the limiter is not paused by a throttle response
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait_second = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_second = (1 - self.tokens) / self.rate
+            time.sleep(wait_second)
+
+    def throttle(self, wait_second: float = 0) -> None:
+        """
+        Called when any worker receives a throttle response.
+        Rate is halved and all workers are paused for wait_second.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, now + wait_second)
+            self.updated_at = self.blocked_until
+
+    def recover(self) -> None:
+        """
+        Called after a successful request, rate is increased gradually back to max_rate
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
@@ -1,7 +1,7 @@
 from finance_complaint.configs.training_pipeline_config import FinanceConfig
+from finance_complaint.constants.environment_constants.variable_key import DATA_VALIDATION_FAST_MODE_ENV_KEY
 from finance_complaint.exception import FinanceException
 from finance_complaint.logger import logger
-from finance_complaint.pipeline.training_pipeline import TrainingPipeline
 import sys,argparse, os
 
 
@@ -9,18 +9,89 @@ import sys,argparse, os
 def start_training(start=False):
     try:
         if start:
+            # imported here so that spark and training dependencies are loaded only when training runs
+            from finance_complaint.pipeline.training_pipeline import TrainingPipeline
             print("Training Running")
             TrainingPipeline(FinanceConfig()).start()
     except Exception as e:
         raise FinanceException(e, sys)
 
 def start_prediction(start=False):
-    pass
+    try:
+        if start:
+            from finance_complaint.pipeline.prediction_pipeline import PredictionPipeline
+            print("Prediction Running")
+            PredictionPipeline(FinanceConfig()).start()
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def start_online_scoring(start=False):
+    try:
+        if start:
+            # only numpy scorer is loaded, spark is never started
+            from finance_complaint.online_scoring import serve_online_scorer
+            from finance_complaint.utils.model_resolver import ModelResolver
+            online_scoring_config = FinanceConfig().get_online_scoring_config()
+            model_resolver = ModelResolver(model_dir=online_scoring_config.saved_model_dir)
+            scorer_dir = os.path.join(os.path.dirname(model_resolver.get_latest_model_path()),
+                                      online_scoring_config.scorer_dir_name)
+            serve_online_scorer(scorer_dir=scorer_dir,
+                                host=online_scoring_config.host,
+                                port=online_scoring_config.port,
+                                max_batch_size=online_scoring_config.max_batch_size,
+                                max_wait_ms=online_scoring_config.max_wait_ms,
+                                request_timeout=online_scoring_config.request_timeout)
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def start_dead_letter_replay(start=False):
+    try:
+        if start:
+            from finance_complaint.pipeline.training_pipeline import TrainingPipeline
+            print("Dead letter replay Running")
+            TrainingPipeline(FinanceConfig()).start_dead_letter_replay()
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def start_complaint_store_export(start=False):
+    try:
+        if start:
+            from finance_complaint.pipeline.training_pipeline import TrainingPipeline
+            print("Complaint store export Running")
+            TrainingPipeline(FinanceConfig()).start_complaint_store_export()
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def start_benchmark(start=False):
+    try:
+        if start:
+            from finance_complaint.benchmark.ingestion_benchmark import IngestionBenchmark
+            print("Ingestion benchmark Running")
+            IngestionBenchmark(FinanceConfig().get_benchmark_config()).initiate_benchmark()
+    except Exception as e:
+        raise FinanceException(e, sys)
+
+def start_feature_store_compaction(start=False):
+    try:
+        if start:
+            # compaction runs in process with pyarrow, no spark session is started
+            from finance_complaint.feature_store.compaction import FeatureStoreCompaction
+            print("Feature store compaction Running")
+            FeatureStoreCompaction(FinanceConfig().get_feature_store_compaction_config()).initiate_compaction()
+    except Exception as e:
+        raise FinanceException(e, sys)
 
-def main(training_status,prediction_status):
+def main(training_status,prediction_status,replay_status=False,serving_status=False,export_status=False,
+         benchmark_status=False,compaction_status=False):
     try:
+        start_benchmark(benchmark_status)
+        start_dead_letter_replay(replay_status)
+        start_complaint_store_export(export_status)
+        start_feature_store_compaction(compaction_status)
         start_training(training_status)
         start_prediction(prediction_status)
+        # serving runs until interrupted so it is started last
+        start_online_scoring(serving_status)
     except Exception as e:
         raise FinanceException(e, sys)
 
@@ -28,10 +99,30 @@ if __name__ == "__main__":
     try:
         parser = argparse.ArgumentParser()
         parser.add_argument("--t", default=0, type=int, help="If provided training process will start else not.")
-        parser.add_argument("--p", default=0, type=int, help="If provided training process will start else not.")
+        parser.add_argument("--p", default=0, type=int, help="If provided prediction process will start else not.")
+        parser.add_argument("--r", default=0, type=int,
+                            help="If provided intervals failed in earlier ingestion runs will be downloaded again.")
+        parser.add_argument("--m", default=0, type=int,
+                            help="If provided complaints added to complaint store will be exported into feature store.")
+        parser.add_argument("--s", default=0, type=int,
+                            help="If provided latest saved model will be served over http for online scoring.")
+        parser.add_argument("--b", default=0, type=int,
+                            help="If provided ingestion will be benchmarked against a local fake CFPB api.")
+        parser.add_argument("--c", default=0, type=int,
+                            help="If provided small files of feature store partitions will be compacted.")
+        parser.add_argument("--v", default=0, type=int,
+                            help="If provided training validates only partitions ingested since last valid "
+                                 "validation, meant for daily runs.")
 
         args = parser.parse_args()
+        if args.v:
+            # read by every data validation config of this run, scheduler fingerprints included
+            os.environ[DATA_VALIDATION_FAST_MODE_ENV_KEY] = "1"
+        # scrape endpoint is started only when METRICS_PORT is set
+        from finance_complaint.utils.pipeline_metrics import start_metrics_server
+        start_metrics_server()
 
-        main(training_status=args.t,prediction_status=args.p)
+        main(training_status=args.t,prediction_status=args.p,replay_status=args.r,serving_status=args.s,
+             export_status=args.m, benchmark_status=args.b, compaction_status=args.c)
     except Exception as e:
         logger.exception(e)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import pytest
+
+from finance_complaint.data_access import ComplaintStore, LocalComplaintStore, get_complaint_store
+
+
+def complaint(complaint_id: str, date_received: str, **fields) -> dict:
+    return {"complaint_id": complaint_id, "date_received": date_received, **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalComplaintStore(store_dir=str(tmp_path / "complaints"), batch_size=2)
+
+
+def test_complaint_store_is_abstract():
+    with pytest.raises(TypeError):
+        ComplaintStore(batch_size=10)
+
+
+def test_get_complaint_store(tmp_path):
+    store = get_complaint_store(store_type="local", collection_name="complaints", batch_size=10,
+                                local_store_dir=str(tmp_path))
+    assert isinstance(store, LocalComplaintStore)
+    with pytest.raises(Exception):
+        get_complaint_store(store_type="unknown", collection_name="complaints", batch_size=10,
+                            local_store_dir=str(tmp_path))
+
+
+def test_save_documents_writes_in_batches(store):
+    documents = [complaint(str(i), "2023-01-01T12:00:00-05:00") for i in range(5)]
+
+    assert store.save_documents(documents) == 5
+
+    with open(store.log_file_path, "rb") as log_file:
+        assert len(log_file.readlines()) == 5
+    assert sorted(document["complaint_id"] for document in store.find_after()) == ["0", "1", "2", "3", "4"]
+
+
+def test_save_documents_upsert_replaces_stored_document(store):
+    store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00", product="Mortgage")])
+
+    assert store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00", product="Student loan"),
+                                 complaint("2", "2023-01-01T12:00:00-05:00", product="Mortgage")]) == 2
+
+    documents = {document["complaint_id"]: document for document in store.find_after()}
+    assert documents["1"]["product"] == "Student loan"
+    assert len(documents) == 2
+
+
+def test_save_documents_without_upsert_skips_stored_document(store):
+    store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00", product="Mortgage")])
+
+    assert store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00", product="Student loan"),
+                                 complaint("2", "2023-01-01T12:00:00-05:00", product="Mortgage")],
+                                upsert=False) == 1
+
+    documents = {document["complaint_id"]: document for document in store.find_after()}
+    assert documents["1"]["product"] == "Mortgage"
+    assert len(documents) == 2
+
+
+def test_find_after_includes_watermark_in_date_received_order(store):
+    store.save_documents([complaint("3", "2023-01-03T12:00:00-05:00"),
+                          complaint("1", "2023-01-01T12:00:00-05:00"),
+                          complaint("2", "2023-01-02T12:00:00-05:00"),
+                          complaint("4", "2023-01-02T12:00:00-05:00")])
+
+    documents = list(store.find_after("2023-01-02T12:00:00-05:00"))
+
+    assert [document["date_received"] for document in documents] == ["2023-01-02T12:00:00-05:00",
+                                                                      "2023-01-02T12:00:00-05:00",
+                                                                      "2023-01-03T12:00:00-05:00"]
+    assert {document["complaint_id"] for document in documents} == {"2", "3", "4"}
+
+
+def test_find_new_returns_complaints_added_at_watermark_after_export(store):
+    watermark = "2023-01-02T12:00:00-05:00"
+    store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00"), complaint("2", watermark)])
+    exported_ids = [document["complaint_id"] for document in store.find_new()]
+    assert sorted(exported_ids) == ["1", "2"]
+
+    # complaint of the same day as watermark stored after previous export
+    store.save_documents([complaint("3", watermark), complaint("4", "2023-01-03T12:00:00-05:00")])
+
+    new_ids = [document["complaint_id"] for document in store.find_new(watermark, watermark_ids=["2"])]
+    assert new_ids == ["3", "4"]
+
+
+def test_find_new_without_new_complaints(store):
+    watermark = "2023-01-02T12:00:00-05:00"
+    store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00"), complaint("2", watermark)])
+
+    assert list(store.find_new(watermark, watermark_ids=["2"])) == []
+
+
+def test_watch_changes_returns_documents_written_after_resume_token(store):
+    store.save_documents([complaint("1", "2023-01-01T12:00:00-05:00")])
+    resume_token = store.get_resume_token()
+    store.save_documents([complaint("2", "2023-01-01T12:00:00-05:00"),
+                          complaint("1", "2023-01-01T12:00:00-05:00", product="Mortgage")])
+
+    documents, resume_token = store.watch_changes(resume_token)
+
+    assert {document["complaint_id"]: document.get("product") for document in documents} == {"1": "Mortgage",
+                                                                                             "2": None}
+    assert store.watch_changes(resume_token) == ([], resume_token)
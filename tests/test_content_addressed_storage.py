@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from finance_complaint.cloud_storage import ContentAddressedStorage, LocalStorageBackend, StorageBackend
+
+
+def write_file(file_path: str, data: bytes):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as file_obj:
+        file_obj.write(data)
+
+
+def read_file(file_path: str) -> bytes:
+    with open(file_path, "rb") as file_obj:
+        return file_obj.read()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return ContentAddressedStorage(backend=LocalStorageBackend(root_dir=str(tmp_path / "bucket")),
+                                   prefix="model",
+                                   max_workers=2,
+                                   hash_cache_file_path=str(tmp_path / "hash_cache.yaml"))
+
+
+@pytest.fixture
+def local_dir(tmp_path):
+    local_dir = tmp_path / "local"
+    write_file(str(local_dir / "metadata.yaml"), b"name: model\n")
+    write_file(str(local_dir / "stages" / "0_tokenizer" / "part-0.parquet"), b"tokenizer")
+    write_file(str(local_dir / "stages" / "1_classifier" / "part-0.parquet"), b"classifier")
+    return local_dir
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+
+def test_push_dir_stores_objects_by_checksum(storage, local_dir):
+    push_result = storage.push_dir(str(local_dir), name="model", version="v1")
+
+    assert push_result.manifest_key == "model/manifests/model/v1.yaml"
+    assert push_result.n_file == 3
+    assert push_result.n_uploaded_file == 3
+    assert push_result.n_uploaded_byte == push_result.n_byte
+    assert storage.get_latest_version("model") == "v1"
+    for file_info in storage.get_manifest("model").values():
+        object_key = storage.get_object_key(file_info["checksum"])
+        assert object_key.startswith(f"model/objects/{file_info['checksum'][:2]}/")
+        assert storage.backend.exists(object_key)
+
+
+def test_push_dir_uploads_only_changed_files(storage, local_dir):
+    storage.push_dir(str(local_dir), name="model", version="v1")
+    write_file(str(local_dir / "metadata.yaml"), b"name: model\nversion: 2\n")
+
+    push_result = storage.push_dir(str(local_dir), name="model", version="v2")
+
+    assert push_result.n_file == 3
+    assert push_result.n_uploaded_file == 1
+    assert push_result.n_uploaded_byte == len(b"name: model\nversion: 2\n")
+    assert storage.get_latest_version("model") == "v2"
+    assert len(storage.get_manifest("model", version="v1")) == 3
+
+
+def test_push_dir_stores_same_content_once(storage, local_dir):
+    write_file(str(local_dir / "stages" / "2_copy" / "part-0.parquet"), b"classifier")
+
+    push_result = storage.push_dir(str(local_dir), name="model", version="v1")
+
+    assert push_result.n_file == 4
+    assert push_result.n_uploaded_file == 3
+    other_result = storage.push_dir(str(local_dir), name="other_model", version="v1")
+    assert other_result.n_uploaded_file == 0
+
+
+def test_pull_dir_downloads_missing_and_changed_files(storage, local_dir, tmp_path):
+    storage.push_dir(str(local_dir), name="model", version="v1")
+    pull_dir = tmp_path / "pulled"
+
+    assert storage.pull_dir("model", str(pull_dir)) == 3
+    for relative_path in ["metadata.yaml", "stages/0_tokenizer/part-0.parquet", "stages/1_classifier/part-0.parquet"]:
+        assert read_file(str(pull_dir / relative_path)) == read_file(str(local_dir / relative_path))
+
+    assert storage.pull_dir("model", str(pull_dir)) == 0
+    write_file(str(pull_dir / "metadata.yaml"), b"changed locally\n")
+    assert storage.pull_dir("model", str(pull_dir)) == 1
+    assert read_file(str(pull_dir / "metadata.yaml")) == b"name: model\n"
+
+
+def test_pull_dir_of_previous_version(storage, local_dir, tmp_path):
+    storage.push_dir(str(local_dir), name="model", version="v1")
+    write_file(str(local_dir / "metadata.yaml"), b"name: model\nversion: 2\n")
+    storage.push_dir(str(local_dir), name="model", version="v2")
+    pull_dir = tmp_path / "pulled"
+
+    storage.pull_dir("model", str(pull_dir), version="v1")
+
+    assert read_file(str(pull_dir / "metadata.yaml")) == b"name: model\n"
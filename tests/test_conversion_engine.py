@@ -0,0 +1,43 @@
+import pytest
+
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.feature_store.conversion_engine import ArrowConversionEngine, ConversionEngine, \
+    SparkConversionEngine, get_conversion_engine, select_conversion_engine
+
+
+def test_conversion_engine_is_abstract():
+    with pytest.raises(TypeError):
+        ConversionEngine(schema=FinanceDataSchema(), max_workers=2)
+
+
+def test_engine_without_convert_can_not_be_created():
+    class IncompleteEngine(ConversionEngine):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteEngine(schema=FinanceDataSchema(), max_workers=2)
+
+
+def test_get_conversion_engine():
+    schema = FinanceDataSchema()
+
+    assert isinstance(get_conversion_engine("arrow", schema=schema, max_workers=2), ArrowConversionEngine)
+    assert isinstance(get_conversion_engine("spark", schema=schema, max_workers=2), SparkConversionEngine)
+    with pytest.raises(ValueError):
+        get_conversion_engine("auto", schema=schema, max_workers=2)
+
+
+@pytest.mark.parametrize("engine_type, input_size, expected", [
+    ("auto", 100, "arrow"),
+    ("auto", 1000, "arrow"),
+    ("auto", 1001, "spark"),
+    ("arrow", 10 ** 9, "arrow"),
+    ("spark", 1, "spark"),
+])
+def test_select_conversion_engine(engine_type, input_size, expected):
+    assert select_conversion_engine(engine_type, input_size, arrow_engine_max_input_size=1000) == expected
+
+
+def test_select_unknown_conversion_engine():
+    with pytest.raises(ValueError):
+        select_conversion_engine("pandas", 100, arrow_engine_max_input_size=1000)
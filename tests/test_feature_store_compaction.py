@@ -0,0 +1,120 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from finance_complaint.entities.config_entities import FeatureStoreCompactionConfig
+from finance_complaint.entities.schema import FinanceDataSchema
+from finance_complaint.feature_store.compaction import SORT_COLUMNS_METADATA_KEY, FeatureStoreCompaction
+from finance_complaint.feature_store.conversion_engine import ArrowConversionEngine
+
+PARTITION_DIR = "date_received_year=2012/date_received_month=5"
+
+
+def complaints(rows: list) -> pa.Table:
+    """
+    rows: (complaint_id, date_received, product), other columns are null
+    """
+    schema = FinanceDataSchema().arrow_schema
+    records = [{"complaint_id": complaint_id, "date_received": date_received, "product": product}
+               for complaint_id, date_received, product in rows]
+    return pa.Table.from_pylist(records, schema=schema)
+
+
+def get_config(file_path: str, target_file_size: int = 1024 * 1024,
+               sort_columns: list = None) -> FeatureStoreCompactionConfig:
+    return FeatureStoreCompactionConfig(feature_store_file_path=file_path,
+                                        target_file_size=target_file_size,
+                                        row_group_records=2,
+                                        sort_columns=sort_columns or ["date_received", "product"],
+                                        max_workers=2,
+                                        compact_after_ingestion=False)
+
+
+def read_rows(partition_dir: str) -> list:
+    table = ArrowConversionEngine(schema=FinanceDataSchema(), max_workers=2).read_partition(partition_dir)
+    return list(zip(*[table[column].to_pylist() for column in ["complaint_id", "date_received", "product"]]))
+
+
+def list_data_files(partition_dir: str) -> list:
+    return sorted(file_name for file_name in os.listdir(partition_dir) if file_name.endswith(".parquet"))
+
+
+@pytest.fixture
+def feature_store(tmp_path):
+    """
+    Partition written by three ingestion runs, one small unsorted file each
+    """
+    file_path = str(tmp_path / "feature_store")
+    engine = ArrowConversionEngine(schema=FinanceDataSchema(), max_workers=2)
+    partition_dir = os.path.join(file_path, PARTITION_DIR)
+    engine.write_data_file(complaints([("3", "2012-05-20", "Mortgage"), ("1", "2012-05-03", "Student loan")]),
+                           partition_dir)
+    engine.write_data_file(complaints([("2", "2012-05-03", "Debt collection")]), partition_dir)
+    engine.write_data_file(complaints([("5", "2012-05-31", "Mortgage"), ("4", "2012-05-10", "Mortgage")]),
+                           partition_dir)
+    return file_path
+
+
+def test_small_files_are_compacted_into_sorted_file(feature_store):
+    compaction = FeatureStoreCompaction(feature_store_compaction_config=get_config(feature_store))
+
+    artifact = compaction.initiate_compaction()
+
+    assert artifact.compacted_partitions == [PARTITION_DIR]
+    assert (artifact.n_file_before, artifact.n_file_after) == (3, 1)
+    partition_dir = os.path.join(feature_store, PARTITION_DIR)
+    assert read_rows(partition_dir) == [("2", "2012-05-03", "Debt collection"),
+                                        ("1", "2012-05-03", "Student loan"),
+                                        ("4", "2012-05-10", "Mortgage"),
+                                        ("3", "2012-05-20", "Mortgage"),
+                                        ("5", "2012-05-31", "Mortgage")]
+    metadata = pq.read_metadata(os.path.join(partition_dir, list_data_files(partition_dir)[0]))
+    assert metadata.metadata[SORT_COLUMNS_METADATA_KEY] == b'["date_received", "product"]'
+    assert metadata.num_row_groups == 3
+
+
+def test_compacted_partition_is_not_compacted_again(feature_store):
+    FeatureStoreCompaction(feature_store_compaction_config=get_config(feature_store)).initiate_compaction()
+    partition_dir = os.path.join(feature_store, PARTITION_DIR)
+    files = list_data_files(partition_dir)
+
+    artifact = FeatureStoreCompaction(feature_store_compaction_config=get_config(feature_store)) \
+        .initiate_compaction()
+
+    assert artifact.compacted_partitions == []
+    assert list_data_files(partition_dir) == files
+
+
+def test_single_unsorted_file_is_compacted(tmp_path):
+    file_path = str(tmp_path / "feature_store")
+    ArrowConversionEngine(schema=FinanceDataSchema(), max_workers=2).write_data_file(
+        complaints([("2", "2012-05-20", "Mortgage"), ("1", "2012-05-03", "Mortgage")]),
+        os.path.join(file_path, PARTITION_DIR))
+
+    artifact = FeatureStoreCompaction(feature_store_compaction_config=get_config(file_path)).initiate_compaction()
+
+    assert artifact.compacted_partitions == [PARTITION_DIR]
+    assert [row[0] for row in read_rows(os.path.join(file_path, PARTITION_DIR))] == ["1", "2"]
+
+
+def test_changed_sort_columns_compact_partition_again(feature_store):
+    FeatureStoreCompaction(feature_store_compaction_config=get_config(feature_store)).initiate_compaction()
+
+    artifact = FeatureStoreCompaction(feature_store_compaction_config=get_config(
+        feature_store, sort_columns=["product", "date_received"])).initiate_compaction()
+
+    assert artifact.compacted_partitions == [PARTITION_DIR]
+    assert [row[0] for row in read_rows(os.path.join(feature_store, PARTITION_DIR))] == ["2", "4", "3", "5", "1"]
+
+
+def test_partition_is_split_into_files_of_target_size(feature_store):
+    artifact = FeatureStoreCompaction(feature_store_compaction_config=get_config(
+        feature_store, target_file_size=1)).initiate_compaction()
+
+    partition_dir = os.path.join(feature_store, PARTITION_DIR)
+    # a file is closed after every row group once it reaches target size
+    assert artifact.n_file_after == 3
+    assert len(list_data_files(partition_dir)) == 3
+    assert sorted(row[0] for row in read_rows(partition_dir)) == ["1", "2", "3", "4", "5"]
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from finance_complaint.utils.json_stream import iter_json_array
+
+
+def split_bytes(data: bytes, chunk_size: int) -> list:
+    return [data[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+
+
+RECORDS = [{"_source": {"complaint_id": str(i), "product": "Mortgage", "amount": i * 10.5}} for i in range(20)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 10 ** 6])
+def test_elements_split_across_chunks(chunk_size):
+    data = json.dumps(RECORDS, indent=2).encode("utf-8")
+
+    assert list(iter_json_array(split_bytes(data, chunk_size))) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_scalars_split_across_chunks(chunk_size):
+    data = b'[12345, -1.5e3, true, false, null, "text", [1, [2]], {}]'
+
+    assert list(iter_json_array(split_bytes(data, chunk_size))) == \
+        [12345, -1.5e3, True, False, None, "text", [1, [2]], {}]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_multibyte_characters_split_across_chunks(chunk_size):
+    records = [{"narrative": "déjà vu – 信用卡 😀"}, {"narrative": "ünïcödé"}]
+    data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+
+    assert list(iter_json_array(split_bytes(data, chunk_size))) == records
+
+
+def test_other_encoding():
+    records = [{"narrative": "café"}]
+    data = json.dumps(records, ensure_ascii=False).encode("utf-16")
+
+    assert list(iter_json_array(split_bytes(data, 3), encoding="utf-16")) == records
+
+
+@pytest.mark.parametrize("data", [b"[]", b"  [ ]  ", b"\n[\n]\n"])
+def test_empty_array(data):
+    assert list(iter_json_array([data])) == []
+
+
+def test_trailing_whitespace_is_accepted():
+    assert list(iter_json_array([b"[1, 2]", b" \n", b"\r\n"])) == [1, 2]
+
+
+@pytest.mark.parametrize("data", [b"[1 2]", b"[1,]", b"[,1]", b"[1,,2]", b"[,]", b'[{"a": 1} {"a": 2}]'])
+def test_malformed_separators_are_rejected(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(split_bytes(data, 1)))
+
+
+@pytest.mark.parametrize("data", [b"[1, 2] 3", b"[1][2]", b'[1]{"error": "x"}', b"[],"])
+def test_data_after_closing_bracket_is_rejected(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(split_bytes(data, 2)))
+
+
+@pytest.mark.parametrize("data", [b'{"error": "too many requests"}', b"null", b"error"])
+def test_not_an_array_is_rejected(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array([data]))
+
+
+@pytest.mark.parametrize("data", [b"", b"[", b"[1, 2", b"[1, 2,", b'[{"a": 1}, {"a":', b'["unterminated'])
+def test_truncated_array_is_rejected(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(split_bytes(data, 3)))
+
+
+def test_elements_before_truncation_are_yielded():
+    elements = []
+    with pytest.raises(ValueError):
+        for element in iter_json_array([b'[{"a": 1}, {"a": 2}, {"a"']):
+            elements.append(element)
+
+    assert elements == [{"a": 1}, {"a": 2}]
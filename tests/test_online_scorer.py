@@ -0,0 +1,190 @@
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from finance_complaint.online_scoring import MicroBatcher, OnlineScorer
+from finance_complaint.online_scoring.scorer import SCORER_SPEC_FILE_NAME, SCORER_WEIGHTS_FILE_NAME, murmur3_32
+from finance_complaint.online_scoring.server import ScoringRequestHandler
+from finance_complaint.utils import write_yaml_file
+
+# spec as exported for StringIndexer(handleInvalid=keep), OneHotEncoder(handleInvalid=keep, dropLast=True),
+# RegexTokenizer(pattern="\\W+", minTokenLength=2) and HashingTF(numFeatures=16)
+SPEC = {
+    "intercept": -0.5,
+    "threshold": 0.5,
+    "positive_label": "Yes",
+    "negative_label": "No",
+    "categorical_columns": ["product", "state"],
+    "category_labels": [["Mortgage", "Debt collection"], ["CA"]],
+    "category_offsets": [0, 3],
+    "category_sizes": [3, 2],
+    "encoded_sizes": [3, 2],
+    "keep_invalid": True,
+    "text_column": "narrative",
+    "token_pattern": "\\W+",
+    "gaps": True,
+    "min_token_length": 2,
+    "to_lowercase": True,
+    "stop_words": ["the", "was", "I"],
+    "case_sensitive": False,
+    "num_features": 16,
+    "binary": False,
+    "text_offset": 5,
+}
+
+
+def to_signed(value: int) -> int:
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+
+@pytest.fixture
+def scorer_dir(tmp_path):
+    scorer_dir = str(tmp_path / "scorer")
+    os.makedirs(scorer_dir)
+    np.save(os.path.join(scorer_dir, SCORER_WEIGHTS_FILE_NAME), np.arange(21, dtype=np.float64) / 10)
+    write_yaml_file(file_path=os.path.join(scorer_dir, SCORER_SPEC_FILE_NAME), data=SPEC)
+    return scorer_dir
+
+
+@pytest.fixture
+def scorer(scorer_dir):
+    return OnlineScorer(scorer_dir)
+
+
+@pytest.mark.parametrize("data, seed, expected", [
+    (b"", 0, 0),
+    (b"", 1, 0x514E28B7),
+    (b"", 0xFFFFFFFF, 0x81F16F39),
+    (b"\x00\x00\x00\x00", 0, 0x2362F9DE),
+    (b"\xff\xff\xff\xff", 0, 0x76293B50),
+    (b"\x21\x43\x65\x87", 0, 0xF55B516B),
+    (b"\x21\x43\x65", 0, 0x7E4A8634),
+    (b"a", 0x9747B28C, 0x7FA09EA6),
+    (b"aa", 0x9747B28C, 0x5D211726),
+    (b"aaa", 0x9747B28C, 0x283E0130),
+    (b"aaaa", 0x9747B28C, 0x5A97808A),
+    (b"Hello, world!", 0x9747B28C, 0x24884CBA),
+    (b"The quick brown fox jumps over the lazy dog", 0x9747B28C, 0x2FA826CD),
+])
+def test_murmur3_known_vectors(data, seed, expected):
+    assert murmur3_32(data, seed) == to_signed(expected)
+
+
+def test_tokenize_matches_regex_tokenizer_and_stop_words_remover(scorer):
+    # text is lowercased, split on non word characters, short tokens and stop words are dropped
+    assert scorer.tokenize("The bank's loan WAS denied, I called BANK twice!") == \
+        ["bank", "loan", "denied", "called", "bank", "twice"]
+    assert scorer.tokenize(None) == []
+    assert scorer.tokenize("") == []
+
+
+def test_feature_indices_match_one_hot_and_hashing_tf(scorer):
+    record = {"product": "Debt collection", "state": "NY", "narrative": "bank loan bank"}
+
+    indices = scorer.get_feature_indices(record)
+
+    bank, loan = [SPEC["text_offset"] + murmur3_32(token.encode("utf-8")) % SPEC["num_features"]
+                  for token in ["bank", "loan"]]
+    # unseen state takes the extra index kept by StringIndexer, repeated token counts twice
+    assert sorted(indices) == sorted([1, 3 + 1, bank, loan, bank])
+
+
+def test_missing_categories_take_extra_index(scorer):
+    assert scorer.get_feature_indices({}) == [2, 4]
+    assert scorer.get_feature_indices({"product": "Mortgage", "state": "CA"}) == [0, 3]
+
+
+def test_predict_adds_weights_of_features(scorer):
+    records = [{"product": "Mortgage", "state": "CA"}, {"product": "Debt collection", "narrative": "bank"}]
+
+    predictions = scorer.predict(records)
+
+    weights = np.arange(21, dtype=np.float64) / 10
+    bank = SPEC["text_offset"] + murmur3_32(b"bank") % SPEC["num_features"]
+    for prediction, indices in zip(predictions, [[0, 3], [1, 4, bank]]):
+        probability = 1.0 / (1.0 + np.exp(-(SPEC["intercept"] + weights[indices].sum())))
+        assert prediction["probability"] == pytest.approx(probability)
+        assert prediction["prediction"] == ("Yes" if probability > 0.5 else "No")
+
+
+def test_get_invalid_fields(scorer):
+    assert scorer.get_invalid_fields({"product": "Mortgage", "state": None, "other": 1}) == []
+    assert scorer.get_invalid_fields({"product": 1, "narrative": ["text"]}) == ["product", "narrative"]
+
+
+class PendingBatcher:
+    """
+    Micro batcher whose requests never finish
+    """
+
+    def __init__(self, scorer: OnlineScorer):
+        self.scorer = scorer
+
+    def submit(self, records) -> Future:
+        return Future()
+
+
+def post(server: ThreadingHTTPServer, body) -> tuple:
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request("POST", "/predict", body=json.dumps(body), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(micro_batcher, request_timeout: float = 5.0) -> ThreadingHTTPServer:
+        handler = type("TestScoringRequestHandler", (ScoringRequestHandler,),
+                       {"micro_batcher": micro_batcher, "request_timeout": request_timeout})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_server_scores_complaints(scorer, start_server):
+    server = start_server(MicroBatcher(scorer, max_batch_size=8, max_wait_ms=1))
+
+    status, body = post(server, {"instances": [{"product": "Mortgage"}, {"narrative": "bank"}]})
+
+    assert status == 200
+    assert [prediction["probability"] for prediction in body["predictions"]] == \
+        pytest.approx([prediction["probability"] for prediction in
+                       scorer.predict([{"product": "Mortgage"}, {"narrative": "bank"}])])
+
+
+def test_server_rejects_field_of_wrong_type(scorer, start_server):
+    server = start_server(MicroBatcher(scorer, max_batch_size=8, max_wait_ms=1))
+
+    status, body = post(server, {"instances": [{"product": "Mortgage"}, {"product": 5, "narrative": {"a": 1}}]})
+
+    assert status == 400
+    assert "instance 1" in body["error"] and "product" in body["error"] and "narrative" in body["error"]
+    status, body = post(server, {"state": ["CA"]})
+    assert status == 400
+    assert "state" in body["error"]
+
+
+def test_server_times_out_with_504(scorer, start_server):
+    server = start_server(PendingBatcher(scorer), request_timeout=0.05)
+
+    status, body = post(server, {"product": "Mortgage"})
+
+    assert status == 504
+    assert "0.05 seconds" in body["error"]
@@ -0,0 +1,174 @@
+import os
+import threading
+from dataclasses import dataclass
+
+import pytest
+
+from finance_complaint.entities.config_entities import StageSchedulerConfig
+from finance_complaint.pipeline.stage_scheduler import Stage, StageScheduler
+
+
+@dataclass
+class FileArtifact:
+    file_path: str
+    metrics: dict = None
+
+
+@dataclass
+class OutputConfig:
+    output_dir: str
+    n_record: int
+
+
+def write_file(file_path: str, data: bytes):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as file_obj:
+        file_obj.write(data)
+
+
+def read_file(file_path: str) -> bytes:
+    with open(file_path, "rb") as file_obj:
+        return file_obj.read()
+
+
+class FileStage:
+    """
+    Stage writing a file into its config output_dir, an unchanged file is not rewritten. Counts its runs.
+    """
+
+    def __init__(self, config: OutputConfig, data: bytes = b"data"):
+        self.config = config
+        self.data = data
+        self.n_run = 0
+
+    def __call__(self, **artifacts) -> FileArtifact:
+        self.n_run += 1
+        file_path = os.path.join(self.config.output_dir, "output.txt")
+        if not os.path.exists(file_path) or read_file(file_path) != self.data:
+            write_file(file_path, self.data)
+        return FileArtifact(file_path=file_path)
+
+
+def run_scheduler(tmp_path, stages, timestamp: str = "20230101_000000", max_workers: int = 2) -> dict:
+    config = StageSchedulerConfig(cache_dir=str(tmp_path / "stage_cache"), timestamp=timestamp,
+                                  max_workers=max_workers)
+    return StageScheduler(stage_scheduler_config=config, stages=stages).run()
+
+
+def test_unknown_dependency_is_rejected(tmp_path):
+    with pytest.raises(Exception):
+        run_scheduler(tmp_path, [Stage(name="b", run=lambda a_artifact: None, artifact_class=FileArtifact,
+                                       depends_on=["a"])])
+
+
+def test_timestamp_is_removed_from_fingerprint(tmp_path):
+    runs = []
+    for timestamp in ["20230101_000000", "20230102_000000"]:
+        config = OutputConfig(output_dir=str(tmp_path / "artifact" / "a" / timestamp), n_record=10)
+        run = FileStage(config)
+        runs.append(run)
+        artifacts = run_scheduler(tmp_path, [Stage(name="a", run=run, artifact_class=FileArtifact, config=config)],
+                                  timestamp=timestamp)
+
+    assert [run.n_run for run in runs] == [1, 0]
+    # artifact of first run is reused
+    assert "20230101_000000" in artifacts["a"].file_path
+
+
+def test_config_change_runs_stage_again(tmp_path):
+    runs = []
+    for n_record in [10, 20]:
+        config = OutputConfig(output_dir=str(tmp_path / "artifact" / "a"), n_record=n_record)
+        run = FileStage(config)
+        runs.append(run)
+        run_scheduler(tmp_path, [Stage(name="a", run=run, artifact_class=FileArtifact, config=config)])
+
+    assert [run.n_run for run in runs] == [1, 1]
+
+
+def test_ignored_config_field_does_not_change_fingerprint(tmp_path):
+    runs = []
+    for n_record in [10, 20]:
+        config = OutputConfig(output_dir=str(tmp_path / "artifact" / "a"), n_record=n_record)
+        run = FileStage(config)
+        runs.append(run)
+        run_scheduler(tmp_path, [Stage(name="a", run=run, artifact_class=FileArtifact, config=config,
+                                       ignored_config_fields=["n_record"])])
+
+    assert [run.n_run for run in runs] == [1, 0]
+
+
+def test_changed_output_invalidates_cached_artifact(tmp_path):
+    config = OutputConfig(output_dir=str(tmp_path / "artifact" / "a"), n_record=10)
+    first_run, second_run = FileStage(config), FileStage(config)
+    artifacts = run_scheduler(tmp_path, [Stage(name="a", run=first_run, artifact_class=FileArtifact,
+                                               config=config)])
+    write_file(artifacts["a"].file_path, b"changed by hand")
+
+    run_scheduler(tmp_path, [Stage(name="a", run=second_run, artifact_class=FileArtifact, config=config)])
+
+    assert (first_run.n_run, second_run.n_run) == (1, 1)
+
+
+def test_dependent_runs_again_only_when_input_content_changes(tmp_path):
+    a_config = OutputConfig(output_dir=str(tmp_path / "artifact" / "a"), n_record=10)
+    b_config = OutputConfig(output_dir=str(tmp_path / "artifact" / "b"), n_record=10)
+    b_runs = []
+    for data in [b"first", b"first", b"second content"]:
+        b_run = FileStage(b_config)
+        b_runs.append(b_run)
+        run_scheduler(tmp_path, [
+            # always run stage is run every time, only a change of its output is a new input of b
+            Stage(name="a", run=FileStage(a_config, data=data), artifact_class=FileArtifact, always_run=True),
+            Stage(name="b", run=b_run, artifact_class=FileArtifact, config=b_config, depends_on=["a"]),
+        ])
+
+    assert [b_run.n_run for b_run in b_runs] == [1, 0, 1]
+
+
+def test_artifact_failing_check_is_not_cached(tmp_path):
+    config = OutputConfig(output_dir=str(tmp_path / "artifact" / "a"), n_record=10)
+    runs = []
+
+    def check(artifact: FileArtifact):
+        raise Exception(f"invalid artifact: {artifact.file_path}")
+
+    for _ in range(2):
+        run = FileStage(config)
+        runs.append(run)
+        with pytest.raises(Exception, match="invalid artifact"):
+            run_scheduler(tmp_path, [Stage(name="a", run=run, artifact_class=FileArtifact, config=config,
+                                           check=check)])
+
+    assert [run.n_run for run in runs] == [1, 1]
+    assert not os.path.exists(tmp_path / "stage_cache" / "a")
+
+
+def test_dependents_of_failed_stage_are_not_started(tmp_path):
+    b_config = OutputConfig(output_dir=str(tmp_path / "artifact" / "b"), n_record=10)
+    c_config = OutputConfig(output_dir=str(tmp_path / "artifact" / "c"), n_record=10)
+    b_run, c_run = FileStage(b_config), FileStage(c_config)
+    c_started = threading.Event()
+
+    def fail(**artifacts):
+        # independent stage is already running when failure is seen
+        c_started.wait(timeout=5)
+        raise Exception("stage a failed")
+
+    def run_c(**artifacts):
+        c_started.set()
+        return c_run(**artifacts)
+
+    with pytest.raises(Exception, match="stage a failed"):
+        run_scheduler(tmp_path, [
+            Stage(name="a", run=fail, artifact_class=FileArtifact, always_run=True),
+            Stage(name="b", run=b_run, artifact_class=FileArtifact, config=b_config, depends_on=["a"]),
+            Stage(name="c", run=run_c, artifact_class=FileArtifact, config=c_config),
+        ])
+
+    assert b_run.n_run == 0
+    # running stage finishes and its artifact is cached for next run
+    assert c_run.n_run == 1
+    next_c_run = FileStage(c_config)
+    run_scheduler(tmp_path, [Stage(name="c", run=next_c_run, artifact_class=FileArtifact, config=c_config)])
+    assert next_c_run.n_run == 0